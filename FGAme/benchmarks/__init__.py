@@ -0,0 +1,23 @@
+#-*- coding: utf8 -*-
+'''
+Benchmarks da FGAme.
+
+Executa um conjunto de cenas canônicas (ver benchmarks.scenes) sem utilizar o
+backend gráfico e mede o tempo de Simulation.update() e de cada uma das suas
+fases (forças, fase larga, fase fina e solver) com o profiler da simulação. Os
+resultados são gravados em JSON e podem ser comparados com uma execução de
+referência para detectar regressões de desempenho.
+
+Deve ser executado a partir do diretório que contém este pacote::
+
+    $ python -m benchmarks run -o results.json
+    $ python -m benchmarks run --scenes gas,pyramid --frames 100
+    $ python -m benchmarks compare results.json baseline.json
+
+O comando compare (ou run --baseline) termina com código de saída 1 caso
+alguma medida esteja mais lenta que a referência além da tolerância
+especificada em --threshold.
+'''
+
+from .scenes import *
+from .runner import *
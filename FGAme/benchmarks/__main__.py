@@ -0,0 +1,72 @@
+#-*- coding: utf8 -*-
+from __future__ import print_function
+
+import argparse
+import sys
+from benchmarks.scenes import SCENES
+from benchmarks.runner import (run_all, save_results, load_results, compare,
+                               format_comparison)
+
+def report(results, baseline, threshold):
+    '''Imprime a comparação e retorna o código de saída'''
+
+    print(format_comparison(results, baseline))
+    regressions = compare(results, baseline, threshold)
+    if not regressions:
+        print('\nno regressions')
+        return 0
+
+    print('\nregressions (threshold: %d%%):' % (100 * threshold))
+    for name, key, old, new, ratio in regressions:
+        print('    %s.%s: %.3f ms -> %.3f ms (x%.2f)' %
+              (name, key, 1000 * old, 1000 * new, ratio))
+    return 1
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='FGAme benchmarks')
+    commands = parser.add_subparsers(dest='command')
+
+    run = commands.add_parser('run', help='run the benchmarks')
+    run.add_argument('--scenes', default='',
+                     help='comma separated list of scenes (default: all). '
+                          'Available: ' +
+                          ', '.join(name for name, _, _ in SCENES))
+    run.add_argument('--frames', type=int, default=300,
+                     help='number of measured frames')
+    run.add_argument('--warmup', type=int, default=30,
+                     help='number of frames executed before measuring')
+    run.add_argument('--broad-phase', default=None,
+                     help='broad phase used in all scenes')
+    run.add_argument('-o', '--output', help='save results to a JSON file')
+    run.add_argument('--baseline', help='compare with a JSON file')
+    run.add_argument('--threshold', type=float, default=0.10)
+
+    cmp = commands.add_parser('compare', help='compare two result files')
+    cmp.add_argument('results')
+    cmp.add_argument('baseline')
+    cmp.add_argument('--threshold', type=float, default=0.10)
+
+    args = parser.parse_args(argv)
+    if args.command == 'compare':
+        return report(load_results(args.results), load_results(args.baseline),
+                      args.threshold)
+    elif args.command != 'run':
+        parser.print_help()
+        return 2
+
+    kwds = {}
+    if args.broad_phase:
+        kwds['broad_phase'] = args.broad_phase
+    names = [name for name in args.scenes.split(',') if name]
+    results = run_all(names, frames=args.frames, warmup=args.warmup,
+                      verbose=True, **kwds)
+    if args.output:
+        save_results(results, args.output)
+    if args.baseline:
+        print()
+        return report(results, load_results(args.baseline), args.threshold)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
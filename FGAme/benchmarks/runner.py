@@ -0,0 +1,140 @@
+#-*- coding: utf8 -*-
+'''
+Execução dos benchmarks e comparação com resultados anteriores.
+'''
+
+from __future__ import print_function
+
+import json
+import platform
+import sys
+import time
+from benchmarks.scenes import SCENES
+
+# Tempos (em segundos) reportados para cada cena e comparados com a referência
+TIMINGS = ['update', 'forces', 'broad_phase', 'narrow_phase', 'solver']
+
+# Contadores reportados para cada cena
+COUNTS = ['pairs', 'collisions', 'contacts']
+
+#===============================================================================
+# Execução
+#===============================================================================
+def run_scene(factory, params, frames=300, warmup=30, dt=1 / 60., **kwds):
+    '''Cria a cena com factory(**params), executa `warmup` frames e mede os
+    `frames` seguintes.
+
+    Retorna um dicionário com o número de objetos, a média de cada tempo em
+    TIMINGS e de cada contador em COUNTS e o menor e a mediana dos tempos de
+    Simulation.update().'''
+
+    params = dict(params, **kwds)
+    sim = factory(**params)
+    sim.step_n(warmup, dt)
+
+    profiler = sim.enable_profiler(size=frames)
+    sim.step_n(frames, dt)
+    sim.disable_profiler()
+
+    summary = profiler.summary()
+    totals = sorted(stats.total for stats in profiler)
+    result = {
+        'objects': len(sim._objects),
+        'frames': frames,
+        'params': params,
+        'update': summary['total'],
+        'update_min': totals[0],
+        'update_median': totals[len(totals) // 2],
+    }
+    for name in TIMINGS[1:] + COUNTS:
+        result[name] = summary[name]
+    return result
+
+def run_all(names=None, frames=300, warmup=30, dt=1 / 60., verbose=False,
+            **kwds):
+    '''Executa as cenas de SCENES (ou somente as cenas em `names`) e retorna
+    um dicionário com os resultados e informações sobre o ambiente'''
+
+    results = {}
+    for name, factory, params in SCENES:
+        if names and name not in names:
+            continue
+        if verbose:
+            print('%-16s' % name, end='')
+            sys.stdout.flush()
+        results[name] = run_scene(factory, params, frames, warmup, dt, **kwds)
+        if verbose:
+            print('%8.3f ms' % (1000 * results[name]['update']))
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'frames': frames,
+            'warmup': warmup,
+            'dt': dt,
+        },
+        'scenes': results,
+    }
+
+#===============================================================================
+# Persistência e comparação
+#===============================================================================
+def save_results(results, path):
+    '''Grava os resultados em formato JSON'''
+
+    with open(path, 'w') as F:
+        json.dump(results, F, indent=2, sort_keys=True)
+
+def load_results(path):
+    '''Lê os resultados gravados por save_results()'''
+
+    with open(path) as F:
+        return json.load(F)
+
+def compare(results, baseline, threshold=0.10, min_time=1e-5):
+    '''Compara os tempos dos resultados com os de uma execução de referência.
+
+    Retorna uma lista de tuplas (cena, medida, referência, atual, razão) com
+    as medidas que ficaram mais de `threshold` (fração) mais lentas que a
+    referência. Diferenças absolutas menores que `min_time` segundos são
+    ignoradas, pois estão abaixo da resolução das medidas.
+
+    >>> baseline = {'scenes': {'gas': {'update': 0.010, 'solver': 0.0}}}
+    >>> results = {'scenes': {'gas': {'update': 0.012, 'solver': 0.0}}}
+    >>> compare(results, baseline)
+    [('gas', 'update', 0.01, 0.012, 1.2)]
+    '''
+
+    regressions = []
+    reference = baseline['scenes']
+    for name, scene in sorted(results['scenes'].items()):
+        if name not in reference:
+            continue
+        for key in TIMINGS:
+            old, new = reference[name].get(key), scene.get(key)
+            if old is None or new is None or new - old < min_time:
+                continue
+            ratio = new / old if old else float('inf')
+            if ratio > 1 + threshold:
+                regressions.append((name, key, old, new, round(ratio, 3)))
+    return regressions
+
+def format_comparison(results, baseline):
+    '''Retorna uma tabela com os tempos de Simulation.update() nos resultados
+    e na referência'''
+
+    lines = ['%-16s %12s %12s %8s' % ('scene', 'baseline', 'current', 'ratio')]
+    reference = baseline['scenes']
+    for name, scene in sorted(results['scenes'].items()):
+        old = reference.get(name, {}).get('update')
+        new = scene['update']
+        if old:
+            lines.append('%-16s %9.3f ms %9.3f ms %8.2f' %
+                         (name, 1000 * old, 1000 * new, new / old))
+        else:
+            lines.append('%-16s %12s %9.3f ms %8s' %
+                         (name, '-', 1000 * new, '-'))
+    return '\n'.join(lines)
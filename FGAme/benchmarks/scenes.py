@@ -0,0 +1,280 @@
+#-*- coding: utf8 -*-
+'''
+Cenas canônicas utilizadas nos benchmarks.
+
+Cada função recebe o parâmetro de escala da cena e argumentos adicionais que
+são repassados ao construtor da Simulation (ex.: broad_phase='grid') e retorna
+uma Simulation pronta para ser executada. As cenas não dependem do backend e
+utilizam um gerador de números aleatórios com semente fixa, de modo que sejam
+idênticas em todas as execuções.
+'''
+
+import random
+from FGAme.math import Vector
+from FGAme.physics import (Simulation, AABB, Circle, Poly, GravityF,
+                           GravityPool, SpringNetwork)
+from FGAme.physics import (UniformField, DragField, AttractorField,
+                           BuoyancyField)
+from FGAme.extra.effects import explode
+from FGAme.extra.letters import add_word
+
+WIDTH, HEIGHT = 800, 600
+
+#===============================================================================
+# Funções auxiliares
+#===============================================================================
+def add_bounds(sim, xmin=0, xmax=WIDTH, ymin=0, ymax=HEIGHT, delta=100):
+    '''Adiciona quatro paredes estáticas ao redor da região especificada'''
+
+    walls = [AABB(bbox=(xmin - delta, xmax + delta, ymin - delta, ymin)),
+             AABB(bbox=(xmin - delta, xmax + delta, ymax, ymax + delta)),
+             AABB(bbox=(xmin - delta, xmin, ymin, ymax)),
+             AABB(bbox=(xmax, xmax + delta, ymin, ymax))]
+    for wall in walls:
+        wall.make_static()
+        sim.add(wall)
+    return walls
+
+def add_floor(sim, xmin=-1000, xmax=1000, y=0):
+    '''Adiciona um chão estático com o topo na altura y'''
+
+    floor = Poly.rect(bbox=(xmin, xmax, y - 50, y))
+    floor.make_static()
+    sim.add(floor)
+    return floor
+
+#===============================================================================
+# Cenas
+#===============================================================================
+def gas(N=200, speed=300, seed=0, **kwds):
+    '''Gás de N círculos com velocidades aleatórias dentro de uma caixa'''
+
+    rng = random.Random(seed)
+    kwds.setdefault('broad_phase', 'grid')
+    sim = Simulation(**kwds)
+    add_bounds(sim)
+    for _ in range(N):
+        pos = (rng.uniform(20, WIDTH - 20), rng.uniform(20, HEIGHT - 20))
+        vel = (rng.uniform(-speed, speed), rng.uniform(-speed, speed))
+        sim.add(Circle(5, pos=pos, vel=vel))
+    return sim
+
+def pyramid(rows=10, size=30, **kwds):
+    '''Pirâmide de caixas (Poly) com `rows` andares apoiada no chão'''
+
+    kwds.setdefault('gravity', 300)
+    kwds.setdefault('rest_coeff', 0)
+    kwds.setdefault('dfriction', 0.3)
+    kwds.setdefault('iterations', 10)
+    sim = Simulation(**kwds)
+    add_floor(sim)
+    for i in range(rows):
+        y = 1 + (size + 1) * i
+        x0 = -(rows - i) * (size + 1) / 2.
+        for j in range(rows - i):
+            x = x0 + j * (size + 1)
+            sim.add(Poly.rect(bbox=(x, x + size, y, y + size)))
+    return sim
+
+def tilemap(columns=40, bodies=60, tile=20, seed=0, **kwds):
+    '''Mapa de blocos estáticos (AABB) com degraus e corpos caindo sobre ele'''
+
+    rng = random.Random(seed)
+    kwds.setdefault('gravity', 300)
+    kwds.setdefault('rest_coeff', 0.5)
+    sim = Simulation(**kwds)
+    for i in range(columns):
+        for j in range(1 + i % 4):
+            block = AABB(bbox=(i * tile, (i + 1) * tile,
+                               j * tile, (j + 1) * tile))
+            block.make_static()
+            sim.add(block)
+    for _ in range(bodies):
+        x = rng.uniform(tile, (columns - 1) * tile)
+        y = rng.uniform(6 * tile, 20 * tile)
+        sim.add(AABB(shape=(10, 10), pos=(x, y)))
+    return sim
+
+def level(columns=100, rows=30, bodies=100, seed=0, **kwds):
+    '''Fase com columns x rows blocos estáticos (AABB) sob `bodies` círculos
+    que quicam sobre ela. A maior parte dos objetos é estática, o que favorece
+    a fase larga 'bvh' (padrão nesta cena)'''
+
+    rng = random.Random(seed)
+    kwds.setdefault('gravity', 300)
+    kwds.setdefault('rest_coeff', 0.8)
+    kwds.setdefault('broad_phase', 'bvh')
+    sim = Simulation(**kwds)
+    add_bounds(sim)
+    tile = float(WIDTH) / columns
+    for i in range(columns):
+        for j in range(rows):
+            block = AABB(bbox=(i * tile, (i + 1) * tile,
+                               j * tile, (j + 1) * tile))
+            block.make_static()
+            sim.add(block)
+    for _ in range(bodies):
+        pos = (rng.uniform(20, WIDTH - 20),
+               rng.uniform(rows * tile + 20, HEIGHT - 20))
+        vel = (rng.uniform(-100, 100), rng.uniform(-100, 100))
+        sim.add(Circle(5, pos=pos, vel=vel))
+    return sim
+
+def gravity_cluster(N=30, G=3e4, seed=0, **kwds):
+    '''Aglomerado de N círculos interagindo por forças GravityF entre todos os
+    pares'''
+
+    rng = random.Random(seed)
+    sim = Simulation(**kwds)
+    objects = []
+    for _ in range(N):
+        pos = (rng.uniform(200, 600), rng.uniform(100, 500))
+        vel = (rng.uniform(-20, 20), rng.uniform(-20, 20))
+        obj = Circle(4, pos=pos, vel=vel)
+        objects.append(obj)
+        sim.add(obj)
+
+    forces = dict((obj, []) for obj in objects)
+    for i, A in enumerate(objects):
+        for B in objects[i + 1:]:
+            F = GravityF(A, B, G, epsilon=5)
+            force_A, force_B = F.forces()
+            forces[A].append(force_A)
+            forces[B].append(force_B)
+
+    null = Vector(0, 0)
+    for obj in objects:
+        funcs = forces[obj]
+        obj.external_force = \
+            lambda t, funcs=funcs: sum((f(t) for f in funcs), null)
+    return sim
+
+def nbody(N=1000, G=1e3, method='barnes-hut', seed=0, **kwds):
+    '''Aglomerado de N círculos cujas forças gravitacionais são calculadas por
+    um GravityPool com o método especificado'''
+
+    rng = random.Random(seed)
+    kwds.setdefault('broad_phase', 'grid')
+    sim = Simulation(**kwds)
+    objects = []
+    for _ in range(N):
+        pos = (rng.uniform(0, 2000), rng.uniform(0, 2000))
+        vel = (rng.uniform(-20, 20), rng.uniform(-20, 20))
+        obj = Circle(2, pos=pos, vel=vel)
+        objects.append(obj)
+        sim.add(obj)
+    sim.add_pool(GravityPool(objects, G, epsilon=5, method=method))
+    return sim
+
+def cloth(rows=20, columns=20, spacing=10, k=2000, damping=2, **kwds):
+    '''Tecido formado por uma grade de círculos ligados por um SpringNetwork e
+    preso pela linha superior'''
+
+    kwds.setdefault('gravity', 300)
+    kwds.setdefault('broad_phase', 'grid')
+    sim = Simulation(**kwds)
+    grid = []
+    for i in range(rows):
+        row = []
+        for j in range(columns):
+            obj = Circle(2, pos=(j * spacing, -i * spacing))
+            if i == 0:
+                obj.make_static()
+            row.append(obj)
+            sim.add(obj)
+        grid.append(row)
+
+    net = SpringNetwork(k=k, damping=damping)
+    for i in range(rows):
+        for j in range(columns):
+            if j + 1 < columns:
+                net.add_spring(grid[i][j], grid[i][j + 1])
+            if i + 1 < rows:
+                net.add_spring(grid[i][j], grid[i + 1][j])
+    sim.add_pool(net)
+    return sim
+
+def zones(N=300, seed=0, **kwds):
+    '''N círculos numa caixa com uma zona de vento, uma área de água e um
+    atrator (ver FGAme.physics.fields)'''
+
+    rng = random.Random(seed)
+    gravity = (0, -300)
+    kwds.setdefault('gravity', gravity)
+    kwds.setdefault('broad_phase', 'grid')
+    sim = Simulation(**kwds)
+    add_bounds(sim)
+    for _ in range(N):
+        pos = (rng.uniform(20, WIDTH - 20), rng.uniform(20, HEIGHT - 20))
+        vel = (rng.uniform(-100, 100), rng.uniform(-100, 100))
+        sim.add(Circle(4, pos=pos, vel=vel))
+
+    water = (0, WIDTH, 0, HEIGHT / 3.)
+    sim.add_field(BuoyancyField(1.2, gravity, region=water))
+    sim.add_field(DragField(20, region=water))
+    sim.add_field(UniformField(force=(4000, 0),
+                               region=(0, WIDTH / 2., HEIGHT / 2., HEIGHT)))
+    sim.add_field(AttractorField((WIDTH / 2., HEIGHT / 2.), 1e6, epsilon=20,
+                                 region=Circle(150, pos=(WIDTH / 2.,
+                                                         HEIGHT / 2.))))
+    return sim
+
+def bullets(N=50, speed=3000, seed=0, **kwds):
+    '''Projéteis rápidos com CCD (bullet=True) entre um gás de círculos lentos
+    dentro de uma caixa com paredes internas finas'''
+
+    sim = gas(N=100, seed=seed, **kwds)
+    rng = random.Random(seed + 1)
+    for x in range(200, WIDTH, 200):
+        wall = AABB(bbox=(x, x + 4, 100, HEIGHT - 100))
+        wall.make_static()
+        sim.add(wall)
+    for _ in range(N):
+        pos = (rng.uniform(20, WIDTH - 20), rng.uniform(20, HEIGHT - 20))
+        vel = (rng.uniform(-speed, speed), rng.uniform(-speed, speed))
+        obj = Circle(3, pos=pos, vel=vel, mass=1)
+        obj.bullet = True
+        sim.add(obj)
+    return sim
+
+def debris(N=6, energy=2e5, seed=0, **kwds):
+    '''Explode N polígonos sobre o chão (ver FGAme.extra.effects.explode())'''
+
+    kwds.setdefault('gravity', 300)
+    kwds.setdefault('rest_coeff', 0.3)
+    sim = Simulation(seed=seed, **kwds)
+    add_floor(sim)
+    for i in range(N):
+        obj = Poly.regular(6, 30, pos=(-300 + 120 * i, 100))
+        sim.add(obj)
+        explode(obj, sim, energy=energy, prob_rec=1)
+    return sim
+
+def text(repeat=4, scale=3, **kwds):
+    '''Frases escritas com add_word() caindo sobre o chão'''
+
+    kwds.setdefault('gravity', 300)
+    kwds.setdefault('rest_coeff', 0.3)
+    sim = Simulation(**kwds)
+    add_floor(sim, xmin=-500, xmax=1500)
+    for i in range(repeat):
+        add_word('the quick brown fox', sim, scale=scale,
+                 pos=(0, 50 + 60 * i))
+    return sim
+
+# Cenas e parâmetros utilizados por padrão
+SCENES = [
+    ('gas', gas, {'N': 200}),
+    ('pyramid', pyramid, {'rows': 10}),
+    ('tilemap', tilemap, {'columns': 40, 'bodies': 60}),
+    ('level', level, {'columns': 100, 'rows': 30}),
+    ('level_sweep', level, {'columns': 100, 'rows': 30,
+                            'broad_phase': 'sweep'}),
+    ('gravity_cluster', gravity_cluster, {'N': 30}),
+    ('nbody', nbody, {'N': 1000}),
+    ('cloth', cloth, {'rows': 20, 'columns': 20}),
+    ('zones', zones, {'N': 300}),
+    ('bullets', bullets, {'N': 50}),
+    ('debris', debris, {'N': 6}),
+    ('text', text, {'repeat': 4}),
+]
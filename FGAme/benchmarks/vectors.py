@@ -0,0 +1,85 @@
+#-*- coding: utf8 -*-
+'''
+Micro-benchmark das operações com vetores.
+
+Mede o tempo de cada operação de Vector e VectorM na implementação em Python
+puro (FGAme.math.linalg) e, se estiver disponível, na extensão compilada
+(FGAme.math.linalg_fast)::
+
+    $ python -m benchmarks.vectors
+
+Outros módulos com a mesma interface podem ser passados na linha de comando,
+por exemplo, uma cópia de uma versão anterior de linalg.py para medir o ganho
+de uma modificação::
+
+    $ python -m benchmarks.vectors FGAme.math.linalg old_linalg
+'''
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+# Operações medidas: (nome, código). As variáveis u, v, m, t estão definidas
+OPERATIONS = [
+    ('Vector(x, y)', 'Vector(1.0, 2.0)'),
+    ('u + v', 'u + v'),
+    ('u - v', 'u - v'),
+    ('u + tuple', 'u + t'),
+    ('tuple - u', 't - u'),
+    ('u * 2.0', 'u * 2.0'),
+    ('2.0 * u', '2.0 * u'),
+    ('u / 2.0', 'u / 2.0'),
+    ('-u', '-u'),
+    ('u == v', 'u == v'),
+    ('x, y = u', 'x, y = u'),
+    ('u.norm()', 'u.norm()'),
+    ('u.normalized()', 'u.normalized()'),
+    ('u.rotated(0.1)', 'u.rotated(0.1)'),
+    ('dot(u, v)', 'dot(u, v)'),
+    ('cross(u, v)', 'cross(u, v)'),
+    ('m += v', 'm += v'),
+    ('m -= v', 'm -= v'),
+    ('m *= 1.0', 'm *= 1.0'),
+    ('m.copy_from(v)', 'm.copy_from(v)'),
+    ('m.copy_from(tuple)', 'm.copy_from(t)'),
+    ('m.copy()', 'm.copy()'),
+]
+
+SETUP = '''
+from %s import Vector, VectorM, dot, cross
+u = Vector(1.0, 2.0)
+v = Vector(3.0, 4.0)
+m = VectorM(0.0, 0.0)
+t = (3.0, 4.0)
+'''
+
+def measure(module, number=100000, repeat=3):
+    '''Retorna uma lista de pares (operação, tempo em ns) com o melhor tempo
+    de cada operação no módulo especificado'''
+
+    setup = SETUP % module
+    result = []
+    for name, stmt in OPERATIONS:
+        times = timeit.repeat(stmt, setup, number=number, repeat=repeat)
+        result.append((name, 1e9 * min(times) / number))
+    return result
+
+def main(modules=None, number=100000):
+    if not modules:
+        modules = ['FGAme.math.linalg']
+        try:
+            import FGAme.math.linalg_fast
+            modules.append('FGAme.math.linalg_fast')
+        except ImportError:
+            pass
+
+    columns = [measure(module, number) for module in modules]
+    print('%-20s' % 'operation' +
+          ''.join('%14s' % module.split('.')[-1] for module in modules))
+    for i, (name, _) in enumerate(OPERATIONS):
+        print('%-20s' % name +
+              ''.join('%11.1f ns' % column[i][1] for column in columns))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
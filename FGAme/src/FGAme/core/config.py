@@ -18,6 +18,8 @@ def supports_backend(backend):
             return True
         except ImportError:
             return False
+    elif backend == 'headless':
+        return True
     else:
         raise ValueError('invalid backend: %s' % backend)
 
@@ -26,7 +28,11 @@ def set_backend(backend=None):
     
     Se for chamada sem nenhum argumento, tenta carregar os backends na ordem
     dada por globalvars.backends. Se o argumento for uma lista, tenta carregar os
-    backends na ordem especificada pela lista.'''
+    backends na ordem especificada pela lista.
+    
+    O backend 'headless' não abre nenhuma janela nem importa bibliotecas 
+    gráficas e executa o laço principal o mais rápido possível. Deve ser 
+    escolhido explicitamente, por exemplo em servidores sem display.'''
 
     # Função chamada sem argumentos
     if backend is None:
@@ -15,6 +15,7 @@ class Globals(object):
         sdl2      = ('SDL2Canvas', 'SDL2Input', 'StepperMainLoop'),
         pyglet    = ('PyGletCanvas', 'PyGletInput', 'PyGletMainLoop'),
         kivy      = ('KivyCanvas', 'KivyInput', 'KivyMainloop'),
+        headless  = ('NullCanvas', 'NullInput', 'HeadlessMainLoop'),
     )
     input_class = None
     input_object = None
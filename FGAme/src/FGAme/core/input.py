@@ -59,6 +59,14 @@ class Input(Listener):
 #===============================================================================
 # Backends
 #===============================================================================
+class NullInput(Input):
+    '''Entrada sem nenhum dispositivo associado. Utilizada pelo backend 
+    'headless'. Os eventos podem ser simulados chamando os métodos process_*
+    diretamente.'''
+    
+    def query(self):
+        self.process_long_press()
+
 class PyGameInput(Input):
     '''Implementa a interface Input através do Pygame.'''
 
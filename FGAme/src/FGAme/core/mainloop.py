@@ -3,46 +3,106 @@ import time
 from FGAme.core import globalvars
 
 class MainLoop(object):
-    '''Implements the main loop of application'''
+    '''Implements the main loop of application.
 
-    def __init__(self, fps=60):
+    By default the state is updated once per rendered frame with dt = 1/fps.
+    If `physics_fps` is given, the loop runs in fixed timestep mode: the
+    elapsed wall-clock time is accumulated and the state is updated in steps
+    of 1/physics_fps (at most `max_substeps` steps per frame). The fraction of
+    a step left in the accumulator is passed to Screen.draw_tree() as the
+    interpolation parameter `alpha` if `interpolate` is true.
+    '''
+
+    def __init__(self, fps=60, physics_fps=None, max_substeps=5,
+                 interpolate=True):
         self.fps = fps
         self.dt = 1.0 / self.fps
+        self.physics_fps = physics_fps
+        self.max_substeps = max_substeps
+        self.interpolate = interpolate
+        self.accumulator = 0.0
+
+    @property
+    def physics_dt(self):
+        if self.physics_fps is None:
+            return None
+        return 1.0 / self.physics_fps
+
+    def advance(self, state, elapsed):
+        '''Advances the state by `elapsed` seconds of wall-clock time in fixed
+        steps and returns the interpolation parameter alpha in [0, 1).
+
+        If the number of steps would exceed max_substeps, the remaining time
+        is discarded and the 'frame-skip' signal is triggered with the
+        discarded time.'''
+
+        dt = self.physics_dt
+        accumulator = self.accumulator + elapsed
+        tree = state.get_render_tree() if self.interpolate else None
+
+        steps = 0
+        while accumulator >= dt:
+            # Descarta o atraso acumulado para evitar a "espiral da morte", na
+            # qual cada frame demora mais que o anterior para ser simulado
+            if steps == self.max_substeps:
+                skipped = accumulator - accumulator % dt
+                accumulator -= skipped
+                state.trigger('frame-skip', skipped)
+                break
+
+            # Salva o estado antes do último passo para a interpolação
+            if tree is not None and (accumulator < 2 * dt or
+                                     steps == self.max_substeps - 1):
+                tree.save_state()
+            state.update(dt)
+            accumulator -= dt
+            steps += 1
+
+        self.accumulator = accumulator
+        return accumulator / dt if self.interpolate else 1.0
 
     def run(self, state, timeout=None):
         # Assegura que o motor de jogos foi inicializado
         from FGAme.core import init
         init()
 
-        # Prepara o loop principal        
+        # Prepara o loop principal
         self._running = True
         sleep = time.sleep
         gettime = time.time
         input = globalvars.input_object
         screen = globalvars.screen_object
-        sim_start = gettime()
-        
+        fixed_step = self.physics_fps is not None
+        sim_start = t_last = gettime()
+        self.accumulator = self.physics_dt if fixed_step else 0.0
+
         while self._running:
             t0 = gettime()
-            
+
             # Captura entrada do usuário e atualiza o estado (e física) de acordo
             input.query()
-            state.update(self.dt)
-            
+            if fixed_step:
+                alpha = self.advance(state, t0 - t_last)
+                t_last = t0
+            else:
+                state.update(self.dt)
+                alpha = 1.0
+
             # Desenha os objetos na tela
             screen.clear_background(state.get_background())
-            screen.draw_tree(state.get_render_tree())
+            screen.draw_tree(state.get_render_tree(), alpha)
             screen.flip()
-            
-            # Espera até completar o frame
+
+            # Espera até completar o frame. No modo de passo fixo, o atraso é
+            # compensado pelo acumulador
             t = gettime()
             wait = self.dt - (t - t0)
             t0 = t
-            if wait > 0: 
+            if wait > 0:
                 sleep(wait)
-            else:
+            elif not fixed_step:
                 state.trigger('frame-skip', -wait)
-            
+
             # Verifica que já ultrapassou o tempo de simulação
             if timeout is not None and t - sim_start > timeout:
                 break
@@ -52,3 +112,25 @@ class MainLoop(object):
 
 class StepperMainLoop(MainLoop):
     pass
+
+class HeadlessMainLoop(MainLoop):
+    '''Main loop of the 'headless' backend.
+
+    Updates the state as fast as possible, without rendering and without
+    waiting for the wall-clock. The timeout is measured in simulation time.
+    The time step is 1/physics_fps, if given, or 1/fps.'''
+
+    def run(self, state, timeout=None):
+        from FGAme.core import init
+        init()
+
+        self._running = True
+        input = globalvars.input_object
+        dt = self.physics_dt or self.dt
+        elapsed = 0.0
+        while self._running:
+            input.query()
+            state.update(dt)
+            elapsed += dt
+            if timeout is not None and elapsed >= timeout:
+                break
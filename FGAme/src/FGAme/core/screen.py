@@ -104,11 +104,16 @@ class Canvas(Screen):
     #===========================================================================
     # Objetos derivados
     #===========================================================================
-    def draw_tree(self, tree):
+    def draw_tree(self, tree, alpha=1.0):
         '''Renderiza uma DrawingTree chamando a função correspondente para 
-        desenhar cada objeto'''
+        desenhar cada objeto.
+        
+        Se alpha < 1, os objetos são desenhados na posição e ângulo 
+        interpolados entre o estado salvo por tree.save_state() (alpha=0) e o
+        estado atual (alpha=1).'''
         
         funcs = self._drawing_funcs
+        previous = tree.previous if alpha < 1 else {}
         for obj in tree.walk():
             try:
                 draw_func = funcs[type(obj)]
@@ -130,8 +135,14 @@ class Canvas(Screen):
                         draw_func = funcs[tt] = self.draw_tree
                     else:
                         raise TypeError('no method for drawing %s objects' % type(obj).__name__)
-                    
-            draw_func(obj)
+            
+            if getattr(obj, 'is_tree', False):
+                draw_func(obj, alpha)
+            elif obj in previous:
+                pos, theta = previous[obj]
+                draw_func(_Interpolated(obj, pos, theta, alpha))
+            else:
+                draw_func(obj)
             
     def draw_circle(self, circle):
         '''Desenha um círculo utilizando as informações de geometria, cor e 
@@ -172,6 +183,59 @@ class Canvas(Screen):
         else:
             raise NotImplementedError
         
+class _Interpolated(object):
+    '''Representa um objeto numa posição e ângulo interpolados entre um 
+    estado anterior (pos, theta) e o estado atual. Os demais atributos são
+    lidos do objeto original.'''
+    
+    __slots__ = ['obj', 'pos', 'theta', '_delta', '_dtheta']
+    
+    def __init__(self, obj, pos, theta, alpha):
+        current = obj.pos
+        self.obj = obj
+        self.pos = pos + (current - pos) * alpha
+        self.theta = theta + (obj.theta - theta) * alpha
+        self._delta = self.pos - current
+        self._dtheta = self.theta - obj.theta
+        
+    def __getattr__(self, attr):
+        return getattr(self.obj, attr)
+    
+    @property
+    def vertices(self):
+        center = self.obj.pos
+        delta, dtheta = self._delta, self._dtheta
+        if dtheta:
+            return [v.rotated(dtheta, center) + delta 
+                    for v in self.obj.vertices]
+        return [v + delta for v in self.obj.vertices]
+
+class NullCanvas(Canvas):
+    '''Canvas que não desenha nada. Utilizado pelo backend 'headless', que 
+    executa a simulação sem abrir uma janela e sem importar nenhuma biblioteca
+    gráfica.'''
+    
+    def start(self):
+        pass
+    
+    def flip(self):
+        pass
+    
+    def draw_tree(self, tree, alpha=1.0):
+        pass
+    
+    def paint_circle(self, pos, radius, color='black', solid=True):
+        pass
+
+    def paint_poly(self, L_points, color='black', solid=True):
+        pass
+
+    def paint_line(self, pt1, pt2, color='black', solid=True):
+        pass
+
+    def clear_background(self, color=None):
+        pass
+
 class PyGameCanvas(Canvas):
     '''Implementa a interface Canvas utilizando a biblioteca pygame'''
 
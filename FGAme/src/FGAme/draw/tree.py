@@ -1,4 +1,6 @@
 #-*- coding: utf8 -*-
+from FGAme.math import Vector
+
 class RenderTree(object):
     '''Representa uma árvore de objetos que serão desenhados na tela'''
 
@@ -7,6 +9,7 @@ class RenderTree(object):
     def __init__(self, parent=None):
         self._data = [[]]
         self.parent = None
+        self.previous = {}
 
     def add(self, obj, layer=0):
         '''Adiciona um objeto na camada especificada'''
@@ -16,6 +19,18 @@ class RenderTree(object):
                 self._data.append([])
         self._data[layer].append(obj)
 
+    def save_state(self):
+        '''Armazena a posição e o ângulo atuais de cada objeto da árvore no 
+        dicionário `previous`. Estes valores permitem interpolar a 
+        renderização entre dois passos da física (ver Canvas.draw_tree()).'''
+
+        previous = self.previous = {}
+        for obj in self.walk():
+            if getattr(obj, 'is_tree', False):
+                obj.save_state()
+            else:
+                previous[obj] = (Vector(*obj.pos), obj.theta)
+
     # TODO: Mover objetos entre Layers ou modifica a ordem do objeto dentro de
     # um layer
 
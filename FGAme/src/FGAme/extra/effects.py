@@ -1,9 +1,20 @@
 #-*- coding: utf8 -*-
-from random import shuffle, random
+import random
 from math import sqrt
-from FGAme.objects import Poly
+from FGAme.physics import Poly
+
+def explode(obj, world, energy=0, prob_rec=0.5, rng=None):
+    '''Divide o polígono obj em triângulos que se afastam do centro com uma
+    energia cinética adicional total igual a `energy`.
+
+    Os números aleatórios são obtidos de `rng`. O padrão é utilizar o gerador
+    da simulação (world.simulation.random), de modo que a explosão seja 
+    reprodutível no modo determinístico.'''
+
+    if rng is None:
+        simulation = getattr(world, 'simulation', world)
+        rng = getattr(simulation, 'random', random)
 
-def explode(obj, world, energy=0, prob_rec=0.5):
     world.remove(obj)
     N = obj.num_sides
     new_objects = []
@@ -32,7 +43,7 @@ def explode(obj, world, energy=0, prob_rec=0.5):
     N = len(new_objects)
     Z = sum(x ** 2 for x in range(1, N + 1))
     energies = [ energy * x ** 2 / Z for x in range(1, N + 1) ]
-    shuffle(energies)
+    rng.shuffle(energies)
 
     # Processa os novos objetos criados
     for i, new in enumerate(new_objects):
@@ -48,8 +59,8 @@ def explode(obj, world, energy=0, prob_rec=0.5):
         world.add(new)
 
         # Aplica a função recursivamente com uma determinada probabilidade
-        if random() < prob_rec and new.area > 10:
-            explode(new, world, energies[i], 2.0 * prob_rec / N)
+        if rng.random() < prob_rec and new.area > 10:
+            explode(new, world, energies[i], 2.0 * prob_rec / N, rng)
         else:
             delta_speed = sqrt(2.0 * energies[i] / new.mass) * norm
             new.boost(delta_speed)
@@ -1,10 +1,7 @@
 #-*- coding: utf8 -*-
 from __future__ import absolute_import
-if __name__ == '__main__':
-    __package__ = 'FGAme.objects'; import FGAme.objects
-
 from math import sqrt
-from .poly import Poly, get_collision
+from FGAme.physics import Poly
 
 class Letter(Poly):
     LETTERS = {
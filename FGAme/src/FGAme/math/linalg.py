@@ -8,6 +8,14 @@ __all__ = ['Vector', 'VectorM', 'asvector', 'Matrix', 'MatrixM', 'MatrixR', 'dot
 #===============================================================================
 # Vetores
 #===============================================================================
+# Cria uma instância sem chamar o __init__. Os operadores utilizam esta função
+# para construir os resultados, já que as coordenadas calculadas a partir de
+# outros vetores dispensam a conversão para float feita pelo construtor.
+_new = object.__new__
+
+# Tipos de escalares aceitos nas multiplicações e divisões sem conversão
+_SCALARS = frozenset([float, int] + ([long] if str is bytes else []))
+
 class Vector(object):
     __slots__ = ['_x', '_y']
 
@@ -48,6 +56,15 @@ class Vector(object):
         except TypeError:
             raise TypeError('invalid arguments: x=%r, y=%r' % (x, y))
 
+    def _new(self, x, y):
+        '''Retorna um vetor do mesmo tipo com as coordenadas x e y, que devem
+        ser floats. Não converte os argumentos nem executa o __init__.'''
+
+        new = _new(type(self))
+        new._x = x
+        new._y = y
+        return new
+
     def as_tuple(self):
         '''Retorna a representação do vetor como uma tupla'''
         return (self._x, self._y)
@@ -55,25 +72,37 @@ class Vector(object):
     def norm(self):
         '''Retorna o módulo (norma) do vetor'''
 
-        return sqrt(self._x ** 2 + self._y ** 2)
+        return sqrt(self._x * self._x + self._y * self._y)
 
     def norm_sqr(self):
         '''Retorna o módulo do vetor ao quadrado'''
 
-        return self._x ** 2 + self._y ** 2
+        return self._x * self._x + self._y * self._y
 
     def normalized(self):
         '''Retorna um vetor unitário'''
 
-        norm = self.norm()
-        return self / norm if norm else Vector(*self)
+        x, y = self._x, self._y
+        norm = sqrt(x * x + y * y)
+        new = _new(type(self))
+        if norm:
+            new._x = x / norm
+            new._y = y / norm
+        else:
+            new._x = x
+            new._y = y
+        return new
 
     def rotated(self, theta, axis=(0, 0)):
         '''Retorna um vetor rotacionado por um ângulo theta'''
 
-        x, y = self -axis
+        x0, y0 = axis
+        x, y = self._x - x0, self._y - y0
         cos_t, sin_t = cos(theta), sin(theta)
-        return type(self)(x * cos_t - y * sin_t, x * sin_t + y * cos_t) + axis
+        new = _new(type(self))
+        new._x = x * cos_t - y * sin_t + x0
+        new._y = x * sin_t + y * cos_t + y0
+        return new
 
     # Métodos mágicos ----------------------------------------------------------
     def __len__(self):
@@ -93,8 +122,7 @@ class Vector(object):
         return repr(self)
 
     def __iter__(self):
-        yield self._x
-        yield self._y
+        return iter((self._x, self._y))
 
     def __getitem__(self, i):
         '''x.__getitem__(i) <==> x[i]'''
@@ -105,9 +133,17 @@ class Vector(object):
         else:
             raise IndexError(i)
 
+    # Os operadores tratam separadamente o caso em que o outro operando é um
+    # Vector (ou um escalar do tipo float/int), evitando o protocolo de 
+    # iteração e a conversão das coordenadas no construtor
     def __mul__(self, other):
         '''x.__mul__(y) <==> x * y'''
-        return type(self)(self._x * other, self._y * other)
+        if other.__class__ not in _SCALARS:
+            return type(self)(self._x * other, self._y * other)
+        new = _new(type(self))
+        new._x = self._x * other
+        new._y = self._y * other
+        return new
 
     def __rmul__(self, other):
         '''x.__rmul__(y) <==> y * x'''
@@ -115,14 +151,26 @@ class Vector(object):
 
     def __div__(self, other):
         '''x.__div__(y) <==> x / y'''
-        return type(self)(self._x / other, self._y / other)
+        if other.__class__ not in _SCALARS:
+            return type(self)(self._x / other, self._y / other)
+        new = _new(type(self))
+        new._x = self._x / other
+        new._y = self._y / other
+        return new
 
     __truediv__ = __div__  # Python 3
 
     def __add__(self, other):
         '''x.__add__(y) <==> x + y'''
-        x, y = other
-        return type(self)(self._x + x, self._y + y)
+        new = _new(type(self))
+        if isinstance(other, Vector):
+            new._x = self._x + other._x
+            new._y = self._y + other._y
+        else:
+            x, y = other
+            new._x = self._x + x
+            new._y = self._y + y
+        return new
 
     def __radd__(self, other):
         '''x.__radd__(y) <==> y + x'''
@@ -130,22 +178,37 @@ class Vector(object):
 
     def __sub__(self, other):
         '''x.__sub__(y) <==> x - y'''
-        x, y = other
-        return type(self)(self._x - x, self._y - y)
+        new = _new(type(self))
+        if isinstance(other, Vector):
+            new._x = self._x - other._x
+            new._y = self._y - other._y
+        else:
+            x, y = other
+            new._x = self._x - x
+            new._y = self._y - y
+        return new
 
     def __rsub__(self, other):
         '''x.__rsub__(y) <==> y - x'''
         x, y = other
-        return type(self)(x - self._x, y - self._y)
+        new = _new(type(self))
+        new._x = x - self._x
+        new._y = y - self._y
+        return new
 
     def __neg__(self):
         '''x.__neg() <==> -x'''
-        return type(self)(-self._x, -self._y)
+        new = _new(type(self))
+        new._x = -self._x
+        new._y = -self._y
+        return new
 
     def __nonzero__(self):
         return True
     
     def __eq__(self, other):
+        if isinstance(other, Vector):
+            return self._x == other._x and self._y == other._y
         x, y = other
         return self._x == x and self._y == y            
         
@@ -161,15 +224,23 @@ class VectorM(Vector):
     def __iadd__(self, other):
         '''x.__iadd__(y) <==> x += y'''
 
-        self._x += other[0]
-        self._y += other[1]
+        if isinstance(other, Vector):
+            self._x += other._x
+            self._y += other._y
+        else:
+            self._x += other[0]
+            self._y += other[1]
         return self
 
     def __isub__(self, other):
         '''x.__isub__(y) <==> x -= y'''
 
-        self._x -= other[0]
-        self._y -= other[1]
+        if isinstance(other, Vector):
+            self._x -= other._x
+            self._y -= other._y
+        else:
+            self._x -= other[0]
+            self._y -= other[1]
         return self
 
     def __imul__(self, other):
@@ -191,25 +262,112 @@ class VectorM(Vector):
     def rotate(self, theta, axis=(0, 0)):
         '''Realiza rotação *inplace*'''
 
-        x, y = self -axis
-        cos_t, sin_t = cos(theta), sin(theta)
-        self._x = x * cos_t - y * sin_t + axis[0]
-        self._y = x * sin_t + y * cos_t + axis[1]
+        x0, y0 = axis
+        self.rotate_cs(cos(theta), sin(theta), x0, y0)
+
+    # Operações *inplace* sem criação de vetores temporários ------------------
+    # Os métodos abaixo recebem escalares ou vetores e modificam o próprio
+    # objeto. São utilizados nos laços internos da física (integradores,
+    # atualização dos vértices dos polígonos, etc) e evitam a criação de
+    # objetos intermediários que uma expressão como `u += v * k` produziria.
+    def set_xy(self, x, y):
+        '''Redefine as coordenadas para os valores x, y'''
+
+        self._x = x
+        self._y = y
+
+    def iadd_xy(self, x, y):
+        '''Soma x, y às coordenadas. Equivale a u += (x, y)'''
+
+        self._x += x
+        self._y += y
+
+    def iadd_scaled(self, other, k):
+        '''Soma o vetor other multiplicado pelo escalar k. Equivale a
+        u += other * k
+
+        >>> u = VectorM(1, 1); u.iadd_scaled(Vector(1, 2), 2); u
+        VectorM(3, 5)
+        '''
+
+        if isinstance(other, Vector):
+            self._x += other._x * k
+            self._y += other._y * k
+        else:
+            self._x += other[0] * k
+            self._y += other[1] * k
+
+    def set_scaled(self, other, k):
+        '''Redefine o vetor como other multiplicado pelo escalar k. Equivale a
+        u.copy_from(other * k)'''
+
+        if isinstance(other, Vector):
+            self._x = other._x * k
+            self._y = other._y * k
+        else:
+            self._x = other[0] * k
+            self._y = other[1] * k
+
+    def set_lincomb(self, a, ka, b, kb):
+        '''Redefine o vetor como a combinação linear a * ka + b * kb
+
+        >>> u = VectorM(0, 0); u.set_lincomb(Vector(1, 0), 2, (0, 1), 3); u
+        VectorM(2, 3)
+        '''
+
+        if isinstance(a, Vector):
+            ax, ay = a._x, a._y
+        else:
+            ax, ay = a[0], a[1]
+        if isinstance(b, Vector):
+            bx, by = b._x, b._y
+        else:
+            bx, by = b[0], b[1]
+        self._x = ax * ka + bx * kb
+        self._y = ay * ka + by * kb
+
+    def rotate_cs(self, cos_t, sin_t, x0=0.0, y0=0.0):
+        '''Rotaciona o vetor em torno do ponto (x0, y0) a partir do cosseno e
+        do seno do ângulo de rotação.
+
+        Útil para rotacionar vários vetores pelo mesmo ângulo calculando as
+        funções trigonométricas uma única vez.
+
+        >>> u = VectorM(2, 1); u.rotate_cs(0, 1, 1, 1); u
+        VectorM(1, 2)
+        '''
+
+        x, y = self._x - x0, self._y - y0
+        self._x = x * cos_t - y * sin_t + x0
+        self._y = x * sin_t + y * cos_t + y0
+
+    def scale_about(self, k, x0=0.0, y0=0.0):
+        '''Multiplica a distância até o ponto (x0, y0) pelo fator k
+
+        >>> u = VectorM(2, 3); u.scale_about(2, 1, 1); u
+        VectorM(3, 5)
+        '''
+
+        self._x = (self._x - x0) * k + x0
+        self._y = (self._y - y0) * k + y0
 
     def copy_from(self, other):
         '''Copia as coordenadas x, y do objeto other'''
 
-        try:
+        if isinstance(other, Vector):
             self._x = other._x
             self._y = other._y
-        except AttributeError:
+        else:
             self._x = other[0]
             self._y = other[1]
 
     def copy(self):
         '''Retorna uma cópia de si mesmo'''
 
-        return VectorM(self._x, self._y)
+        new = _new(VectorM)
+        new._x = self._x
+        new._y = self._y
+        return new
 
     x = property(Vector.x.fget)
     y = property(Vector.y.fget)
@@ -528,11 +686,17 @@ def asmatrix(m):
 def dot(v1, v2):
     '''Calcula o produto escalar entre dois vetores'''
 
-    return sum(x * y for (x, y) in zip(v1, v2))
+    if isinstance(v1, Vector) and isinstance(v2, Vector):
+        return v1._x * v2._x + v1._y * v2._y
+    x1, y1 = v1
+    x2, y2 = v2
+    return x1 * x2 + y1 * y2
 
 def cross(v1, v2):
     '''Retorna a compontente z do produto vetorial de dois vetores bidimensionais'''
 
+    if isinstance(v1, Vector) and isinstance(v2, Vector):
+        return v1._x * v2._y - v2._x * v1._y
     x1, y1 = v1
     x2, y2 = v2
     return x1 * y2 - x2 * y1
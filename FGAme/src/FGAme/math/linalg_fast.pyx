@@ -1,4 +1,5 @@
 #-*- coding: utf8 -*-
+# cython: c_api_binop_methods=True
 from math import pi
 cdef extern from "math.h":
     double log(double)
@@ -142,7 +143,12 @@ cdef class Vector(object):
         
         return self._new(self._x / other, self._y / other)
 
-    __truediv__ = __div__  # Python 3
+    # Python 3. Atribuir __truediv__ = __div__ não define o slot numa cdef
+    # class
+    def __truediv__(Vector self, other):
+        '''x.__truediv__(y) <==> x / y'''
+
+        return self._new(self._x / other, self._y / other)
 
     def __add__(self, other):
         '''x.__add__(y) <==> x + y'''
@@ -274,7 +280,12 @@ cdef class VectorM(Vector):
         self._y /= other
         return self
 
-    __itruediv__ = __idiv__
+    def __itruediv__(Vector self, other):
+        '''x.__itruediv__(y) <==> x /= y'''
+
+        self._x /= other
+        self._y /= other
+        return self
 
     def rotate(Vector self, theta, axis=(0, 0)):
         '''Realiza rotação *inplace*'''
@@ -284,15 +295,78 @@ cdef class VectorM(Vector):
         self._x = x * cos_t - y * sin_t + axis[0]
         self._y = x * sin_t + y * cos_t + axis[1]
 
+    # Operações *inplace* sem criação de vetores temporários ------------------
+    def set_xy(Vector self, double x, double y):
+        '''Redefine as coordenadas para os valores x, y'''
+
+        self._x = x
+        self._y = y
+
+    def iadd_xy(Vector self, double x, double y):
+        '''Soma x, y às coordenadas. Equivale a u += (x, y)'''
+
+        self._x += x
+        self._y += y
+
+    def iadd_scaled(Vector self, other, double k):
+        '''Soma o vetor other multiplicado pelo escalar k. Equivale a
+        u += other * k'''
+
+        cdef Vector vector
+        if isinstance(other, Vector):
+            vector = other
+            self._x += vector._x * k
+            self._y += vector._y * k
+        else:
+            self._x += other[0] * k
+            self._y += other[1] * k
+
+    def set_scaled(Vector self, other, double k):
+        '''Redefine o vetor como other multiplicado pelo escalar k. Equivale a
+        u.copy_from(other * k)'''
+
+        cdef Vector vector
+        if isinstance(other, Vector):
+            vector = other
+            self._x = vector._x * k
+            self._y = vector._y * k
+        else:
+            self._x = other[0] * k
+            self._y = other[1] * k
+
+    def set_lincomb(Vector self, a, double ka, b, double kb):
+        '''Redefine o vetor como a combinação linear a * ka + b * kb'''
+
+        cdef double ax, ay, bx, by
+        ax, ay = a
+        bx, by = b
+        self._x = ax * ka + bx * kb
+        self._y = ay * ka + by * kb
+
+    def rotate_cs(Vector self, double cos_t, double sin_t,
+                  double x0=0, double y0=0):
+        '''Rotaciona o vetor em torno do ponto (x0, y0) a partir do cosseno e
+        do seno do ângulo de rotação'''
+
+        cdef double x = self._x - x0, y = self._y - y0
+        self._x = x * cos_t - y * sin_t + x0
+        self._y = x * sin_t + y * cos_t + y0
+
+    def scale_about(Vector self, double k, double x0=0, double y0=0):
+        '''Multiplica a distância até o ponto (x0, y0) pelo fator k'''
+
+        self._x = (self._x - x0) * k + x0
+        self._y = (self._y - y0) * k + y0
+
     def copy_from(Vector self, other):
         '''Copia as coordenadas x, y do objeto other'''
 
         cdef Vector vector 
-        try:
+        if isinstance(other, Vector):
             vector = other
             self._x = vector._x
             self._y = vector._y
-        except AttributeError:
+        else:
             self._x = other[0]
             self._y = other[1]
 
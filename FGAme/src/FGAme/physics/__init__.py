@@ -25,10 +25,16 @@ Funções especiais para a criação de objetos
 '''
 
 from .collision import *
+from .broadphase import *
 from .base import *
 from .aabb import *
 from .ball import *
 from .poly import *
 from .force import *
+from .fields import *
+from .ccd import *
 from .simulation import *
-from .world import *
\ No newline at end of file
+from .world import *
+from .snapshot import *
+from .profiler import *
+from .sweep import *
\ No newline at end of file
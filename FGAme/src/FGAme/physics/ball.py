@@ -1,9 +1,17 @@
 #-*- coding: utf8 -*-
-from FGAme.math import pi
+from FGAme.math import pi, sqrt, Vector
 from FGAme.physics import get_collision, Object, Collision
 from FGAme.util import lazy
 from FGAme.draw import CircleEcho
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Número mínimo de pares para utilizar a versão vetorizada de circle_collision
+BATCH_SIZE = 32
+
 class Circle(Object):
     '''Define um círculo e implementa a detecção de colisão comparando a 
     distância entre os centros com a soma dos raios.'''
@@ -66,15 +74,65 @@ class Circle(Object):
 def circle_collision(A, B):
     '''Testa a colisão pela distância dos centros'''
 
-    delta = B.pos - A.pos
-    if delta.norm() < A.radius + B.radius:
-        n = delta.normalized()
-        D = A.radius + B.radius - delta.norm()
-        pos = A.pos + (A.radius - D / 2) * n
-        return Collision(A, B, pos=pos, n=n)
+    xA, yA = A._pos
+    xB, yB = B._pos
+    dx, dy = xB - xA, yB - yA
+    radius = A._radius
+    distance = sqrt(dx ** 2 + dy ** 2)
+    D = radius + B._radius - distance
+    if D > 0:
+        if distance:
+            dx /= distance
+            dy /= distance
+        h = radius - D / 2
+        return Collision(A, B, pos=Vector(xA + h * dx, yA + h * dy),
+                         n=Vector(dx, dy), depths=[D])
     else:
         return None
 
+def circle_collisions(pairs):
+    '''Versão vetorizada de circle_collision().
+    
+    Recebe uma lista de pares de círculos (A, B) e retorna uma lista com o 
+    resultado de circle_collision(A, B) para cada par, na mesma ordem. Os 
+    cálculos são feitos de uma só vez com o NumPy, caso ele esteja disponível
+    e a lista tenha pelo menos BATCH_SIZE pares.'''
+
+    if np is None or len(pairs) < BATCH_SIZE:
+        return [circle_collision(A, B) for A, B in pairs]
+
+    # Cada círculo aparece uma única vez nos arrays
+    index = {}
+    setdefault = index.setdefault
+    ij = np.array([(setdefault(A, len(index)), setdefault(B, len(index)))
+                   for A, B in pairs])
+    data = np.array([(obj._pos.x, obj._pos.y, obj._radius) for obj in index])
+    rowsA, rowsB = data[ij[:, 0]], data[ij[:, 1]]
+    xA, yA, radius = rowsA[:, 0], rowsA[:, 1], rowsA[:, 2]
+    dx = rowsB[:, 0] - xA
+    dy = rowsB[:, 1] - yA
+    distance = np.sqrt(dx ** 2 + dy ** 2)
+    D = radius + rowsB[:, 2] - distance
+
+    # Calcula as normais e pontos de contato somente para as colisões
+    hits = np.flatnonzero(D > 0)
+    distance = distance[hits]
+    distance[distance == 0] = 1
+    nx = dx[hits] / distance
+    ny = dy[hits] / distance
+    h = radius[hits] - D[hits] / 2
+    px = xA[hits] + h * nx
+    py = yA[hits] + h * ny
+
+    result = [None] * len(pairs)
+    for i, nx, ny, px, py, D in zip(hits.tolist(), nx.tolist(), ny.tolist(),
+                                    px.tolist(), py.tolist(),
+                                    D[hits].tolist()):
+        A, B = pairs[i]
+        result[i] = Collision(A, B, pos=Vector(px, py), n=Vector(nx, ny),
+                              depths=[D])
+    return result
+
 
 if __name__ == '__main__':
     from doctest import testmod
@@ -15,7 +15,7 @@ Modificando o estado físico do objeto
 from copy import copy
 from FGAme.core import Listener, signal
 from FGAme.draw import RectEcho, RenderTree, Color
-from FGAme.math import Vector, VectorM, asvector
+from FGAme.math import Vector, VectorM, asvector, dot
 from FGAme.util import lazy
 
 PAUSE_SPEED = 5
@@ -88,6 +88,21 @@ class Object(Listener):
     accel_static
         Caso verdadeiro, aplica as acelerações de gravidade, damping e adamping
         no objeto mesmo se ele for estático
+
+    ::
+        **Identificação**
+    uid
+        Número inteiro que identifica o objeto na simulação. É atribuído pela
+        simulação na ordem em que os objetos são adicionados, mas pode ser
+        definido antes (por exemplo, com um identificador compartilhado pela
+        rede). Utilizado para desempatar a ordenação no modo determinístico.
+
+    ::
+        **Objetos rápidos**
+    bullet
+        Caso verdadeiro, a simulação utiliza detecção contínua de colisões
+        (ver FGAme.physics.ccd) para impedir que o objeto atravesse outros
+        objetos quando se desloca mais que metade do seu tamanho num frame.
     '''
     def __init__(self, pos=None, vel=None,
                        theta=None, omega=None,
@@ -153,6 +168,33 @@ class Object(Listener):
     #: Propriedades e constantes físicas
     #===========================================================================
     has_physics = True
+
+    # Instância de StateArrays que armazena o estado do objeto (ou None)
+    _state = None
+
+    # Controle de objetos dormindo (ver Simulation.update_sleeping())
+    _island = None
+    _still_frames = 0
+
+    # Identificador numérico atribuído pela simulação (ver Simulation.add())
+    uid = None
+
+    # Detecção contínua de colisões (ver Simulation.sweep_bullets()). A
+    # simulação que contém o objeto mantém uma lista dos objetos com CCD
+    _bullet = False
+    _simulation = None
+
+    @property
+    def bullet(self):
+        return self._bullet
+
+    @bullet.setter
+    def bullet(self, value):
+        value = bool(value)
+        if value != self._bullet:
+            self._bullet = value
+            if self._simulation is not None:
+                self._simulation._update_bullet(self)
     
     #---------------------------------------------------------------------------
     # Propriedades da caixa de contorno AABB
@@ -198,6 +240,10 @@ class Object(Listener):
         self._density = value / self.area
         self._mass = value
         self._invmass = 1.0 / value
+        if self._state is not None:
+            self._state.invalidate()
+        if self._simulation is not None:
+            self._simulation._update_static(self)
 
     @property
     def inertia(self):
@@ -212,6 +258,10 @@ class Object(Listener):
         value = float(value)
         self._inertia = value
         self._invinertia = 1.0 / value
+        if self._state is not None:
+            self._state.invalidate()
+        if self._simulation is not None:
+            self._simulation._update_static(self)
 
     @lazy
     def area(self):
@@ -289,7 +339,7 @@ class Object(Listener):
     #---------------------------------------------------------------------------
     # Parâmetros que modificam a resposta física de um objeto às forças externas
     # e colisões
-    is_alive = is_internal = is_paused = False
+    is_alive = is_internal = is_paused = is_sleeping = False
     owns_gravity = owns_damping = owns_adamping = False
 
     @property
@@ -300,6 +350,8 @@ class Object(Listener):
     def gravity(self, value):
         self._gravity = Vector(*value)
         self.owns_gravity = True
+        if self._state is not None:
+            self._state.invalidate()
 
     @property
     def damping(self):
@@ -309,6 +361,8 @@ class Object(Listener):
     def damping(self, value):
         self._damping = float(value)
         self.owns_damping = True
+        if self._state is not None:
+            self._state.invalidate()
 
     @property
     def adamping(self):
@@ -318,6 +372,8 @@ class Object(Listener):
     def adamping(self, value):
         self._adamping = float(value)
         self.owns_adamping = True
+        if self._state is not None:
+            self._state.invalidate()
 
     @property
     def color(self):
@@ -337,43 +393,71 @@ class Object(Listener):
         '''Reposiciona o centro de massa do objeto nas coordenadas especificadas 
         ou na origem.'''
 
+        if self.is_sleeping:
+            self.wake()
         if pos is None:
             self.move(-self._pos)
         else:
             self.move(asvector(pos) - self._pos)
+        self._update_static()
 
     def set_vel(self, vel=None):
         '''Redefine a velocidade linear do centro de massa para o valor 
         especificado (ou para zero, em caso de omissão).'''
 
+        if self.is_sleeping:
+            self.wake()
         if vel is None:
             self.boost(-self._vel)
         else:
             self.boost(vel - self._vel)
+        self._update_static()
 
     def set_theta(self, theta=None):
         '''Reorienta o objeto para o ângulo fornecido ou para a orientação 
         inicial.'''
 
+        if self.is_sleeping:
+            self.wake()
         if theta is None:
             self.rotate(-self._theta)
         else:
             self.rotate(theta - self._theta)
+        self._update_static()
 
     def set_omega(self, omega=None):
         '''Redefine a velocidade angular do centro de massa para o valor 
         especificado (ou para zero, em caso de omissão).'''
 
+        if self.is_sleeping:
+            self.wake()
         if omega is None:
             self.aboost(-self._omega)
         else:
             self.aboost(omega - self._omega)
+        self._update_static()
+
+    def _update_static(self):
+        '''Avisa a simulação que a posição ou a velocidade de um objeto sem
+        dinâmica foi redefinida. Estes objetos podem passar de estáticos a
+        cinemáticos (e vice-versa) e a fase larga não os acompanha a cada
+        frame (ver BroadPhase.refresh())'''
+
+        if self._simulation is not None and not (self._invmass or
+                                                 self._invinertia):
+            self._simulation._update_static(self)
 
     def move(self, delta):
         '''Move o objeto por vetor de deslocamento delta'''
 
         x, y = delta
-        self._pos += delta
+        self._pos.iadd_xy(x, y)
+        self._translate_shape(x, y)
+
+    def _translate_shape(self, x, y):
+        '''Desloca a caixa de contorno (e a geometria, nas sub-classes) por
+        (x, y) sem modificar a posição do centro de massa'''
+
         self._xmin += x
         self._xmax += x
         self._ymin += y
@@ -476,7 +560,11 @@ class Object(Listener):
     def apply_force(self, force, dt):
         '''Aplica uma força linear durante um intervalo de tempo dt'''
 
-        self.apply_accel(force * self._invmass, dt)
+        if self.is_sleeping:
+            self.wake()
+        x, y = force
+        invmass = self._invmass
+        self.apply_accel((x * invmass, y * invmass), dt)
 
     def apply_accel(self, a, dt):
         '''Aplica uma aceleração linear durante um intervalo de tempo dt.
@@ -536,17 +624,28 @@ class Object(Listener):
         total do sistema muito mais rapidamente que a deriva de energia tende a
         fornecer energia espúria ao sistema. Deste modo, a acurácia ficaria
         reduzida, mas a simulação ainda manteria alguma credibilidade.
+        
+        Este método é executado para cada objeto em todos os frames e por isto
+        utiliza as operações *inplace* de VectorM em vez de expressões como a
+        acima, que criariam vários vetores temporários.
         '''
 
-        self._accel += a
-        self._accel /= 2
-        self.boost(self._accel * dt)
-        self.move(self._vel * dt + a * (dt ** 2 / 2.))
-        self._accel.copy_from(a)
+        ax, ay = a
+        accel = self._accel
+        vel = self._vel
+        accel.iadd_xy(ax, ay)
+        accel *= 0.5
+        vel.iadd_scaled(accel, dt)
+        h = dt ** 2 / 2.
+        vx, vy = vel
+        self.move((vx * dt + ax * h, vy * dt + ay * h))
+        accel.set_xy(ax, ay)
 
     def apply_torque(self, torque, dt):
         '''Aplica um torque durante um intervalo de tempo dt.'''
 
+        if self.is_sleeping:
+            self.wake()
         self.apply_alpha(torque * self._invinertia, dt)
 
     def apply_alpha(self, alpha, dt):
@@ -554,7 +653,6 @@ class Object(Listener):
         
         Tem efeito em objetos cinemáticos.'''
 
-        dt = dt / 2
         self.aboost(alpha * dt)
         self.rotate(self._omega * dt + alpha * dt ** 2 / 2.)
 
@@ -566,11 +664,15 @@ class Object(Listener):
         e também resolve a dinâmica angular.
         '''
 
+        if self.is_sleeping:
+            self.wake()
         self.boost(impulse / self.mass)
 
     def apply_aimpulse(self, itorque):
         '''Aplica um impulso angular ao objeto.'''
 
+        if self.is_sleeping:
+            self.wake()
         self.aboost(itorque / self.inertia)
 
     def update(self, dt, time=0):
@@ -635,6 +737,48 @@ class Object(Listener):
         except AttributeError:
             pass
 
+    def sleep(self):
+        '''Coloca o objeto para dormir. 
+        
+        Objetos dormindo possuem velocidade nula e são ignorados na integração
+        das forças e na detecção de colisões com outros objetos parados. O 
+        objeto acorda ao colidir com um objeto em movimento ou ao receber 
+        forças, impulsos ou modificações nas variáveis de estado.'''
+
+        if not self.is_sleeping:
+            self.is_sleeping = True
+            self._vel *= 0
+            self._accel *= 0
+            self._omega = 0.0
+            if self._state is not None:
+                self._state.invalidate()
+
+    def wake(self):
+        '''Acorda o objeto e todos os objetos que adormeceram junto com ele 
+        (a sua ilha de contatos).'''
+
+        if self.is_sleeping:
+            island = self._island or [self]
+            for obj in island:
+                obj.is_sleeping = False
+                obj._island = None
+                obj._still_frames = 0
+                if obj._state is not None:
+                    obj._state.invalidate()
+
+    def has_external_forces(self):
+        '''Retorna True se o objeto define forças ou torques externos, ou seja,
+        se os métodos external_force() ou external_torque() foram 
+        sobrescritos'''
+
+        for name in ['external_force', 'external_torque']:
+            default = getattr(Object, name)
+            method = getattr(self, name)
+            if getattr(method, '__func__', method) is not \
+                    getattr(default, '__func__', default):
+                return True
+        return False
+
     def is_still(self):
         '''Retorna verdadeiro se o objeto estiver parado ou se movendo muito 
         lentamente'''
@@ -826,6 +970,9 @@ class Object(Listener):
     # Eventos privados
     frame_enter = signal('frame-enter')
     collision = signal('collision', num_args=1)
+    collision_begin = signal('collision-begin', num_args=1)
+    collision_persist = signal('collision-persist', num_args=1)
+    collision_end = signal('collision-end', num_args=1)
     
     @lazy
     def input(self):
@@ -0,0 +1,902 @@
+#-*- coding: utf8 -*-
+'''
+Fase larga (broad phase) da detecção de colisões.
+
+A fase larga seleciona os pares de objetos cujas caixas de contorno AABB se
+superpõem. Somente estes pares são repassados para a função get_collision(),
+que realiza a detecção fina (narrow phase) das colisões.
+
+Todas as implementações devolvem exatamente os mesmos pares: (A, B) com
+A.xmin <= B.xmin, caixas de contorno que se tocam ou se superpõem nos dois
+eixos e pelo menos um dos objetos dinâmico. Os pares são ordenados do mesmo
+modo que no algoritmo de "sort and sweep" padrão. Isto permite trocar o
+algoritmo da fase larga sem alterar o resultado da simulação.
+'''
+
+from math import floor
+from operator import attrgetter
+from FGAme.math import shadow_x, shadow_y
+
+# Chave de ordenação equivalente a Object.__lt__, mas sem chamar um método
+# Python em cada comparação
+XMIN_KEY = attrgetter('_xmin')
+
+# Chave de ordenação do modo determinístico: os empates em xmin são resolvidos
+# pelo identificador atribuído pela simulação (ver Simulation.add())
+XMIN_UID_KEY = attrgetter('_xmin', 'uid')
+
+#===============================================================================
+# Classe base
+#===============================================================================
+class BroadPhase(object):
+    '''Interface básica para os algoritmos de fase larga.
+
+    Sub-classes devem implementar o método get_pairs(objects), que recebe a
+    lista de objetos da simulação e retorna uma lista de pares (A, B). Os
+    métodos add(obj) e remove(obj) são chamados pela simulação sempre que um
+    objeto é inserido ou removido e podem ser utilizados para manter estruturas
+    de dados persistentes entre frames.
+    
+    Implementações que acompanham os pares entre frames definem has_events como
+    verdadeiro e preenchem as listas `entered` e `left` com os pares que
+    começaram e deixaram de se superpor na última chamada a get_pairs().
+    
+    O atributo sort_key define a chave utilizada para ordenar os objetos. O
+    padrão ordena por xmin e mantém a ordem anterior em caso de empate. No modo
+    determinístico, a simulação substitui esta chave por XMIN_UID_KEY.
+    '''
+
+    has_events = False
+    entered = left = ()
+    sort_key = XMIN_KEY
+
+    def add(self, obj):
+        '''Registra um novo objeto na fase larga'''
+
+    def remove(self, obj):
+        '''Remove um objeto da fase larga'''
+
+    def refresh(self, obj):
+        '''Chamado pela simulação quando o estado estático/dinâmico de um
+        objeto muda (ex.: obj.make_static(), obj.mass = ...) ou quando um
+        objeto sem dinâmica é reposicionado ou recebe uma velocidade (ex.:
+        obj.pos = ..., obj.vel = ...)'''
+
+    def get_pairs(self, objects):
+        '''Retorna a lista de pares de objetos cujas AABBs se superpõem.'''
+
+        raise NotImplementedError
+
+    def query(self, bbox, objects):
+        '''Retorna a lista de objetos cujas AABBs se superpõem (ou tocam) a
+        caixa bbox = (xmin, xmax, ymin, ymax).
+
+        A implementação padrão percorre todos os objetos. Sub-classes com
+        estruturas espaciais persistentes podem consultá-las diretamente.'''
+
+        xmin, xmax, ymin, ymax = bbox
+        return [obj for obj in objects
+                if not (obj._xmin > xmax or obj._xmax < xmin or
+                        obj._ymin > ymax or obj._ymax < ymin)]
+
+    def query_many(self, bboxes, objects):
+        '''Retorna uma lista com o resultado de query() para cada caixa em
+        bboxes. Sub-classes atualizam as suas estruturas uma única vez para
+        todas as consultas.'''
+
+        return [self.query(bbox, objects) for bbox in bboxes]
+
+    @staticmethod
+    def can_collide(A, B):
+        '''Retorna falso se nenhum dos dois objetos for dinâmico. Nenhuma
+        resposta física é calculada entre dois objetos estáticos/cinemáticos'''
+
+        return not (A._invmass == A._invinertia ==
+                    B._invmass == B._invinertia == 0)
+
+    def sort_pairs(self, pairs, objects):
+        '''Ordena a lista de pares in-place do mesmo modo que o "sort and
+        sweep" e retorna a lista ordenada.
+        
+        A lista de objetos é ordenada por sort_key (da mesma forma que no sort 
+        and sweep) e cada par (A, B) é reorientado para que A apareça antes de
+        B nesta lista. Deste modo, até mesmo os empates são resolvidos da mesma
+        maneira.'''
+
+        objects.sort(key=self.sort_key)
+        rank = dict((obj, i) for (i, obj) in enumerate(objects))
+        for k, (A, B) in enumerate(pairs):
+            if rank[B] < rank[A]:
+                pairs[k] = (B, A)
+        pairs.sort(key=lambda AB: (rank[AB[0]], rank[AB[1]]))
+        return pairs
+
+#===============================================================================
+# Sort and sweep
+#===============================================================================
+class SweepAndPrune(BroadPhase):
+    '''Ordena os objetos pela coordenada xmin e varre a lista procurando os
+    objetos cujas sombras no eixo x se superpõem.
+
+    Este é o algoritmo padrão. Ele é simples e eficiente para cenas pequenas,
+    mas degrada para O(n^2) quando muitos objetos compartilham o mesmo
+    intervalo no eixo x (ex.: pilhas de objetos).'''
+
+    def get_pairs(self, objects):
+        objects.sort(key=self.sort_key)
+        can_collide = self.can_collide
+        pairs = []
+
+        # Os objetos estão ordenados. Este loop detecta as colisões AABB
+        for i, A in enumerate(objects):
+            xmax = A._xmax
+            for j in range(i + 1, len(objects)):
+                B = objects[j]
+
+                # Procura na lista enquanto xmin de B for menor que xmax de A
+                if B._xmin > xmax:
+                    break
+
+                # Não detecta colisão entre dois objetos estáticos/cinemáticos
+                if not can_collide(A, B):
+                    continue
+
+                # Somente aceita as colisões positivas por AABB
+                if shadow_y(A, B) < 0:
+                    continue
+
+                pairs.append((A, B))
+        return pairs
+
+#===============================================================================
+# Grade uniforme
+#===============================================================================
+class GridBroadPhase(BroadPhase):
+    '''Fase larga baseada numa grade uniforme implementada como uma tabela de
+    dispersão (spatial hash) indexada pelas células que cada AABB ocupa.
+
+    A grade é atualizada incrementalmente: em cada frame, cada objeto é
+    reinserido somente se o intervalo de células ocupado pela sua AABB mudar.
+    Como os objetos se movem pouco entre frames, a maior parte deles não
+    modifica a tabela.
+
+    Parameters
+    ----------
+
+    cell_size : float
+        Tamanho das células da grade. Idealmente deve ser da ordem de grandeza
+        dos objetos dinâmicos. Se não for fornecido, é calculado como o dobro
+        da mediana das dimensões das AABBs na primeira atualização.
+    max_cells : int
+        Objetos que ocupam mais que max_cells células (ex.: os limites criados
+        por World.set_bounds()) ficam fora da grade e são testados contra
+        todos os outros objetos.
+    '''
+
+    def __init__(self, cell_size=None, max_cells=64):
+        self.cell_size = None if cell_size is None else float(cell_size)
+        self.max_cells = max_cells
+        self._cells = {}
+        self._ranges = {}
+        self._large = set()
+
+    def add(self, obj):
+        self._ranges.setdefault(obj, None)
+
+    def remove(self, obj):
+        rng = self._ranges.pop(obj, None)
+        if rng is not None:
+            self._unlink(obj, rng)
+        self._large.discard(obj)
+
+    def clear(self):
+        '''Remove todos os objetos da grade'''
+
+        self._cells.clear()
+        self._ranges.clear()
+        self._large.clear()
+
+    # Manutenção da tabela -----------------------------------------------------
+    def _guess_cell_size(self, objects):
+        sizes = sorted(max(obj._xmax - obj._xmin, obj._ymax - obj._ymin)
+                       for obj in objects)
+        if not sizes:
+            return 1.0
+        return 2 * sizes[len(sizes) // 2] or 1.0
+
+    def _cell_range(self, obj):
+        size = self.cell_size
+        return (int(floor(obj._xmin / size)), int(floor(obj._xmax / size)),
+                int(floor(obj._ymin / size)), int(floor(obj._ymax / size)))
+
+    def _link(self, obj, rng):
+        i0, i1, j0, j1 = rng
+        cells = self._cells
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                try:
+                    cells[i, j].add(obj)
+                except KeyError:
+                    cells[i, j] = set([obj])
+
+    def _unlink(self, obj, rng):
+        i0, i1, j0, j1 = rng
+        cells = self._cells
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                cell = cells[i, j]
+                cell.discard(obj)
+                if not cell:
+                    del cells[i, j]
+
+    def update(self, objects):
+        '''Atualiza a posição de todos os objetos na grade'''
+
+        if self.cell_size is None:
+            self.cell_size = self._guess_cell_size(objects)
+
+        ranges = self._ranges
+        large = self._large
+        max_cells = self.max_cells
+        cell_range = self._cell_range
+
+        for obj in objects:
+            rng = cell_range(obj)
+            old = ranges.get(obj)
+            if rng == old:
+                continue
+
+            if old is not None:
+                self._unlink(obj, old)
+            i0, i1, j0, j1 = rng
+            if (i1 - i0 + 1) * (j1 - j0 + 1) > max_cells:
+                large.add(obj)
+                ranges[obj] = None
+                continue
+
+            large.discard(obj)
+            self._link(obj, rng)
+            ranges[obj] = rng
+
+    # Pares --------------------------------------------------------------------
+    def get_pairs(self, objects):
+        self.update(objects)
+        can_collide = self.can_collide
+        ranges = self._ranges
+        pairs = []
+
+        # Testa os objetos que compartilham a mesma célula. Um par que
+        # compartilha várias células é aceito apenas na célula do canto
+        # inferior esquerdo da intersecção entre os intervalos de células
+        for (i, j), cell in self._cells.items():
+            if len(cell) < 2:
+                continue
+            cell = list(cell)
+            for k, A in enumerate(cell):
+                iA, _, jA, _ = ranges[A]
+                for B in cell[k + 1:]:
+                    iB, _, jB, _ = ranges[B]
+                    if (i != (iA if iA > iB else iB) or
+                            j != (jA if jA > jB else jB)):
+                        continue
+                    if not can_collide(A, B):
+                        continue
+                    if shadow_x(A, B) < 0 or shadow_y(A, B) < 0:
+                        continue
+                    pairs.append((A, B))
+
+        # Objetos grandes são testados contra todos os outros
+        if self._large:
+            large = self._large
+            for A in large:
+                for B in objects:
+                    if B is A or (B in large and id(B) < id(A)):
+                        continue
+                    if not can_collide(A, B):
+                        continue
+                    if shadow_x(A, B) < 0 or shadow_y(A, B) < 0:
+                        continue
+                    pairs.append((A, B))
+
+        return self.sort_pairs(pairs, objects)
+
+    def query(self, bbox, objects):
+        self.update(objects)
+        return self._query(bbox, objects)
+
+    def query_many(self, bboxes, objects):
+        self.update(objects)
+        return [self._query(bbox, objects) for bbox in bboxes]
+
+    def _query(self, bbox, objects):
+        size = self.cell_size
+        xmin, xmax, ymin, ymax = bbox
+        i0, i1 = int(floor(xmin / size)), int(floor(xmax / size))
+        j0, j1 = int(floor(ymin / size)), int(floor(ymax / size))
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self._cells):
+            return BroadPhase.query(self, bbox, objects)
+
+        found = set(self._large)
+        cells = self._cells
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                cell = cells.get((i, j))
+                if cell:
+                    found.update(cell)
+        return BroadPhase.query(self, bbox, sorted(found, key=self.sort_key))
+
+#===============================================================================
+# Sort and sweep incremental
+#===============================================================================
+class _Endpoint(object):
+    '''Extremo (mínimo ou máximo) da AABB de um objeto em um dos eixos'''
+
+    __slots__ = ['obj', 'is_max', 'value']
+
+    def __init__(self, obj, is_max, value):
+        self.obj = obj
+        self.is_max = is_max
+        self.value = value
+
+class IncrementalSweepAndPrune(BroadPhase):
+    '''Sort and sweep persistente nos eixos x e y.
+
+    Mantém listas ordenadas com os extremos das AABBs de todos os objetos em
+    cada eixo. Em cada frame os valores são atualizados e as listas são
+    reordenadas por insertion sort. Como os objetos se movem pouco entre
+    frames, a reordenação é praticamente linear no número de objetos.
+
+    Cada troca de posição entre o mínimo de um objeto e o máximo de outro
+    corresponde ao início ou ao fim da superposição das sombras no eixo
+    correspondente. O conjunto de pares com AABBs superpostas é atualizado
+    apenas nestes eventos e os pares que entraram ou saíram deste conjunto são
+    registrados nas listas `entered` e `left`.
+    
+    Nos frames em que novos objetos são adicionados, as listas são reordenadas
+    completamente e o conjunto de pares é recalculado numa única varredura. 
+    Isto evita o custo quadrático do insertion sort ao inserir muitos objetos
+    de uma só vez.
+    '''
+
+    has_events = True
+
+    def __init__(self):
+        self._xs = []
+        self._ys = []
+        self._members = set()
+        self._pairs = set()
+        self._changed = {}
+        self._dirty = False
+        self.entered = []
+        self.left = []
+
+    def add(self, obj):
+        if obj in self._members:
+            return
+        self._members.add(obj)
+        self._xs.append(_Endpoint(obj, False, obj._xmin))
+        self._xs.append(_Endpoint(obj, True, obj._xmax))
+        self._ys.append(_Endpoint(obj, False, obj._ymin))
+        self._ys.append(_Endpoint(obj, True, obj._ymax))
+        self._dirty = True
+
+    def remove(self, obj):
+        if obj not in self._members:
+            return
+        self._members.discard(obj)
+        self._xs = [ep for ep in self._xs if ep.obj is not obj]
+        self._ys = [ep for ep in self._ys if ep.obj is not obj]
+        for pair in [pair for pair in self._pairs if obj in pair]:
+            self._discard(pair)
+
+    # Manutenção do conjunto de pares ------------------------------------------
+    def _key(self, A, B):
+        return (A, B) if id(A) < id(B) else (B, A)
+
+    def _touch(self, key):
+        if key not in self._changed:
+            self._changed[key] = key in self._pairs
+
+    def _discard(self, key):
+        if key in self._pairs:
+            self._touch(key)
+            self._pairs.discard(key)
+
+    def _sort_axis(self, endpoints, getmin, getmax):
+        '''Atualiza os valores dos extremos e reordena a lista por insertion
+        sort, registrando o início e o fim das superposições'''
+
+        for ep in endpoints:
+            ep.value = getmax(ep.obj) if ep.is_max else getmin(ep.obj)
+
+        pairs = self._pairs
+        for i in range(1, len(endpoints)):
+            ep = endpoints[i]
+            value = ep.value
+            is_max = ep.is_max
+            j = i - 1
+            other = endpoints[j]
+
+            # Em caso de empate, os mínimos ficam antes dos máximos. Assim,
+            # caixas que se tocam são consideradas superpostas
+            while other.value > value or (other.value == value and
+                                          other.is_max and not is_max):
+                if other.is_max != is_max and other.obj is not ep.obj:
+                    A, B = ep.obj, other.obj
+                    key = self._key(A, B)
+
+                    # Mínimo passa à esquerda de um máximo: início da
+                    # superposição neste eixo
+                    if not is_max:
+                        if (key not in pairs and
+                                shadow_x(A, B) >= 0 and shadow_y(A, B) >= 0):
+                            self._touch(key)
+                            pairs.add(key)
+
+                    # Máximo passa à esquerda de um mínimo: fim da superposição
+                    else:
+                        self._discard(key)
+
+                endpoints[j + 1] = other
+                j -= 1
+                if j < 0:
+                    break
+                other = endpoints[j]
+            endpoints[j + 1] = ep
+
+    def _rebuild(self):
+        '''Reordena as listas de extremos do zero e recalcula todos os pares
+        com uma varredura no eixo x'''
+
+        sort_key = lambda ep: (ep.value, ep.is_max)
+        for endpoints, getmin, getmax in [
+                (self._xs, XMIN_KEY, attrgetter('_xmax')),
+                (self._ys, attrgetter('_ymin'), attrgetter('_ymax'))]:
+            for ep in endpoints:
+                ep.value = getmax(ep.obj) if ep.is_max else getmin(ep.obj)
+            endpoints.sort(key=sort_key)
+
+        pairs = set()
+        active = {}
+        key = self._key
+        for ep in self._xs:
+            A = ep.obj
+            if ep.is_max:
+                del active[A]
+            else:
+                for B in active:
+                    if shadow_y(A, B) >= 0:
+                        pairs.add(key(A, B))
+                active[A] = None
+
+        # Registra as diferenças com relação ao conjunto anterior
+        changed = self._changed
+        for pair in self._pairs - pairs:
+            changed.setdefault(pair, True)
+        for pair in pairs - self._pairs:
+            changed.setdefault(pair, False)
+        self._pairs = pairs
+        self._dirty = False
+
+    def get_pairs(self, objects):
+        # Sincroniza os objetos caso a fase larga tenha sido trocada com a
+        # simulação em andamento
+        if len(self._members) != len(objects):
+            current = set(objects)
+            for obj in [obj for obj in self._members if obj not in current]:
+                self.remove(obj)
+            for obj in objects:
+                self.add(obj)
+
+        if self._dirty:
+            self._rebuild()
+        else:
+            self._sort_axis(self._xs, XMIN_KEY, attrgetter('_xmax'))
+            self._sort_axis(self._ys, attrgetter('_ymin'), attrgetter('_ymax'))
+
+        # Registra os eventos de entrada e saída
+        can_collide = self.can_collide
+        pairs = self._pairs
+        entered = []
+        left = []
+        for (A, B), was_present in self._changed.items():
+            if not can_collide(A, B):
+                continue
+            if (A, B) in pairs:
+                if not was_present:
+                    entered.append((A, B))
+            elif was_present:
+                left.append((A, B))
+        self._changed.clear()
+
+        result = self.sort_pairs([key for key in pairs if can_collide(*key)],
+                                 objects)
+
+        # Os eventos são ordenados da mesma forma que os pares, já que a ordem
+        # em que foram registrados depende da iteração sobre conjuntos
+        self.entered = self.sort_pairs(entered, objects) if entered else entered
+        self.left = self.sort_pairs(left, objects) if left else left
+        return result
+
+#===============================================================================
+# Árvore dinâmica de AABBs
+#===============================================================================
+class _Node(object):
+    '''Nó da árvore de AABBs. As folhas guardam um objeto em obj.'''
+
+    __slots__ = ['xmin', 'xmax', 'ymin', 'ymax',
+                 'parent', 'left', 'right', 'obj', 'height']
+
+    def __init__(self, xmin, xmax, ymin, ymax, obj=None):
+        self.xmin = xmin
+        self.xmax = xmax
+        self.ymin = ymin
+        self.ymax = ymax
+        self.obj = obj
+        self.parent = self.left = self.right = None
+        self.height = 0
+
+    def refit(self):
+        '''Recalcula a caixa de contorno e a altura a partir dos filhos'''
+
+        L, R = self.left, self.right
+        self.xmin = L.xmin if L.xmin < R.xmin else R.xmin
+        self.xmax = L.xmax if L.xmax > R.xmax else R.xmax
+        self.ymin = L.ymin if L.ymin < R.ymin else R.ymin
+        self.ymax = L.ymax if L.ymax > R.ymax else R.ymax
+        self.height = 1 + max(L.height, R.height)
+
+def _perimeter(xmin, xmax, ymin, ymax):
+    return 2 * ((xmax - xmin) + (ymax - ymin))
+
+def _union_perimeter(A, B):
+    return _perimeter(min(A.xmin, B.xmin), max(A.xmax, B.xmax),
+                      min(A.ymin, B.ymin), max(A.ymax, B.ymax))
+
+class AABBTree(object):
+    '''Árvore binária dinâmica de caixas de contorno (bounding volume
+    hierarchy).
+
+    Cada folha guarda a AABB de um objeto e cada nó interno guarda a AABB que
+    envolve os seus dois filhos. As folhas são inseridas no ponto da árvore que
+    minimiza o aumento do perímetro das caixas e a árvore é rebalanceada por
+    rotações, como numa árvore AVL.
+
+    >>> tree = AABBTree()
+    >>> leaf = tree.insert('A', (0, 10, 0, 10))
+    >>> leaf = tree.insert('B', (20, 30, 0, 10))
+    >>> tree.query((5, 25, 5, 6))
+    ['A', 'B']
+    '''
+
+    def __init__(self):
+        self.root = None
+
+    def insert(self, obj, bbox):
+        '''Insere um objeto com a caixa de contorno bbox e retorna a folha
+        correspondente'''
+
+        leaf = _Node(*bbox, obj=obj)
+        self.insert_leaf(leaf)
+        return leaf
+
+    def insert_leaf(self, leaf):
+        '''Insere uma folha na árvore'''
+
+        if self.root is None:
+            self.root = leaf
+            leaf.parent = None
+            return
+
+        # Procura o melhor irmão para a nova folha
+        node = self.root
+        while node.obj is None:
+            area = _perimeter(node.xmin, node.xmax, node.ymin, node.ymax)
+            combined = _union_perimeter(node, leaf)
+            cost = 2 * combined
+            inheritance = 2 * (combined - area)
+
+            costs = []
+            for child in (node.left, node.right):
+                child_cost = _union_perimeter(child, leaf) + inheritance
+                if child.obj is None:
+                    child_cost -= _perimeter(child.xmin, child.xmax,
+                                             child.ymin, child.ymax)
+                costs.append(child_cost)
+
+            if cost < costs[0] and cost < costs[1]:
+                break
+            node = node.left if costs[0] < costs[1] else node.right
+
+        # Cria um novo pai para o irmão e a folha
+        old_parent = node.parent
+        parent = _Node(0, 0, 0, 0)
+        parent.parent = old_parent
+        parent.left = node
+        parent.right = leaf
+        node.parent = leaf.parent = parent
+        parent.refit()
+
+        if old_parent is None:
+            self.root = parent
+        elif old_parent.left is node:
+            old_parent.left = parent
+        else:
+            old_parent.right = parent
+        self._fix_upwards(old_parent)
+
+    def remove_leaf(self, leaf):
+        '''Remove uma folha da árvore'''
+
+        if leaf is self.root:
+            self.root = None
+            return
+
+        parent = leaf.parent
+        grand_parent = parent.parent
+        sibling = parent.left if parent.right is leaf else parent.right
+        if grand_parent is None:
+            self.root = sibling
+            sibling.parent = None
+        else:
+            if grand_parent.left is parent:
+                grand_parent.left = sibling
+            else:
+                grand_parent.right = sibling
+            sibling.parent = grand_parent
+            self._fix_upwards(grand_parent)
+        leaf.parent = None
+
+    def move_leaf(self, leaf, bbox):
+        '''Atualiza a caixa de contorno de uma folha, reinserindo-a'''
+
+        self.remove_leaf(leaf)
+        leaf.xmin, leaf.xmax, leaf.ymin, leaf.ymax = bbox
+        self.insert_leaf(leaf)
+
+    def _fix_upwards(self, node):
+        while node is not None:
+            node = self._balance(node)
+            node.refit()
+            node = node.parent
+
+    def _balance(self, A):
+        '''Realiza uma rotação caso o nó A esteja desbalanceado e retorna a
+        nova raiz da sub-árvore'''
+
+        if A.obj is not None or A.height < 2:
+            return A
+
+        B, C = A.left, A.right
+        balance = C.height - B.height
+        if balance > 1:
+            return self._rotate(A, C, 'right')
+        elif balance < -1:
+            return self._rotate(A, B, 'left')
+        return A
+
+    def _rotate(self, A, C, side):
+        # C sobe para o lugar de A. O filho mais alto de C permanece em C e o
+        # mais baixo passa a ocupar o lugar de C como filho de A.
+        F, G = C.left, C.right
+        C.parent = A.parent
+        A.parent = C
+        if C.parent is None:
+            self.root = C
+        elif C.parent.left is A:
+            C.parent.left = C
+        else:
+            C.parent.right = C
+
+        if F.height > G.height:
+            high, low = F, G
+        else:
+            high, low = G, F
+        C.left, C.right = A, high
+        if side == 'right':
+            A.right = low
+        else:
+            A.left = low
+        low.parent = A
+        A.refit()
+        C.refit()
+        return C
+
+    def query(self, bbox):
+        '''Retorna a lista de objetos cujas caixas de contorno se superpõem
+        (ou tocam) a caixa bbox'''
+
+        xmin, xmax, ymin, ymax = bbox
+        out = []
+        stack = [self.root] if self.root is not None else []
+        pop, push = stack.pop, stack.append
+        while stack:
+            node = pop()
+            if (node.xmin > xmax or node.xmax < xmin or
+                    node.ymin > ymax or node.ymax < ymin):
+                continue
+            if node.obj is not None:
+                out.append(node.obj)
+            else:
+                push(node.right)
+                push(node.left)
+        return out
+
+    def height(self):
+        '''Altura da árvore'''
+
+        return -1 if self.root is None else self.root.height
+
+class AABBTreeBroadPhase(BroadPhase):
+    '''Fase larga baseada em duas árvores dinâmicas de AABBs: uma para os
+    objetos estáticos e outra para os objetos que se movem.
+
+    As folhas da árvore dinâmica guardam uma AABB "gorda", expandida por uma
+    margem. Um objeto só é reinserido na árvore quando a sua AABB sai da
+    caixa gorda, de modo que pequenos deslocamentos não modificam a árvore.
+    
+    Somente os objetos dinâmicos (e cinemáticos em movimento) são visitados em
+    cada frame. A árvore estática é apenas consultada por eles e os objetos
+    estáticos não são percorridos nem ordenados. Os objetos mudam de árvore
+    quando são adicionados ou removidos e quando a simulação informa uma
+    mudança no seu estado estático/dinâmico (ver refresh()), por exemplo em
+    obj.make_static(), obj.make_dynamic() ou ao atribuir obj.vel a um objeto
+    estático. Um objeto estático deslocado diretamente por obj.move() ou
+    obj.rotate() deve ser reposicionado por obj.pos ou obj.theta para que a
+    sua caixa de contorno seja atualizada.
+
+    Os pares são ordenados como no "sort and sweep" considerando somente os
+    objetos que aparecem em algum par. Os empates em sort_key são resolvidos
+    pela ordem em que os objetos foram adicionados.
+
+    Parameters
+    ----------
+
+    margin : float
+        Margem adicionada em cada lado das AABBs da árvore dinâmica.
+    '''
+
+    def __init__(self, margin=5.0):
+        self.margin = float(margin)
+        self.static_tree = AABBTree()
+        self.dynamic_tree = AABBTree()
+        self._static = {}
+        self._dynamic = {}
+        self._order = {}
+        self._count = 0
+
+    def add(self, obj):
+        if obj not in self._order:
+            self._order[obj] = self._count
+            self._count += 1
+            self._insert(obj)
+
+    def remove(self, obj):
+        if self._order.pop(obj, None) is not None:
+            self._discard(obj)
+
+    def refresh(self, obj):
+        if obj in self._order:
+            self._discard(obj)
+            self._insert(obj)
+
+    def _insert(self, obj):
+        '''Insere o objeto na árvore correspondente ao seu estado atual'''
+
+        xmin, xmax, ymin, ymax = obj._xmin, obj._xmax, obj._ymin, obj._ymax
+        if self.is_static(obj):
+            bbox = (xmin, xmax, ymin, ymax)
+            self._static[obj] = self.static_tree.insert(obj, bbox)
+        else:
+            margin = self.margin
+            bbox = (xmin - margin, xmax + margin, ymin - margin, ymax + margin)
+            self._dynamic[obj] = self.dynamic_tree.insert(obj, bbox)
+
+    def _discard(self, obj):
+        '''Remove o objeto da árvore em que se encontra'''
+
+        leaf = self._static.pop(obj, None)
+        if leaf is not None:
+            self.static_tree.remove_leaf(leaf)
+        else:
+            self.dynamic_tree.remove_leaf(self._dynamic.pop(obj))
+
+    @staticmethod
+    def is_static(obj):
+        '''Verdadeiro se o objeto não puder se mover'''
+
+        vel = obj._vel
+        return not (obj._invmass or obj._invinertia or obj._omega or
+                    vel.x or vel.y)
+
+    def update(self):
+        '''Reinsere na árvore dinâmica os objetos cuja AABB saiu da caixa
+        gorda'''
+
+        margin = self.margin
+        move_leaf = self.dynamic_tree.move_leaf
+
+        for obj, leaf in self._dynamic.items():
+            xmin, xmax, ymin, ymax = obj._xmin, obj._xmax, obj._ymin, obj._ymax
+            if (leaf.xmin <= xmin and leaf.xmax >= xmax and
+                    leaf.ymin <= ymin and leaf.ymax >= ymax):
+                continue
+            move_leaf(leaf, (xmin - margin, xmax + margin,
+                             ymin - margin, ymax + margin))
+
+    def get_pairs(self, objects):
+        self.update()
+        can_collide = self.can_collide
+        query_dynamic = self.dynamic_tree.query
+        query_static = self.static_tree.query
+        visited = set()
+        pairs = []
+
+        for A in self._dynamic:
+            bbox = (A._xmin, A._xmax, A._ymin, A._ymax)
+
+            # Cada par dinâmico é encontrado pelos dois objetos, mas aceito
+            # apenas pelo primeiro deles
+            for B in query_dynamic(bbox):
+                if B is A or B in visited or not can_collide(A, B):
+                    continue
+                if shadow_x(A, B) >= 0 and shadow_y(A, B) >= 0:
+                    pairs.append((A, B))
+            visited.add(A)
+
+            # Somente objetos dinâmicos consultam a árvore estática
+            if A._invmass or A._invinertia:
+                for B in query_static(bbox):
+                    if shadow_x(A, B) >= 0 and shadow_y(A, B) >= 0:
+                        pairs.append((A, B))
+
+        # Ordena somente os objetos que participam de algum par
+        involved = set(obj for AB in pairs for obj in AB)
+        return self.sort_pairs(pairs, sorted(involved, key=self._order.get))
+
+    def query(self, bbox, objects):
+        self.update()
+        return self._query(bbox)
+
+    def query_many(self, bboxes, objects):
+        self.update()
+        return [self._query(bbox) for bbox in bboxes]
+
+    def _query(self, bbox):
+        found = set(self.dynamic_tree.query(bbox))
+        found.update(self.static_tree.query(bbox))
+        found = sorted(found, key=self._order.get)
+        found.sort(key=self.sort_key)
+        return BroadPhase.query(self, bbox, found)
+
+#===============================================================================
+# Seleção da fase larga
+#===============================================================================
+BROAD_PHASES = dict(
+    sweep=SweepAndPrune,
+    grid=GridBroadPhase,
+    sap=IncrementalSweepAndPrune,
+    bvh=AABBTreeBroadPhase,
+)
+
+def get_broad_phase(broad_phase='sweep', **kwds):
+    '''Retorna uma instância de BroadPhase a partir do nome do algoritmo.
+
+    Os argumentos adicionais são repassados para o construtor da classe
+    correspondente. Caso broad_phase já seja uma instância de BroadPhase,
+    retorna o próprio objeto.
+
+    >>> get_broad_phase('grid', cell_size=50)            # doctest: +ELLIPSIS
+    <...GridBroadPhase object at 0x...>
+    '''
+
+    if isinstance(broad_phase, BroadPhase):
+        if kwds:
+            raise TypeError('cannot pass options to a BroadPhase instance')
+        return broad_phase
+
+    try:
+        cls = BROAD_PHASES[broad_phase]
+    except KeyError:
+        raise ValueError('invalid broad phase: %r' % broad_phase)
+    return cls(**kwds)
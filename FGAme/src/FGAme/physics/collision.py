@@ -11,13 +11,30 @@ class Collision(object):
     
     Subclasses de Collision devem implementar o método .resolve(dt) que resolve
     a colisão entre os objetos respeitando os vínculos de is_dynamic*.
+    
+    Quando o contato entre os dois objetos persiste por mais de um frame, a
+    Simulation armazena em `previous` a colisão do frame anterior. O solver de
+    contatos guarda em `impulses` os impulsos (normal, tangente) acumulados em 
+    cada ponto de contato e a detecção de colisão entre polígonos guarda em 
+    `feature` a face que definiu a normal. Estes dados são reaproveitados no 
+    frame seguinte.
     '''
-    def __init__(self, A, B, pos, n, delta=None, world=None):
+
+    previous = None
+    impulses = None
+    feature = None
+
+    def __init__(self, A, B, pos, n, delta=None, world=None, points=None,
+                 depths=None):
         self.objects = A, B
         self.world = world
         self.pos = pos
         self.normal = n
         self.delta = delta
+        self.points = [pos] if points is None else points
+        if depths is None:
+            depths = [delta or 0.0] * len(self.points)
+        self.depths = depths
 
     def get_impulse(self, dt=0):
         '''Calcula o impulso devido à colisão. Retorna o impulso gerado pelo 
@@ -149,7 +166,8 @@ class Collision(object):
         '''Retorna uma colisão com o papel dos objetos A e B trocados'''
 
         A, B = self.objects
-        return Collision(B, A, self.pos, -self.normal, self.world)
+        return Collision(B, A, self.pos, -self.normal, self.delta, self.world,
+                         self.points, self.depths)
 
     def other(self, obj):
         '''Se for chamada com o objeto A, retorna o objeto B e vice-versa'''
@@ -210,7 +228,11 @@ def get_collision_aabb(A, B):
     # Define sinal dos vetores normais: colisões tipo PONG
     if shadowx > shadowy:
         n = Vector(0, (1 if A.ymin < B.ymin else -1))
+        depth = shadowy
     else:
         n = Vector((1 if A.xmin < B.xmin else -1), 0)
+        depth = shadowx
 
-    return Collision(A, B, pos_col, n)
+    # A penetração é usada somente pelo ContactSolver. O delta permanece None
+    # para que Collision.resolve() não corrija as posições
+    return Collision(A, B, pos_col, n, depths=[depth])
@@ -0,0 +1,225 @@
+#-*- coding: utf8 -*-
+'''
+Campos de força aplicados a regiões do espaço.
+
+Um ForceField aplica uma força a todos os objetos dinâmicos cujo centro de
+massa está dentro da sua região (ou a todos os objetos, caso a região seja
+omitida). Os campos são registrados com Simulation.add_field(). Em cada frame,
+a simulação seleciona os objetos próximos da região por uma consulta à fase
+larga (BroadPhase.query()) e calcula as forças de todos eles de uma só vez
+com operações vetorizadas do NumPy. Isto substitui uma função external_force
+por objeto em efeitos como zonas de vento, áreas de água e atratores.
+
+A região pode ser uma tupla (xmin, xmax, ymin, ymax) ou um objeto da física
+(AABB, Circle ou Poly). No último caso, a região acompanha o objeto caso ele
+se mova. O objeto pode ou não fazer parte da simulação.
+
+>>> from FGAme.physics import Simulation, Circle
+>>> ball = Circle(1, pos=(5, 5), mass=2)
+>>> field = UniformField(accel=(0, 10), region=(0, 10, 0, 10))
+>>> objects, forces = field.compute_forces(0, [ball, Circle(1, pos=(20, 5))])
+>>> objects == [ball], forces.tolist()
+(True, [[0.0, 20.0]])
+>>> sim = Simulation()
+>>> sim.add(ball)
+>>> sim.add_field(field)
+
+O NumPy é uma dependência obrigatória para a avaliação dos campos.
+'''
+
+from FGAme.math import Vector
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#===============================================================================
+# Constantes vetoriais
+#===============================================================================
+def _vector_property(name):
+    '''Propriedade que expõe como Vector uma constante armazenada como uma
+    tupla de floats em self.<name>. Os métodos evaluate() leem a tupla
+    diretamente, sem depender da implementação de Vector.'''
+
+    def fget(self):
+        return Vector(*getattr(self, name))
+
+    def fset(self, value):
+        x, y = value
+        setattr(self, name, (float(x), float(y)))
+
+    return property(fget, fset)
+
+#===============================================================================
+# Classe base
+#===============================================================================
+class ForceField(object):
+    '''Campo de força restrito a uma região.
+
+    Sub-classes implementam o método evaluate(t, objects, pos, vel, mass),
+    que recebe a lista dos objetos dentro da região e arrays de forma (N, 2)
+    com as posições e velocidades e de forma (N,) com as massas e retorna um
+    array de forma (N, 2) com as forças. Alternativamente, esta função pode
+    ser passada como o argumento `func` do construtor.'''
+
+    def __init__(self, region=None, func=None):
+        if np is None:
+            raise RuntimeError('numpy is required for force fields')
+        self.region = region
+        if func is not None:
+            self.evaluate = func
+
+    def evaluate(self, t, objects, pos, vel, mass):
+        '''Retorna as forças sobre os objetos dentro da região'''
+
+        raise NotImplementedError
+
+    #===========================================================================
+    # Região
+    #===========================================================================
+    @property
+    def bbox(self):
+        '''Caixa de contorno (xmin, xmax, ymin, ymax) da região ou None caso
+        o campo atue em todo o espaço'''
+
+        region = self.region
+        if region is None:
+            return None
+        try:
+            return (region._xmin, region._xmax, region._ymin, region._ymax)
+        except AttributeError:
+            return tuple(region)
+
+    def contains(self, pos):
+        '''Recebe um array de forma (N, 2) com posições e retorna um array de
+        booleanos que indica quais estão dentro da região'''
+
+        region = self.region
+        x, y = pos[:, 0], pos[:, 1]
+        if region is None:
+            return np.ones(len(pos), dtype=bool)
+
+        # Polígono convexo: o ponto está à esquerda de todos os lados
+        vertices = getattr(region, 'vertices', None)
+        if vertices is not None:
+            inside = np.ones(len(pos), dtype=bool)
+            pts = [(v[0], v[1]) for v in vertices]
+            for (x0, y0), (x1, y1) in zip(pts, pts[1:] + pts[:1]):
+                inside &= (x1 - x0) * (y - y0) - (y1 - y0) * (x - x0) >= 0
+            return inside
+
+        # Círculo
+        radius = getattr(region, 'radius', None)
+        if radius is not None:
+            xc, yc = region._pos
+            return (x - xc) ** 2 + (y - yc) ** 2 <= radius ** 2
+
+        # AABB
+        xmin, xmax, ymin, ymax = self.bbox
+        return (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
+
+    def compute_forces(self, t, objects):
+        '''Retorna um par (objetos, forças) com os objetos da lista que estão
+        dentro da região e um array de forma (N, 2) com as forças sobre cada
+        um deles'''
+
+        n = len(objects)
+        pos = np.array([(obj._pos[0], obj._pos[1]) for obj in objects],
+                       dtype=float).reshape((n, 2))
+        inside = self.contains(pos)
+        if not inside.all():
+            idx = np.flatnonzero(inside)
+            objects = [objects[i] for i in idx.tolist()]
+            pos = pos[idx]
+        if not objects:
+            return objects, np.zeros((0, 2))
+
+        vel = np.array([(obj._vel[0], obj._vel[1]) for obj in objects],
+                       dtype=float)
+        mass = np.array([obj._mass for obj in objects], dtype=float)
+        forces = np.asarray(self.evaluate(t, objects, pos, vel, mass),
+                            dtype=float)
+        return objects, forces.reshape((len(objects), 2))
+
+#===============================================================================
+# Campos específicos
+#===============================================================================
+class UniformField(ForceField):
+    '''Campo uniforme: aplica uma aceleração `accel` (ex.: uma gravidade local)
+    e uma força `force` (ex.: uma zona de vento) constantes a todos os
+    objetos'''
+
+    accel = _vector_property('_accel')
+    force = _vector_property('_force')
+
+    def __init__(self, accel=(0, 0), force=(0, 0), region=None):
+        super(UniformField, self).__init__(region)
+        self.accel = accel
+        self.force = force
+
+    def evaluate(self, t, objects, pos, vel, mass):
+        ax, ay = self._accel
+        fx, fy = self._force
+        forces = np.empty((len(mass), 2))
+        forces[:, 0] = mass * ax + fx
+        forces[:, 1] = mass * ay + fy
+        return forces
+
+class DragField(ForceField):
+    '''Arrasto linear F = -coeff * (v - velocity) causado por um fluido que se
+    move com velocidade `velocity` (ex.: água ou uma corrente de ar)'''
+
+    velocity = _vector_property('_velocity')
+
+    def __init__(self, coeff, velocity=(0, 0), region=None):
+        super(DragField, self).__init__(region)
+        self.coeff = float(coeff)
+        self.velocity = velocity
+
+    def evaluate(self, t, objects, pos, vel, mass):
+        return -self.coeff * (vel - self._velocity)
+
+class AttractorField(ForceField):
+    '''Aceleração na direção do ponto `center` com intensidade
+    strength / (r + epsilon)**2, onde r é a distância até o centro. Valores
+    negativos de strength produzem um campo repulsivo. O parâmetro epsilon
+    possui o mesmo significado que em GravityF.'''
+
+    center = _vector_property('_center')
+
+    def __init__(self, center, strength, epsilon=0, region=None):
+        super(AttractorField, self).__init__(region)
+        self.center = center
+        self.strength = float(strength)
+        self.epsilon = float(epsilon)
+
+    def evaluate(self, t, objects, pos, vel, mass):
+        delta = self._center - pos
+        r = np.sqrt((delta ** 2).sum(1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            k = self.strength * mass / ((r + self.epsilon) ** 2 * r)
+        k[r == 0] = 0.0
+        return delta * k[:, None]
+
+class BuoyancyField(ForceField):
+    '''Empuxo de um fluido de densidade `density` sujeito à gravidade
+    `gravity`: F = -density * area * gravity, onde area é a área do objeto.
+    O objeto é considerado totalmente submerso sempre que o seu centro de
+    massa estiver dentro da região. Pode ser combinado com um DragField na
+    mesma região para simular água.'''
+
+    gravity = _vector_property('_gravity')
+
+    def __init__(self, density, gravity=(0, -1), region=None):
+        super(BuoyancyField, self).__init__(region)
+        self.density = float(density)
+        self.gravity = gravity
+
+    def evaluate(self, t, objects, pos, vel, mass):
+        gx, gy = self._gravity
+        area = np.array([obj.area for obj in objects], dtype=float)
+        forces = np.empty((len(area), 2))
+        forces[:, 0] = area * (-self.density * gx)
+        forces[:, 1] = area * (-self.density * gy)
+        return forces
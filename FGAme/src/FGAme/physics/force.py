@@ -6,6 +6,11 @@ Created on 19/11/2014
 '''
 from FGAme.math import *
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 class ForceProperty(object):
     '''Implementa o atributo external_force dos objetos da classe Object.
     
@@ -126,6 +131,20 @@ class ForcePropertyCtrl(object):
     Controla as operações com forças em um objeto. Pode ser chamado com um 
     argumento numérico para calcular a força. Também aceita o idioma de
     composição de forças descrito na classe ForceProperty
+    
+    Além de funções, os termos podem ser vetores constantes (ex.: um campo
+    uniforme) ou forças lineares na posição, como SpringSF. Estes termos são
+    reduzidos a coeficientes e somados em forma fechada, sem chamadas de 
+    funções a cada avaliação da força.
+    
+    >>> class HasForce(object):
+    ...     force = ForceProperty()
+    >>> obj = HasForce()
+    >>> obj.force = (0, -10)
+    >>> obj.force += lambda t: (t, 0)
+    >>> obj.force *= 2
+    >>> obj.force(1)
+    Vector(2, -20)
     '''
 
     def __init__(self, obj, attr_name):
@@ -135,7 +154,8 @@ class ForcePropertyCtrl(object):
         self._fast = None
 
     def add(self, other):
-        '''Adiciona uma nova força à interação com a partícula'''
+        '''Adiciona uma nova força à interação com a partícula. A força pode
+        ser uma função do tempo ou um vetor constante'''
 
         self._funcs.append((None, other))
         self._update_fast()
@@ -158,39 +178,17 @@ class ForcePropertyCtrl(object):
 
     # Funções privadas ---------------------------------------------------------
     def _update_fast(self):
-        '''Atualiza a função que calcula a força de acordo com os tipos de
-        transformações presentes até o momento.
+        '''Atualiza a função que calcula a força de acordo com os termos
+        registrados até o momento.
         
         Atualiza o método de acesso rápido do objeto em questão.'''
-        if self._funcs:
-            # Monta hierarquia de funções rápidas
-            adds = [ f for (k, f) in self._funcs if k is None ]
-            muls = { k: [] for (k, _) in self._funcs if k is not None }
-            for k, f in self._funcs:
-                if k is not None:
-                    muls[k].append(f)
-            fmuls = { k: L for (k, L) in muls.items() if callable(k) }
-            nmuls = { k: L for (k, L) in muls.items() if not callable(k) }
-
-            # Implementa versões específicas da mais especializada para a menos
-            # Começamos no caso onde só existem forças aditivas
-            if not fmuls and not nmuls:
-                fast_func = self._make_fast_adds(adds)
-
-            # Agora o caso onde todas as multiplicações são numéricas. Criamos
-            # uma lista de tuplas (k, f) com a constante multiplicativa e
-            # com a função
-            elif not fmuls:
-                combined = [ (1, f) for f in adds ]
-                for (k, L) in nmuls.items():
-                    combined.extend((k, f) for f in L)
-                fast_func = self._make_fast_combined(combined)
-
-            else:
-                raise NotImplementedError(nmuls, fmuls)
 
-            # Salva a função rápida
-            self._fast = fast_func
+        if self._funcs:
+            if any(callable(k) for (k, _) in self._funcs):
+                raise NotImplementedError('functional multipliers are not '
+                                          'supported')
+            terms = [(1 if k is None else k, f) for (k, f) in self._funcs]
+            self._fast = fast_func = self._compile(terms)
             setattr(self._obj, self._attr, fast_func)
 
         # Não existe nenhuma função registrada: atribui o atributo de acesso
@@ -199,33 +197,78 @@ class ForcePropertyCtrl(object):
             self._fast = None
             setattr(self._obj, self._attr, None)
 
-    def _make_fast_adds(self, adds):
-        '''Cria função que retorna a força como a soma de todas as forças em
-        adds'''
+    def _compile(self, terms):
+        '''Cria uma única função que retorna a soma k * f(t) de todos os
+        termos (k, f) em terms.
+
+        Os termos constantes (vetores ou tuplas) e os termos lineares na
+        posição (que implementam o método linear_coeffs(), como SpringSF) são
+        reduzidos a coeficientes somados em forma fechada. As demais funções
+        são chamadas em sequência. O resultado é acumulado em escalares e
+        gravado num único VectorM, retornado em todas as chamadas.'''
+
+        cx = cy = 0.0
+        linear = []  # [obj, mxx, mxy, myx, myy]
+        funcs = []
+        for k, f in terms:
+            coeffs = getattr(f, 'linear_coeffs', None)
+            coeffs = coeffs() if coeffs is not None else None
+            if coeffs is not None:
+                obj, (ax, ay), M = coeffs
+                cx += k * ax
+                cy += k * ay
+                for row in linear:
+                    if row[0] is obj:
+                        break
+                else:
+                    row = [obj, 0.0, 0.0, 0.0, 0.0]
+                    linear.append(row)
+                for i, m in enumerate(M, 1):
+                    row[i] += k * m
+            elif not callable(f):
+                fx, fy = f
+                cx += k * fx
+                cy += k * fy
+            else:
+                funcs.append((k, f))
+        linear = [tuple(row) for row in linear]
 
         F = VectorM(0, 0)
-        Fmul = F.__imul__  # usamos estas funções para evitar problemas de
-        Fadd = F.__iadd__  # escopo no closure fa função fast_func
-        def fast_func(t):
-            Fmul(0)
-            for func in adds:
-                Fadd(func(t))
-            return F
-        return fast_func
-
-    def _make_fast_combined(self, combined):
-        '''Cria função que retorna a força como a soma de todas as constantes
-        k e forças f para cada elemento (k, f) em combined'''
+        set_xy = F.set_xy
+
+        # Somente termos constantes
+        if not linear and not funcs:
+            def fast_func(t):
+                set_xy(cx, cy)
+                return F
+
+        # Somente funções sem constantes multiplicativas
+        elif not linear and all(k == 1 for (k, _) in funcs):
+            plain = [f for (_, f) in funcs]
+            def fast_func(t):
+                x, y = cx, cy
+                for func in plain:
+                    fi = func(t)
+                    x += fi[0]
+                    y += fi[1]
+                set_xy(x, y)
+                return F
+
+        # Caso geral
+        else:
+            def fast_func(t):
+                x, y = cx, cy
+                for obj, mxx, mxy, myx, myy in linear:
+                    X, Y = obj._pos
+                    x += mxx * X + mxy * Y
+                    y += myx * X + myy * Y
+                for k, func in funcs:
+                    fi = func(t)
+                    x += k * fi[0]
+                    y += k * fi[1]
+                set_xy(x, y)
+                return F
 
-        F = VectorM(0, 0)
-        Fmul = F.__imul__
-        Fadd = F.__iadd__
-        def fast_func(t):
-            Fmul(0)
-            for k, func in combined:
-                fi = func(t)
-                Fadd((k * fi[0], k * fi[1]))
-            return F
         return fast_func
 
     # Métodos mágicos ----------------------------------------------------------
@@ -287,6 +330,14 @@ class SingleForce(object):
     def __call__(self, t):
         return self._func_ready(t)
 
+    def linear_coeffs(self):
+        '''Retorna None ou, caso a força seja uma função linear da posição R
+        do objeto, F = C + M R, uma tupla (obj, (Cx, Cy), (Mxx, Mxy, Myx, 
+        Myy)) com os coeficientes. É utilizado por ForcePropertyCtrl para 
+        somar estas forças em forma fechada.'''
+
+        return None
+
     obj = property(lambda x: x._obj)
     func = property(lambda x: x._func)
     mode = property(lambda x: x._mode)
@@ -370,16 +421,23 @@ class SpringSF(SingleConservativeForce):
 
         # Define forças e potenciais
         def F(R):
-            Dx = x0 - R._x
-            Dy = y0 - R._y
+            x, y = R
+            Dx = x0 - x
+            Dy = y0 - y
             return Vector(kx * Dx + kxy * Dy, ky * Dy + kxy * Dx)
 
         def U(R):
-            Dx = x0 - R._x
-            Dy = y0 - R._y
+            x, y = R
+            Dx = x0 - x
+            Dy = y0 - y
             return (kx * Dx ** 2 + ky * Dy ** 2 + 2 * kxy * Dx * Dy) / 2
 
         super(SpringSF, self).__init__(obj, F, U)
+        self._coeffs = (obj, (kx * x0 + kxy * y0, ky * y0 + kxy * x0),
+                        (-kx, -kxy, -kxy, -ky))
+
+    def linear_coeffs(self):
+        return self._coeffs
 
     k = property(lambda x: x._k)
     r0 = property(lambda x: x._r0)
@@ -552,13 +610,17 @@ class SpringF(PairConservativeForce):
 
         # Define forças e potenciais
         def F(rA, rB):
-            Dx = rB._x - rA._x + dx
-            Dy = rB._y - rA._y + dy
+            xA, yA = rA
+            xB, yB = rB
+            Dx = xB - xA + dx
+            Dy = yB - yA + dy
             return Vector(kx * Dx + kxy * Dy, +ky * Dy + kxy * Dx)
 
         def U(rA, rB):
-            Dx = rB._x - rA._x + dx
-            Dy = rB._y - rA._y + dy
+            xA, yA = rA
+            xB, yB = rB
+            Dx = xB - xA + dx
+            Dy = yB - yA + dy
             return (kx * Dx ** 2 + ky * Dy ** 2 + 2 * kxy * Dx * Dy) / 2
 
         super(SpringF, self).__init__(A, B, F, U)
@@ -605,14 +667,620 @@ class GravityF(PairConservativeForce):
 # Implementações de forças específicas -- forças aplicadas a grupos de objetos
 #===============================================================================
 class GravityPool(object):
-    def __init__(self, objects):
+    '''
+    Calcula a força gravitacional "amaciada" entre todos os pares de um grupo
+    de objetos.
+
+    Equivale a criar um GravityF para cada par de objetos do grupo, mas as
+    forças de todos os objetos são calculadas de uma só vez a cada frame, em
+    vez de N**2 chamadas de funções em Python. A força sobre cada objeto é a
+    mesma de GravityF:
+
+        F_A = G mA mB (rB - rA) / ((|rB - rA| + epsilon)**2 |rB - rA|)
+
+    Para participar da simulação, o grupo deve ser registrado com
+    Simulation.add_pool(). As forças são somadas às forças externas dos
+    objetos em Simulation.resolve_forces(). Objetos com massa infinita não
+    atraem os outros objetos.
+
+    Parameters
+    ----------
+
+    objects : sequence of Object instances
+        Objetos que interagem entre si.
+    G : float
+        Constante gravitacional.
+    epsilon : float
+        Parâmetro de amaciamento (ver GravityF).
+    method : str
+        Algoritmo utilizado no cálculo das forças:
+            'direct':
+                Soma direta sobre todos os pares. É exato e custa O(N**2).
+                Utiliza o NumPy, se disponível, calculando as interações de
+                `chunk_size` objetos por vez.
+            'barnes-hut':
+                Aproximação de Barnes-Hut, que agrupa os objetos distantes
+                numa quadtree. Custa O(N log N) e requer o NumPy.
+    theta : float
+        Ângulo de abertura do método de Barnes-Hut. Um nó da árvore de lado s
+        a uma distância d de um objeto é tratado como uma única massa no seu
+        centro de massa se s < theta * d. Valores menores são mais precisos e
+        mais lentos; theta = 0 equivale à soma direta.
+    leaf_size : int
+        Número máximo de objetos nas folhas da quadtree.
+
+    Example
+    -------
+
+    >>> from FGAme.physics import Circle
+    >>> A, B = Circle(1, pos=(0, 0), mass=1), Circle(1, pos=(2, 0), mass=1)
+    >>> pool = GravityPool([A, B], G=4)
+    >>> pool.get_force(A), pool.get_force(B)
+    (VectorM(1, 0), VectorM(-1, 0))
+    '''
+
+    METHODS = ('direct', 'barnes-hut')
+
+    def __init__(self, objects=(), G=1.0, epsilon=0, method='direct',
+                 theta=0.5, leaf_size=1, chunk_size=256):
+        if method not in self.METHODS:
+            raise ValueError('invalid method: %r' % method)
+        if method == 'barnes-hut' and np is None:
+            raise RuntimeError('numpy is required for the Barnes-Hut method')
+
         self.objects = list(objects)
+        self.G = float(G)
+        self.epsilon = float(epsilon)
+        self.method = method
+        self.theta = float(theta)
+        self.leaf_size = max(int(leaf_size), 1)
+        self.chunk_size = max(int(chunk_size), 1)
+
+    def add(self, obj):
+        '''Adiciona um objeto ao grupo'''
+
+        if obj not in self.objects:
+            self.objects.append(obj)
+
+    def remove(self, obj):
+        '''Remove um objeto do grupo'''
+
+        self.objects.remove(obj)
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __iter__(self):
+        return iter(self.objects)
+
+    #===========================================================================
+    # Cálculo das forças
+    #===========================================================================
+    def compute_forces(self, t=None):
+        '''Retorna as forças sobre todos os objetos na ordem de self.objects.
+
+        O resultado é um array de forma (N, 2) ou, caso o NumPy não esteja
+        disponível, uma lista de tuplas (Fx, Fy). O argumento t existe apenas
+        por compatibilidade com a interface de Simulation.add_pool().'''
+
+        if np is None:
+            return self._direct_forces_py()
+
+        n = len(self.objects)
+        if not n:
+            return np.zeros((0, 2))
+        pos = np.array([(obj._pos[0], obj._pos[1]) for obj in self.objects],
+                       dtype=float).reshape((n, 2))
+        mass = np.array([obj._mass for obj in self.objects], dtype=float)
+        sources = np.where(np.isfinite(mass), mass, 0.0)
+        x, y = pos[:, 0].copy(), pos[:, 1].copy()
+
+        if self.method == 'direct':
+            ax, ay = self._direct_accels(x, y, sources)
+        else:
+            tree = _QuadTree(x, y, sources, self.leaf_size)
+            ax, ay = tree.accels(self.epsilon, self.theta)
+
+        forces = np.empty((n, 2))
+        forces[:, 0] = ax
+        forces[:, 1] = ay
+        forces *= (self.G * sources)[:, None]
+        return forces
+
+    def _direct_accels(self, x, y, m):
+        '''Soma direta das acelerações (sem o fator G) em blocos de
+        chunk_size objetos'''
+
+        n = len(x)
+        eps = self.epsilon
+        ax, ay = np.zeros(n), np.zeros(n)
+        for start in range(0, n, self.chunk_size):
+            stop = min(start + self.chunk_size, n)
+            dx = x[None, :] - x[start:stop, None]
+            dy = y[None, :] - y[start:stop, None]
+            r = np.sqrt(dx * dx + dy * dy)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                k = m[None, :] / ((r + eps) ** 2 * r)
+            k[r == 0] = 0.0
+            ax[start:stop] = (k * dx).sum(1)
+            ay[start:stop] = (k * dy).sum(1)
+        return ax, ay
+
+    def _direct_forces_py(self):
+        '''Soma direta em Python puro, utilizada caso o NumPy não esteja
+        disponível'''
+
+        G, eps = self.G, self.epsilon
+        inf = float('inf')
+        data = [(obj._pos[0], obj._pos[1], obj._mass) for obj in self.objects]
+        forces = []
+        for xi, yi, mi in data:
+            if mi == inf:
+                forces.append((0.0, 0.0))
+                continue
+            Fx = Fy = 0.0
+            for xj, yj, mj in data:
+                dx, dy = xj - xi, yj - yi
+                r = sqrt(dx * dx + dy * dy)
+                if r == 0 or mj == inf:
+                    continue
+                k = mj / ((r + eps) ** 2 * r)
+                Fx += k * dx
+                Fy += k * dy
+            forces.append((G * mi * Fx, G * mi * Fy))
+        return forces
+
+    def get_force(self, obj, mutable=True):
+        '''Retorna a força sobre o objeto obj. Se `mutable` for falso, retorna
+        um Vector ao invés de um VectorM.
+
+        Cada chamada calcula as forças de todo o grupo. Utilize 
+        get_all_forces() ou compute_forces() para obter várias forças.'''
+
+        F = self.compute_forces()[self.objects.index(obj)]
+        return (VectorM if mutable else Vector)(F[0], F[1])
+
+    def get_all_forces(self, mutable=True):
+        '''Retorna uma lista com as forças sobre todos os objetos do grupo'''
+
+        cls = VectorM if mutable else Vector
+        return [cls(Fx, Fy) for (Fx, Fy) in self.compute_forces()]
+
+    def potentialE(self):
+        '''Energia potencial gravitacional do grupo (ver GravityF)'''
+
+        G, eps = self.G, self.epsilon
+        data = [(obj._pos, obj._mass) for obj in self.objects]
+        U = 0.0
+        for i, (Ri, mi) in enumerate(data):
+            for Rj, mj in data[i + 1:]:
+                U -= G * mi * mj / ((Ri - Rj).norm() + eps)
+        return U
+
+class SpringNetwork(object):
+    '''
+    Rede de molas entre pares de objetos cujas forças são calculadas de uma
+    só vez a cada frame.
+
+    Útil para corpos moles, cordas e tecidos formados por muitas molas. Cada
+    mola liga dois objetos A e B e exerce uma força na direção do segmento AB
+    proporcional à deformação em relação ao comprimento de repouso:
+
+        F_A = [k (L - L0) + c (vB - vA) . u] u,      F_B = -F_A
+
+    onde L é a distância entre os objetos, L0 o comprimento de repouso e u o
+    vetor unitário de A para B. O termo c (opcional) amortece a oscilação da
+    mola. Se a força de uma mola ultrapassar o seu limite `max_force`, a mola
+    se rompe: ela é removida da rede e o par (A, B) é adicionado à lista
+    `broken`.
+
+    Os índices dos objetos, comprimentos de repouso e constantes de todas as
+    molas são armazenados em arrays, de modo que as forças e as energias
+    potenciais são calculadas em poucas operações vetorizadas do NumPy (ou
+    num laço em Python puro, caso ele não esteja disponível). Assim como o
+    GravityPool, a rede deve ser registrada com Simulation.add_pool().
+
+    Example
+    -------
+
+    >>> from FGAme.physics import Circle
+    >>> A, B = Circle(1, pos=(0, 0)), Circle(1, pos=(3, 0))
+    >>> net = SpringNetwork(k=2)
+    >>> net.add_spring(A, B, length=2)
+    0
+    >>> net.get_force(A), net.get_force(B)
+    (VectorM(2, 0), VectorM(-2, 0))
+    >>> net.potentialE()
+    1.0
+    '''
+
+    def __init__(self, k=1.0, damping=0.0, max_force=None):
+        self.k = float(k)
+        self.damping = float(damping)
+        self.max_force = max_force
+        self.objects = []
+        self.broken = []
+        self._index = {}
+        self._springs = []
+        self._arrays = None
+
+    def __len__(self):
+        return len(self._springs)
+
+    #===========================================================================
+    # Gerenciamento de objetos e molas
+    #===========================================================================
+    def add(self, obj):
+        '''Adiciona um objeto à rede e retorna o seu índice'''
+
+        try:
+            return self._index[obj]
+        except KeyError:
+            self._index[obj] = idx = len(self.objects)
+            self.objects.append(obj)
+            return idx
+
+    def remove(self, obj):
+        '''Remove um objeto e todas as molas ligadas a ele'''
+
+        idx = self._index[obj]
+        springs = []
+        for spring in self._springs:
+            a, b = spring[:2]
+            if idx not in (a, b):
+                springs.append((a - (a > idx), b - (b > idx)) + spring[2:])
+        self._springs = springs
+        del self.objects[idx]
+        self._index = dict((obj, i) for (i, obj) in enumerate(self.objects))
+        self._arrays = None
+
+    def add_spring(self, A, B, k=None, length=None, damping=None,
+                   max_force=None):
+        '''Liga os objetos A e B por uma mola e retorna o índice da mola.
+
+        Os objetos são adicionados à rede caso ainda não façam parte dela. Se
+        `length` for omitido, o comprimento de repouso é a distância atual
+        entre os objetos. Os valores omitidos de k, damping e max_force são
+        os valores padrão da rede.'''
+
+        a, b = self.add(A), self.add(B)
+        if length is None:
+            length = (B._pos - A._pos).norm()
+        k = self.k if k is None else float(k)
+        damping = self.damping if damping is None else float(damping)
+        if max_force is None:
+            max_force = self.max_force
+        max_force = float('inf') if max_force is None else float(max_force)
+        self._springs.append((a, b, float(length), k, damping, max_force))
+        self._arrays = None
+        return len(self._springs) - 1
+
+    def add_chain(self, objects, **kwds):
+        '''Liga os objetos consecutivos da sequência por molas (uma corda).
+        Os argumentos adicionais são repassados para add_spring().'''
+
+        objects = list(objects)
+        for A, B in zip(objects, objects[1:]):
+            self.add_spring(A, B, **kwds)
+
+    def remove_springs(self, A, B):
+        '''Remove todas as molas entre A e B'''
+
+        pair = set([self._index[A], self._index[B]])
+        self._springs = [spring for spring in self._springs
+                         if set(spring[:2]) != pair]
+        self._arrays = None
+
+    def springs(self):
+        '''Itera sobre as molas, retornando tuplas (A, B, comprimento, k, 
+        damping, max_force)'''
+
+        objects = self.objects
+        for a, b, length, k, c, fmax in self._springs:
+            yield (objects[a], objects[b], length, k, c, fmax)
+
+    def _get_arrays(self):
+        '''Retorna os arrays com os parâmetros das molas, reconstruindo-os
+        caso a rede tenha sido modificada'''
+
+        if self._arrays is None:
+            data = np.array(self._springs, dtype=float).reshape((-1, 6))
+            a, b = data[:, 0].astype(int), data[:, 1].astype(int)
+            self._arrays = (a, b, data[:, 2], data[:, 3], data[:, 4],
+                            data[:, 5])
+        return self._arrays
+
+    #===========================================================================
+    # Cálculo das forças e energias
+    #===========================================================================
+    def compute_forces(self, t=None):
+        '''Retorna as forças sobre todos os objetos na ordem de self.objects
+        e rompe as molas cuja força excede o limite.
+
+        Este é o método chamado pela simulação a cada frame. O resultado é um
+        array de forma (N, 2) ou, caso o NumPy não esteja disponível, uma
+        lista de tuplas (Fx, Fy).'''
+
+        forces, broken = self._evaluate()
+        if broken:
+            self._break(broken)
+        return forces
+
+    def _evaluate(self):
+        '''Retorna um par (forças, rompidas) com as forças sobre todos os
+        objetos e a lista de índices das molas cuja força excede o limite.
+        As molas rompidas não contribuem para as forças, mas não são
+        removidas da rede.'''
+
+        if np is None:
+            return self._evaluate_py()
+
+        n = len(self.objects)
+        if not self._springs:
+            return np.zeros((n, 2)), []
+        a, b, length, k, c, fmax = self._get_arrays()
+        pos = np.array([(obj._pos[0], obj._pos[1]) for obj in self.objects],
+                       dtype=float)
+        dx = pos[b, 0] - pos[a, 0]
+        dy = pos[b, 1] - pos[a, 1]
+        L = np.sqrt(dx * dx + dy * dy)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ux = np.where(L > 0, dx / L, 0.0)
+            uy = np.where(L > 0, dy / L, 0.0)
+        F = k * (L - length)
+        if c.any():
+            vel = np.array([(obj._vel[0], obj._vel[1])
+                            for obj in self.objects], dtype=float)
+            F += c * ((vel[b, 0] - vel[a, 0]) * ux +
+                      (vel[b, 1] - vel[a, 1]) * uy)
+
+        broken = np.abs(F) > fmax
+        if broken.any():
+            F[broken] = 0.0
+        broken = np.flatnonzero(broken).tolist()
+
+        Fx, Fy = F * ux, F * uy
+        forces = np.empty((n, 2))
+        forces[:, 0] = (np.bincount(a, weights=Fx, minlength=n) -
+                        np.bincount(b, weights=Fx, minlength=n))
+        forces[:, 1] = (np.bincount(a, weights=Fy, minlength=n) -
+                        np.bincount(b, weights=Fy, minlength=n))
+        return forces, broken
+
+    def _evaluate_py(self):
+        '''Implementação de _evaluate() em Python puro'''
+
+        forces = [[0.0, 0.0] for _ in self.objects]
+        pos = [(obj._pos[0], obj._pos[1]) for obj in self.objects]
+        vel = [(obj._vel[0], obj._vel[1]) for obj in self.objects]
+        broken = []
+        for i, (a, b, length, k, c, fmax) in enumerate(self._springs):
+            dx = pos[b][0] - pos[a][0]
+            dy = pos[b][1] - pos[a][1]
+            L = sqrt(dx * dx + dy * dy)
+            ux, uy = (dx / L, dy / L) if L else (0.0, 0.0)
+            F = k * (L - length)
+            if c:
+                F += c * ((vel[b][0] - vel[a][0]) * ux +
+                          (vel[b][1] - vel[a][1]) * uy)
+            if abs(F) > fmax:
+                broken.append(i)
+                continue
+            forces[a][0] += F * ux
+            forces[a][1] += F * uy
+            forces[b][0] -= F * ux
+            forces[b][1] -= F * uy
+        return [tuple(F) for F in forces], broken
+
+    def _break(self, indexes):
+        '''Remove as molas nos índices dados e registra os pares em broken'''
+
+        objects = self.objects
+        indexes = set(indexes)
+        for i in sorted(indexes):
+            a, b = self._springs[i][:2]
+            self.broken.append((objects[a], objects[b]))
+        self._springs = [spring for (i, spring) in enumerate(self._springs)
+                         if i not in indexes]
+        self._arrays = None
 
     def get_force(self, obj, mutable=True):
-        pass
+        '''Retorna a força sobre o objeto obj (ver GravityPool.get_force()).
+
+        Diferentemente de compute_forces(), não rompe as molas: as molas
+        acima do limite apenas deixam de contribuir para a força.'''
+
+        F = self._evaluate()[0][self._index[obj]]
+        return (VectorM if mutable else Vector)(F[0], F[1])
 
     def get_all_forces(self, mutable=True):
-        return [ self.get_force(obj, mutable) for obj in self.objects ]
+        '''Retorna uma lista com as forças sobre todos os objetos da rede'''
+
+        cls = VectorM if mutable else Vector
+        return [cls(Fx, Fy) for (Fx, Fy) in self._evaluate()[0]]
+
+    def potentialE(self):
+        '''Energia potencial elástica armazenada em todas as molas'''
+
+        if not self._springs:
+            return 0.0
+        pos = [(obj._pos[0], obj._pos[1]) for obj in self.objects]
+        if np is None:
+            U = 0.0
+            for a, b, length, k, _, _ in self._springs:
+                dx = pos[b][0] - pos[a][0]
+                dy = pos[b][1] - pos[a][1]
+                U += k * (sqrt(dx * dx + dy * dy) - length) ** 2 / 2
+            return U
+
+        a, b, length, k, _, _ = self._get_arrays()
+        pos = np.array(pos, dtype=float)
+        L = np.sqrt(((pos[b] - pos[a]) ** 2).sum(1))
+        return float((k * (L - length) ** 2).sum() / 2)
+
+#===============================================================================
+# Quadtree utilizada pelo método de Barnes-Hut
+#===============================================================================
+# Número de níveis da quadtree. As posições são discretizadas numa grade de
+# 2**QUADTREE_DEPTH x 2**QUADTREE_DEPTH células e cada nível corresponde a um
+# par de bits do código de Morton das células.
+QUADTREE_DEPTH = 16
+
+def _spread_bits(v):
+    '''Intercala zeros entre os 16 bits inferiores de cada inteiro do array'''
+
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+class _QuadTree(object):
+    '''Quadtree de massas pontuais armazenada em arrays do NumPy.
+
+    A árvore é construída nível a nível a partir dos códigos de Morton das
+    posições: os objetos são ordenados pelo código e os nós de cada nível
+    correspondem aos prefixos distintos dos códigos dos objetos que ainda não
+    estão numa folha. Cada nó armazena a massa total, o centro de massa, o
+    lado e as coordenadas inteiras da sua célula, os índices dos 4 filhos e,
+    no caso das folhas, o intervalo de objetos que contém.'''
+
+    def __init__(self, x, y, m, leaf_size=1, depth=QUADTREE_DEPTH):
+        self.x, self.y, self.m = x, y, m
+        self.depth = depth
+        n = len(x)
+
+        # Discretiza as posições numa grade quadrada que contém todos os pontos
+        xmin, ymin = x.min(), y.min()
+        side = max(x.max() - xmin, y.max() - ymin) or 1.0
+        side *= 1 + 1e-9
+        cells = 2 ** depth
+        qx = np.clip(((x - xmin) * (cells / side)).astype(np.int64),
+                     0, cells - 1)
+        qy = np.clip(((y - ymin) * (cells / side)).astype(np.int64),
+                     0, cells - 1)
+        keys = _spread_bits(qx) | (_spread_bits(qy) << 1)
+        order = np.argsort(keys, kind='mergesort')
+        keys = keys[order]
+        xs, ys, ms = x[order], y[order], m[order]
+        mx, my = ms * xs, ms * ys
+        self.qx, self.qy, self.order = qx, qy, order
+
+        # Constrói os nós de cada nível
+        levels = []
+        links = []
+        active = np.arange(n)
+        parent = None
+        next_id = 0
+        for level in range(depth + 1):
+            shift = 2 * (depth - level)
+            prefix = keys[active] >> shift
+            first = np.empty(len(prefix), dtype=bool)
+            first[0] = True
+            first[1:] = prefix[1:] != prefix[:-1]
+            starts = np.flatnonzero(first)
+            counts = np.diff(np.append(starts, len(prefix)))
+            ids = np.arange(next_id, next_id + len(starts))
+            next_id += len(starts)
+
+            mass = np.add.reduceat(ms[active], starts)
+            sx = np.add.reduceat(mx[active], starts)
+            sy = np.add.reduceat(my[active], starts)
+            body = active[starts]
+            cell = np.right_shift(qx[order[body]], depth - level)
+            celly = np.right_shift(qy[order[body]], depth - level)
+            size = side / 2 ** level
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cx = np.where(mass > 0, sx / mass, xmin + (cell + 0.5) * size)
+                cy = np.where(mass > 0, sy / mass, ymin + (celly + 0.5) * size)
+            leaf = (counts <= leaf_size) | (level == depth)
+            levels.append((cx, cy, mass, np.full(len(ids), size),
+                           np.full(len(ids), level), cell, celly, leaf, body,
+                           counts))
+            if parent is not None:
+                links.append((parent[starts], prefix[starts] & 3, ids))
+
+            keep = np.repeat(~leaf, counts)
+            parent = np.repeat(ids, counts)[keep]
+            active = active[keep]
+            if not len(active):
+                break
+
+        (self.cx, self.cy, self.mass, self.size, self.level, self.cellx,
+         self.celly, self.leaf, self.start, self.count) = \
+            [np.concatenate(col) for col in zip(*levels)]
+        self.children = np.full((next_id, 4), -1, dtype=np.int64)
+        for parents, slots, ids in links:
+            self.children[parents, slots] = ids
+
+    def accels(self, epsilon, theta):
+        '''Calcula as acelerações gravitacionais (com G = 1) sobre todos os
+        pontos.
+
+        Percorre a árvore para todos os pontos simultaneamente: cada iteração
+        processa uma lista de pares (ponto, nó). Os nós distantes segundo o
+        critério de abertura (e as folhas com um único ponto) contribuem com
+        sua massa total. As demais folhas são expandidas nos seus pontos e os
+        nós internos nos seus filhos, que formam os pares da iteração
+        seguinte.'''
+
+        x, y, m = self.x, self.y, self.m
+        qx, qy, order = self.qx, self.qy, self.order
+        n = len(x)
+        depth = self.depth
+        theta2 = theta * theta
+        ax, ay = np.zeros(n), np.zeros(n)
+
+        bi = np.arange(n)
+        nodes = np.zeros(n, dtype=np.int64)
+        while len(bi):
+            dx = self.cx[nodes] - x[bi]
+            dy = self.cy[nodes] - y[bi]
+            r2 = dx * dx + dy * dy
+            shift = depth - self.level[nodes]
+            inside = ((np.right_shift(qx[bi], shift) == self.cellx[nodes]) &
+                      (np.right_shift(qy[bi], shift) == self.celly[nodes]))
+            leaf = self.leaf[nodes]
+            point = ~inside & ((self.size[nodes] ** 2 < theta2 * r2) |
+                               (leaf & (self.count[nodes] == 1)))
+
+            # Nós tratados como massas pontuais
+            if point.any():
+                self._accumulate(ax, ay, bi[point], dx[point], dy[point],
+                                 self.mass[nodes[point]], epsilon)
+
+            # Folhas abertas: interação direta com cada ponto
+            opened = ~point & leaf
+            if opened.any():
+                obi, onodes = bi[opened], nodes[opened]
+                counts = self.count[onodes]
+                total = counts.sum()
+                rep = np.repeat(obi, counts)
+                offsets = np.arange(total) - np.repeat(np.cumsum(counts) -
+                                                       counts, counts)
+                j = order[np.repeat(self.start[onodes], counts) + offsets]
+                other = j != rep
+                rep, j = rep[other], j[other]
+                self._accumulate(ax, ay, rep, x[j] - x[rep], y[j] - y[rep],
+                                 m[j], epsilon)
+
+            # Nós internos abertos: passa para os filhos
+            internal = ~point & ~leaf
+            children = self.children[nodes[internal]]
+            valid = children >= 0
+            bi = np.repeat(bi[internal], 4).reshape((-1, 4))[valid]
+            nodes = children[valid]
+        return ax, ay
+
+    @staticmethod
+    def _accumulate(ax, ay, bi, dx, dy, mass, epsilon):
+        r = np.sqrt(dx * dx + dy * dy)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            k = mass / ((r + epsilon) ** 2 * r)
+        k[r == 0] = 0.0
+        n = len(ax)
+        ax += np.bincount(bi, weights=k * dx, minlength=n)
+        ay += np.bincount(bi, weights=k * dy, minlength=n)
 
 if __name__ == '__main__':
     import doctest
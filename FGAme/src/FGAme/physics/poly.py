@@ -1,36 +1,39 @@
 #-*- coding: utf8 -*-
 
-from FGAme.physics import Object, AABB, Collision, get_collision
+from FGAme.physics import Object, AABB, Circle, Collision, get_collision
 from FGAme.draw import PolyEcho
 from FGAme.math import Vector, VectorM, dot, cross
 from FGAme.math import area, center_of_mass, ROG_sqr
-from FGAme.math import sin, cos, pi
-from FGAme.math import clip
+from FGAme.math import sin, cos, pi, sqrt
 from FGAme.util import lazy
 
 class Poly(Object):
-    '''Define um polígono arbitrário de N lados.'''
+    '''Define um polígono convexo arbitrário de N lados.
+    
+    Os vértices são armazenados no sentido anti-horário, de modo que as 
+    normais calculadas por get_normal() apontam para fora do polígono.'''
 
     def __init__(self, vertices, pos=None, **kwds):
         if pos is not None:
             raise TypeError('cannot define pos for polygonal shapes')
 
         self.vertices = [VectorM(*pt) for pt in vertices]
-        self._xmin = min(pt.x for pt in self.vertices)
-        self._xmax = max(pt.x for pt in self.vertices)
-        self._ymin = min(pt.y for pt in self.vertices)
-        self._ymax = max(pt.y for pt in self.vertices)
+        if area(self.vertices) < 0:
+            self.vertices.reverse()
+        self._update_aabb()
         super(Poly, self).__init__(pos=center_of_mass(self.vertices), **kwds)
         self.num_sides = len(self.vertices)
         self._normals_idxs = self.get_li_indexes()
-        self.num_normals = len(self._normals_idxs or self.vertices)
-
-        # Aceleramos um pouco o cálculo para o caso onde todas as normais são LI.
-        # entre si. Isto é sinalizado por self._normals_idx = None, que implica
-        # que todas as normais do polígono devem ser recalculadas a cada frame
-        if self.num_normals == self.num_sides:
-            self._normals_idxs = None
+        self.num_normals = len(self._normals_idxs)
 
+        # Guarda as normais de todos os lados no referencial do objeto 
+        # (theta = 0). As normais no referencial do mundo só são recalculadas 
+        # quando theta muda.
+        theta = self._theta
+        self._edge_normals = [self.get_normal(i) for i in range(self.num_sides)]
+        self._normals = [self._edge_normals[i] for i in self._normals_idxs]
+        self._normals_theta = theta
+        self._local_normals = [n.rotated(-theta) for n in self._edge_normals]
 
     #===========================================================================
     # Construtores alternativos
@@ -129,15 +132,34 @@ class Poly(Object):
         return Vector(y, -x).normalized()
 
     def get_normals(self):
-        '''Retorna uma lista com as normais linearmente independentes.'''
+        '''Retorna uma lista com as normais linearmente independentes.
+        
+        A lista é armazenada em cache e só é recalculada a partir das normais
+        no referencial do objeto quando o ângulo de rotação muda. Não deve ser
+        modificada.'''
 
-        if self._normals_idxs is None:
-            N = self.num_sides
-            points = self.vertices
-            segmentos = (points[(i + 1) % N] - points[i] for i in range(N))
-            return [ Vector(y, -x).normalized() for (x, y) in segmentos ]
-        else:
-            return [ self.get_normal(i) for i in self._normals_idxs ]
+        if self._theta != self._normals_theta:
+            self._update_normals()
+        return self._normals
+
+    def get_edge_normals(self):
+        '''Retorna uma lista com as normais de todos os lados do polígono. 
+        
+        Assim como em get_normals(), a lista é armazenada em cache e não deve 
+        ser modificada.'''
+
+        if self._theta != self._normals_theta:
+            self._update_normals()
+        return self._edge_normals
+
+    def _update_normals(self):
+        theta = self._theta
+        cos_t, sin_t = cos(theta), sin(theta)
+        normals = self._edge_normals = [
+            Vector(cos_t * x - sin_t * y, sin_t * x + cos_t * y)
+            for (x, y) in self._local_normals]
+        self._normals = [normals[i] for i in self._normals_idxs]
+        self._normals_theta = theta
 
     def is_internal_point(self, pt):
         '''Retorna True se um ponto for interno ao polígono.'''
@@ -153,41 +175,44 @@ class Poly(Object):
         
         return PolyEcho(self, color, solid, lw)
 
-    def move(self, delta):
-        super(Poly, self).move(delta)
+    def _translate_shape(self, x, y):
+        super(Poly, self)._translate_shape(x, y)
         for v in self.vertices:
-            v += delta
+            v.iadd_xy(x, y)
 
     def rotate(self, theta):
         super(Poly, self).rotate(theta)
 
-        # Realiza a matriz de rotação manualmente para melhor performance
+        # Calcula o seno e cosseno uma única vez para todos os vértices
         cos_t, sin_t = cos(theta), sin(theta)
         X, Y = self._pos
         for v in self.vertices:
-            x = v.x - X
-            y = v.y - Y
-            v.x = cos_t * x - sin_t * y + X
-            v.y = cos_t * y + sin_t * x + Y
-
-        self._xmin = min(pt.x for pt in self.vertices)
-        self._xmax = max(pt.x for pt in self.vertices)
-        self._ymin = min(pt.y for pt in self.vertices)
-        self._ymax = max(pt.y for pt in self.vertices)
+            v.rotate_cs(cos_t, sin_t, X, Y)
+        self._update_aabb()
 
     def scale(self, scale, update_physics=False):
-        # Atualiza os pontos
-        Rcm = self.pos
+        X, Y = self._pos
         for v in self.vertices:
-            v -= Rcm
-            v *= scale
-            v += Rcm
-
-        # Atualiza AABB
-        X = [ x for (x, _) in self.vertices ]
-        Y = [ y for (_, y) in self.vertices ]
-        self._xmin, self._xmax = min(X), max(X)
-        self._ymin, self._ymax = min(Y), max(Y)
+            v.scale_about(scale, X, Y)
+        self._update_aabb()
+
+    def _update_aabb(self):
+        '''Recalcula a caixa de contorno a partir dos vértices'''
+
+        vertices = iter(self.vertices)
+        xmin, ymin = next(vertices)
+        xmax, ymax = xmin, ymin
+        for x, y in vertices:
+            if x < xmin:
+                xmin = x
+            elif x > xmax:
+                xmax = x
+            if y < ymin:
+                ymin = y
+            elif y > ymax:
+                ymax = y
+        self._xmin, self._xmax = xmin, xmax
+        self._ymin, self._ymax = ymin, ymax
 
     @property
     def area(self):
@@ -200,73 +225,197 @@ class Poly(Object):
 #===============================================================================
 # Implementa colisões
 #===============================================================================
-u_x = Vector(1, 0)
-DEFAULT_DIRECTIONS = [u_x.rotated(n * pi / 12) for n in [0, 1, 2, 3, 4, 5, 7, 8, 9, 10, 11]]
-
-@get_collision.dispatch(Poly, Poly)
-def get_collision_poly(A, B, directions=None):
-    '''Implementa a colisão entre dois polígonos arbitrários'''
-
-    # Cria a lista de direções a partir das normais do polígono
-    if directions is None:
-        if A.num_normals + B.num_normals < 9:
-            directions = A.get_normals() + B.get_normals()
+# Normais de uma AABB, na ordem dos vértices retornados por _aabb_points()
+AABB_NORMALS = [Vector(1, 0), Vector(0, 1), Vector(-1, 0), Vector(0, -1)]
+
+def _poly_points(obj):
+    '''Retorna os vértices do polígono como uma lista de tuplas'''
+
+    return [(pt.x, pt.y) for pt in obj.vertices]
+
+def _aabb_points(obj):
+    '''Retorna os vértices de uma caixa AABB no sentido anti-horário, na mesma
+    ordem utilizada por Poly.rect()'''
+
+    xmin, xmax, ymin, ymax = obj._xmin, obj._xmax, obj._ymin, obj._ymax
+    return [(xmax, ymin), (xmax, ymax), (xmin, ymax), (xmin, ymin)]
+
+def _max_separation(A_pts, A_normals, B_pts):
+    '''Retorna a maior separação entre os lados do polígono A e o polígono B
+    e o índice do lado correspondente. Valores negativos indicam 
+    superposição.'''
+
+    max_sep, idx = -float('inf'), 0
+    for i, ((px, py), (nx, ny)) in enumerate(zip(A_pts, A_normals)):
+        sep = min([x * nx + y * ny for (x, y) in B_pts]) - (px * nx + py * ny)
+        if sep > max_sep:
+            if sep > 0:
+                return sep, i
+            max_sep, idx = sep, i
+    return max_sep, idx
+
+def _convex_collision(A, B, A_pts, A_normals, B_pts, B_normals,
+                      previous=None):
+    '''Calcula a colisão entre dois polígonos convexos A e B definidos pelas
+    listas de vértices (no sentido anti-horário) e das normais de cada lado.
+    
+    Utiliza o teorema dos eixos separadores (SAT) com as normais dos lados de
+    cada polígono. Caso haja superposição, o lado com menor penetração define
+    a face de referência e o lado mais antiparalelo do outro polígono (face
+    incidente) é recortado pelas laterais da face de referência. Os pontos
+    resultantes que penetram o polígono de referência formam um contato com 
+    até 2 pontos. 
+    
+    Se a colisão do frame anterior for fornecida, a face de referência 
+    utilizada nela é testada antes das demais, já que normalmente é ela que 
+    separa os objetos quando o contato termina.'''
+
+    if previous is not None and previous.feature is not None:
+        side, idx = previous.feature
+        if previous.objects[0] is not A:
+            side = -side
+        if side == 1:
+            (px, py), (nx, ny), pts = A_pts[idx], A_normals[idx], B_pts
         else:
-            directions = DEFAULT_DIRECTIONS
-
-    # Testa se há superposição de sombras em todas as direções consideradas
-    # e calcula o menor valor para sombra e a direção normal
-    min_shadow = float('inf')
-    norm = None
-    for u in directions:
-        A_coords = [ round(dot(pt, u), 6) for pt in A.vertices ]
-        B_coords = [ round(dot(pt, u), 6) for pt in B.vertices ]
-        Amax, Amin = max(A_coords), min(A_coords)
-        Bmax, Bmin = max(B_coords), min(B_coords)
-        minmax, maxmin = min(Amax, Bmax), max(Amin, Bmin)
-        shadow = minmax - maxmin
-        if shadow < 0 :
+            (px, py), (nx, ny), pts = B_pts[idx], B_normals[idx], A_pts
+        if min([x * nx + y * ny for (x, y) in pts]) > px * nx + py * ny:
             return None
-        elif shadow < min_shadow:
-            min_shadow = shadow
-            norm = u
-
-    # Determina o sentido da normal
-    if dot(A.pos, norm) > dot(B.pos, norm):
-        norm = -norm
-
-    # Computa o polígono de intersecção e usa o seu centro de massa como ponto
-    # de colisão
-    try:
-        clipped = clip(A.vertices, B.vertices)
-    except ValueError:  # não houve superposição (talvez por usar normais aproximadas)
+
+    sep_A, i_A = _max_separation(A_pts, A_normals, B_pts)
+    if sep_A > 0:
+        return None
+    sep_B, i_B = _max_separation(B_pts, B_normals, A_pts)
+    if sep_B > 0:
         return None
 
-    if area(clipped) == 0:
+    # Escolhe a face de referência. A tolerância evita que a escolha oscile
+    # entre frames quando as duas separações são quase iguais
+    if sep_B > 0.98 * sep_A + 1e-3:
+        ref_pts, inc_pts, inc_normals = B_pts, A_pts, A_normals
+        nx, ny = B_normals[i_B]
+        idx, sign = i_B, -1
+    else:
+        ref_pts, inc_pts, inc_normals = A_pts, B_pts, B_normals
+        nx, ny = A_normals[i_A]
+        idx, sign = i_A, 1
+
+    # Face incidente: lado com a normal mais antiparalela a n
+    dots = [x * nx + y * ny for (x, y) in inc_normals]
+    j = dots.index(min(dots))
+    x1, y1 = inc_pts[j]
+    x2, y2 = inc_pts[(j + 1) % len(inc_pts)]
+
+    # Recorta a face incidente pelas laterais da face de referência. A 
+    # direção tangente t = (-ny, nx) aponta do vértice idx para idx + 1
+    rx1, ry1 = ref_pts[idx]
+    rx2, ry2 = ref_pts[(idx + 1) % len(ref_pts)]
+    tx, ty = -ny, nx
+    segment = [(x1, y1), (x2, y2)]
+    for offset, side in [(rx1 * tx + ry1 * ty, -1), (rx2 * tx + ry2 * ty, 1)]:
+        (x1, y1), (x2, y2) = segment
+        d1 = side * (x1 * tx + y1 * ty - offset)
+        d2 = side * (x2 * tx + y2 * ty - offset)
+        if d1 > 0 and d2 > 0:
+            return None
+        elif d1 > 0 or d2 > 0:
+            r = d1 / (d1 - d2)
+            xi, yi = x1 + r * (x2 - x1), y1 + r * (y2 - y1)
+            segment = [(xi, yi), (x2, y2)] if d1 > 0 else [(x1, y1), (xi, yi)]
+
+    # Mantém os pontos que penetram a face de referência. O ponto de contato
+    # é o ponto médio entre o ponto incidente e sua projeção na face.
+    offset = rx1 * nx + ry1 * ny
+    contacts = []
+    depths = []
+    for (x, y) in segment:
+        sep = x * nx + y * ny - offset
+        if sep <= 0:
+            contacts.append(Vector(x - sep * nx / 2, y - sep * ny / 2))
+            depths.append(-sep)
+    if not contacts:
         return None
-    col_pt = center_of_mass(clipped)
-    return Collision(A, B, col_pt, norm, min_shadow)
 
-@get_collision.dispatch(Poly, AABB)
-def get_collision_poly_aabb(A, B):
-    '''Implementa a colisão entre um polígono arbitrário e uma caixa AABB'''
+    pos = contacts[0] if len(contacts) == 1 else (contacts[0] + contacts[1]) / 2
+    normal = Vector(sign * nx, sign * ny)
+    col = Collision(A, B, pos, normal, max(depths), points=contacts,
+                    depths=depths)
+    col.feature = (sign, idx)
+    return col
 
-    B_poly = Poly.rect(bbox=B.bbox, density=B.density)
-    col = get_collision_poly(A, B_poly)
+@get_collision.dispatch(Poly, Poly)
+def get_collision_poly(A, B, previous=None):
+    '''Implementa a colisão entre dois polígonos convexos arbitrários'''
+
+    return _convex_collision(A, B, _poly_points(A), A.get_edge_normals(),
+                             _poly_points(B), B.get_edge_normals(), previous)
+
+@get_collision.dispatch(Poly, Circle)
+def get_collision_poly_circle(A, B):
+    '''Implementa a colisão entre um polígono convexo e um círculo'''
+
+    x, y = B._pos
+    radius = B._radius
+
+    # Encontra o lado de maior separação do centro do círculo
+    max_sep, idx = -float('inf'), 0
+    for i, (pt, (nx, ny)) in enumerate(zip(A.vertices, A.get_edge_normals())):
+        sep = (x - pt.x) * nx + (y - pt.y) * ny
+        if sep > max_sep:
+            if sep > radius:
+                return None
+            max_sep, idx = sep, i
+
+    points = A.vertices
+    x1, y1 = points[idx]
+    x2, y2 = points[(idx + 1) % A.num_sides]
+    nx, ny = A.get_edge_normals()[idx]
+
+    # Testa as regiões de Voronoi dos vértices da face
+    if max_sep > 0:
+        for (vx, vy), (ox, oy) in [((x1, y1), (x2, y2)), ((x2, y2), (x1, y1))]:
+            if (x - vx) * (ox - vx) + (y - vy) * (oy - vy) <= 0:
+                dx, dy = x - vx, y - vy
+                distance = sqrt(dx ** 2 + dy ** 2)
+                if distance > radius:
+                    return None
+                if distance:
+                    nx, ny = dx / distance, dy / distance
+                max_sep = distance
+                break
+
+    # O ponto de contato é o ponto médio entre a superfície do polígono e o
+    # ponto mais profundo do círculo
+    h = (radius + max_sep) / 2
+    pos = Vector(x - h * nx, y - h * ny)
+    return Collision(A, B, pos, Vector(nx, ny), radius - max_sep)
+
+@get_collision.dispatch(Circle, Poly)
+def get_collision_circle_poly(A, B):
+    '''Implementa a colisão entre um círculo e um polígono convexo'''
+
+    col = get_collision_poly_circle(B, A)
     if col is not None:
-        col.objects = (A, B)
-        return col
+        return col.swapped()
 
+@get_collision.dispatch(Poly, AABB)
+def get_collision_poly_aabb(A, B, previous=None):
+    '''Implementa a colisão entre um polígono arbitrário e uma caixa AABB'''
+
+    return _convex_collision(A, B, _poly_points(A), A.get_edge_normals(),
+                             _aabb_points(B), AABB_NORMALS, previous)
 
 @get_collision.dispatch(AABB, Poly)
-def get_collision_aabb_poly(A, B):
-    '''Implementa a colisão entre um polígono arbitrário e uma caixa AABB'''
+def get_collision_aabb_poly(A, B, previous=None):
+    '''Implementa a colisão entre uma caixa AABB e um polígono arbitrário'''
 
-    A_poly = Poly.rect(bbox=A.bbox, density=A.density)
-    col = get_collision_poly(A_poly, B)
-    if col is not None:
-        col.objects = (A, B)
-        return col
+    return _convex_collision(A, B, _aabb_points(A), AABB_NORMALS,
+                             _poly_points(B), B.get_edge_normals(), previous)
+
+# Funções que aceitam a colisão do frame anterior (ver Simulation)
+for func in [get_collision_poly, get_collision_poly_aabb,
+             get_collision_aabb_poly]:
+    func.uses_previous = True
+del func
 
 if __name__ == '__main__':
     R = Poly.rect(shape=(100, 100))
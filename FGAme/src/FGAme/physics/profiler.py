@@ -0,0 +1,160 @@
+#-*- coding: utf8 -*-
+'''
+Medição do tempo gasto em cada etapa da simulação.
+
+Um FrameProfiler registra, em cada frame, o tempo gasto em cada fase de
+Simulation.update() e alguns contadores (pares da fase larga, colisões
+detectadas pela fase fina, pontos de contato e iterações do solver). Os
+registros dos últimos frames ficam armazenados num buffer circular.
+
+>>> from FGAme.physics import Simulation
+>>> sim = Simulation()
+>>> profiler = sim.enable_profiler(size=60)
+>>> sim.step_n(10, 1 / 60.)                                # doctest: +ELLIPSIS
+0.16...
+>>> len(profiler)
+10
+>>> sim.disable_profiler()
+
+Quando o profiler está desativado (padrão), o único custo é uma verificação
+por frame. Os registros também são emitidos pelo sinal 'frame-stats' da
+simulação.
+'''
+
+from collections import deque
+
+try:
+    from time import perf_counter as _clock
+except ImportError:
+    from time import time as _clock
+
+#===============================================================================
+# Estatísticas de um frame
+#===============================================================================
+class FrameStats(object):
+    '''Registro das medidas de um frame.
+
+    Os tempos são medidos em segundos.
+
+    Attributes
+    ----------
+
+    frame
+        Número do frame desde que o profiler foi ativado.
+    time
+        Tempo de simulação no início do frame.
+    forces, pre_update, broad_phase, narrow_phase, solver, sleeping, post_update
+        Tempo gasto em cada fase da atualização. O tempo dos callbacks dos
+        sinais de colisão está incluído em narrow_phase.
+    total
+        Tempo total do frame.
+    pairs
+        Número de pares retornados pela fase larga.
+    collisions
+        Número de colisões detectadas pela fase fina.
+    contacts
+        Número de pontos de contato resolvidos pelo solver.
+    iterations
+        Número de iterações do solver (1 se as colisões forem resolvidas por
+        Collision.resolve()).
+    '''
+
+    __slots__ = ['frame', 'time', 'forces', 'pre_update', 'broad_phase',
+                 'narrow_phase', 'solver', 'sleeping', 'post_update', 'total',
+                 'pairs', 'collisions', 'contacts', 'iterations']
+
+    TIMES = ['forces', 'pre_update', 'broad_phase', 'narrow_phase', 'solver',
+             'sleeping', 'post_update', 'total']
+
+    def __init__(self, frame=0, time=0.0):
+        self.frame = frame
+        self.time = time
+        for name in self.TIMES:
+            setattr(self, name, 0.0)
+        self.pairs = self.collisions = self.contacts = self.iterations = 0
+
+    def __repr__(self):
+        return '<FrameStats %s: %.3f ms, %s pairs, %s collisions>' % (
+            self.frame, 1000 * self.total, self.pairs, self.collisions)
+
+    def as_dict(self):
+        '''Retorna um dicionário com todos os valores do registro'''
+
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+#===============================================================================
+# Profiler
+#===============================================================================
+class FrameProfiler(object):
+    '''Armazena os registros (FrameStats) dos últimos `size` frames.
+
+    Normalmente é criado por Simulation.enable_profiler(). A função `clock`
+    mede o tempo em segundos (o padrão é time.perf_counter).
+    '''
+
+    def __init__(self, size=120, clock=_clock):
+        self.frames = deque(maxlen=int(size))
+        self.clock = clock
+        self.current = None
+        self._count = 0
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __iter__(self):
+        return iter(self.frames)
+
+    @property
+    def size(self):
+        return self.frames.maxlen
+
+    @property
+    def last(self):
+        '''Registro do último frame completo (ou None)'''
+
+        return self.frames[-1] if self.frames else None
+
+    def begin_frame(self, time):
+        '''Inicia e retorna o registro de um novo frame'''
+
+        stats = self.current = FrameStats(self._count, time)
+        self._count += 1
+        return stats
+
+    def end_frame(self):
+        '''Armazena o registro do frame atual no buffer e o retorna'''
+
+        stats = self.current
+        self.frames.append(stats)
+        self.current = None
+        return stats
+
+    def clear(self):
+        '''Descarta todos os registros'''
+
+        self.frames.clear()
+
+    def summary(self):
+        '''Retorna um dicionário com a média de cada valor sobre os frames
+        armazenados.
+
+        >>> profiler = FrameProfiler()
+        >>> for pairs in [2, 4]:
+        ...     profiler.begin_frame(0.0).pairs = pairs
+        ...     stats = profiler.end_frame()
+        >>> profiler.summary()['pairs']
+        3.0
+        '''
+
+        N = len(self.frames)
+        names = FrameStats.TIMES + ['pairs', 'collisions', 'contacts',
+                                    'iterations']
+        if not N:
+            return dict((name, 0.0) for name in names)
+        return dict((name, sum(getattr(stats, name) for stats in self.frames)
+                     / float(N)) for name in names)
+
+if __name__ == '__main__':
+    from FGAme.physics import Simulation
+    import doctest
+    doctest.testmod()
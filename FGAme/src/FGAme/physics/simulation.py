@@ -1,8 +1,46 @@
 #-*- coding: utf8 -*-
+import random
+import zlib
+from operator import attrgetter
 from FGAme.math import *
 from FGAme.physics import get_collision, get_collision_aabb, CollisionError
+from FGAme.physics import get_broad_phase, XMIN_UID_KEY
+from FGAme.physics.state import StateArrays
+from FGAme.physics.ball import circle_collision, circle_collisions
+from FGAme.physics.ccd import swept_bbox, time_of_impact
+from FGAme.physics.solver import ContactSolver
+from FGAme.physics.snapshot import Snapshot, take_snapshot, restore_snapshot
+from FGAme.physics.profiler import FrameProfiler
 from FGAme.core import Listener, signal, init
 from FGAme.core import globalvars
+from FGAme.util import lazy
+
+def _is_resting(obj):
+    '''Retorna True se o objeto estiver dormindo ou se for um objeto 
+    cinemático parado'''
+
+    return obj.is_sleeping or not (obj._invmass or obj._invinertia or
+                                   obj._vel.x or obj._vel.y or obj._omega)
+
+def _pair_key(A, B):
+    '''Retorna a chave do par de objetos na tabela de contatos. A chave não 
+    depende da ordem dos objetos.'''
+
+    return (A, B) if A.uid < B.uid else (B, A)
+
+def _insert_sorted(objects, obj, key):
+    '''Insere obj na lista ordenada pela chave key, após os objetos com o 
+    mesmo valor da chave'''
+
+    value = key(obj)
+    lo, hi = 0, len(objects)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if value < key(objects[mid]):
+            hi = mid
+        else:
+            lo = mid + 1
+    objects.insert(lo, obj)
 
 #===============================================================================
 # Classe Mundo -- coordena todos os objetos com uma física definida e resolve a
@@ -15,12 +53,87 @@ class Simulation(Listener):
     objetos e update(dt) para atualizar o estado da simulação. Verifique a 
     documentação do método update() para uma descrição detalhada sobre como
     a física é resolvida em cada etapa de simulação. 
+    
+    O algoritmo utilizado na fase larga da detecção de colisões é escolhido
+    pelo argumento `broad_phase`. Os valores aceitos são 'sweep' (padrão),
+    'grid', 'sap' e 'bvh', ou uma instância de BroadPhase. Os argumentos adicionais 
+    são repassados ao construtor da fase larga.
+    
+    A fase larga 'sap' acompanha os pares entre frames e emite os sinais 
+    'pair-enter' e 'pair-leave' quando as AABBs de dois objetos começam ou 
+    deixam de se superpor. Os callbacks recebem os dois objetos como argumento.
+    
+    >>> sim = Simulation(broad_phase='grid', cell_size=50) # doctest: +SKIP
+    
+    Se `use_arrays` for verdadeiro, as posições, velocidades e acelerações de 
+    todos os objetos são armazenadas em arrays do NumPy (ver StateArrays) e a
+    integração das forças é feita de forma vetorizada. Esta opção requer o 
+    NumPy e é vantajosa em simulações com muitos objetos.
+    
+    Se `sleep_frames` for fornecido, os objetos que formam uma ilha de contatos
+    e permanecem com velocidade linear e angular abaixo de `stop_velocity` por
+    `sleep_frames` frames consecutivos são colocados para dormir (ver 
+    update_sleeping()). Objetos dormindo não são integrados e não participam
+    da detecção fina de colisões com outros objetos parados.
+    
+    Por padrão, cada colisão é resolvida uma única vez pelo método 
+    Collision.resolve(). Se `iterations` for fornecido, as colisões são 
+    resolvidas por um ContactSolver, que aplica impulsos sequenciais em todos
+    os pontos de contato pelo número de iterações especificado e reaproveita
+    os impulsos do frame anterior se `warm_start` for verdadeiro. Isto produz
+    pilhas de objetos estáveis sem precisar reduzir o passo de tempo.
+    
+    A simulação mantém uma tabela com os contatos entre pares de objetos de um
+    frame para o outro (ver a propriedade `contacts`). O sinal 'collision' é 
+    emitido pelos dois objetos em todos os frames em que estão em contato. Os
+    sinais 'collision-begin', 'collision-persist' e 'collision-end' são 
+    emitidos, respectivamente, no primeiro frame do contato, nos frames 
+    seguintes e no frame em que o contato termina. Os callbacks recebem a 
+    colisão como argumento (no caso de 'collision-end', a colisão do último
+    frame do contato).
+    
+    Se `deterministic` for verdadeiro, a simulação é reprodutível: dadas as
+    mesmas operações, duas simulações executadas em máquinas diferentes 
+    produzem exatamente o mesmo estado (lockstep). Os empates na ordenação dos
+    objetos são resolvidos pelo identificador `uid` de cada objeto, de modo que
+    a ordem dos pares, das colisões e dos pontos de contato no solver não 
+    depende do endereço dos objetos na memória nem da história da lista de
+    objetos. Ao final de cada frame, o hash do estado é armazenado em 
+    `last_hash` e emitido pelo sinal 'frame-hash' (ver state_hash()), o que 
+    permite verificar a sincronia entre os participantes.
+    
+    O atributo `random` é uma instância de random.Random iniciada com `seed` e
+    deve ser utilizada por todos os efeitos aleatórios aplicados à simulação 
+    (ex.: FGAme.extra.effects.explode()).
+    
+    Forças que atuam sobre grupos de objetos e são calculadas de uma só vez
+    (ex.: GravityPool) são registradas com add_pool(). Um grupo deve possuir
+    o atributo `objects` e o método compute_forces(t), que retorna as forças
+    sobre cada objeto na mesma ordem. Campos de força restritos a regiões do
+    espaço (ver ForceField) são registrados com add_field().
+    
+    O tempo gasto em cada fase da atualização pode ser medido ativando o 
+    profiler com enable_profiler() (ver FrameProfiler). O registro de cada 
+    frame é emitido pelo sinal 'frame-stats'.
     '''
 
     def __init__(self, gravity=None, damping=0, adamping=0,
-                 rest_coeff=1, sfriction=0, dfriction=0, stop_velocity=1e-6):
+                 rest_coeff=1, sfriction=0, dfriction=0, stop_velocity=1e-6,
+                 broad_phase='sweep', use_arrays=False, sleep_frames=None,
+                 iterations=None, warm_start=True, deterministic=False,
+                 seed=None, **kwds):
 
         self._objects = []
+        self._next_uid = 0
+        self._circle_types = {}
+        self._previous_types = {}
+        self._contacts = {}
+        self._pools = []
+        self._fields = []
+        self._bullets = []
+        self._bullet_starts = []
+        self.broad_phase = get_broad_phase(broad_phase, **kwds)
+        self._state = StateArrays() if use_arrays else None
 
         # Inicia a gravidade e as constantes de força dissipativa
         self.gravity = gravity or (0, 0)
@@ -32,16 +145,45 @@ class Simulation(Listener):
         self.sfriction = float(sfriction)
         self.dfriction = float(dfriction)
         self.stop_velocity = float(stop_velocity)
+        self.sleep_frames = sleep_frames
+        self._forced = set()
+        if iterations:
+            self.solver = ContactSolver(iterations, warm_start=warm_start)
+        else:
+            self.solver = None
         self.time = 0
 
+        # Modo determinístico
+        self.deterministic = bool(deterministic)
+        self.random = random.Random(seed)
+        self.last_hash = None
+        self._hash_snapshot = None
+        if self.deterministic:
+            self.broad_phase.sort_key = XMIN_UID_KEY
+
+        # Medição de tempo (ver enable_profiler())
+        self.profiler = None
+
         # Controle de callbacks
-        init()
-        self.input = globalvars.input_object
         super(Simulation, self).__init__()
 
+    @lazy
+    def input(self):
+        '''Objeto de entrada do backend. O backend só é inicializado quando os
+        eventos de entrada são utilizados pela primeira vez.'''
+
+        init()
+        return globalvars.input_object
+
     #===========================================================================
     # Propriedades
     #===========================================================================
+    @property
+    def contacts(self):
+        '''Lista com as colisões entre os pares de objetos atualmente em 
+        contato'''
+
+        return list(self._contacts.values())
     
     #
     # Vetor com a aceleração da gravidade (em px/s^2)
@@ -61,6 +203,9 @@ class Simulation(Listener):
             if not obj.owns_gravity:
                 obj._gravity = gravity
 
+        if self._state is not None:
+            self._state.invalidate()
+
     #
     # Constante de amortecimento para a aceleração linear
     #
@@ -76,6 +221,9 @@ class Simulation(Listener):
             if not obj.owns_damping:
                 obj._damping = value
 
+        if self._state is not None:
+            self._state.invalidate()
+
     #
     # Constante de amortecimento para a aceleração angular
     #
@@ -91,6 +239,9 @@ class Simulation(Listener):
             if not obj.owns_adamping:
                 obj._adamping = value
 
+        if self._state is not None:
+            self._state.invalidate()
+
     #===========================================================================
     # Gerenciamento de objetos
     #===========================================================================
@@ -103,11 +254,20 @@ class Simulation(Listener):
         >>> obj = AABB((-10, 10, -10, 10))
         >>> world = World()
         >>> world.add(obj, layer=1)
+        
+        Objetos sem um identificador recebem o próximo valor de `uid` na ordem
+        em que são adicionados. O identificador de um objeto é preservado se ele
+        for removido e adicionado novamente.
         '''
         
         if obj not in self._objects:
-            self._objects.append(obj)
-            self._objects.sort()
+            if obj.uid is None:
+                obj.uid = self._next_uid
+                self._next_uid += 1
+            else:
+                self._next_uid = max(self._next_uid, obj.uid + 1)
+            _insert_sorted(self._objects, obj, self.broad_phase.sort_key)
+            self.broad_phase.add(obj)
             obj.is_alive = True
             if not obj.owns_gravity:
                 obj._gravity = self.gravity
@@ -115,14 +275,85 @@ class Simulation(Listener):
                 obj._damping = self.damping
             if not obj.owns_adamping:
                 obj._adamping = self.adamping
+            if self._state is not None:
+                self._state.add(obj)
+            obj._simulation = self
+            if obj.bullet:
+                self._update_bullet(obj)
 
     def remove(self, obj):
         '''Descarta um objeto da simulação'''
 
         try:
             del self._objects[self._objects.index(obj)]
-        except IndexError:
+        except ValueError:
             pass
+        else:
+            self.broad_phase.remove(obj)
+            if self._state is not None:
+                self._state.remove(obj)
+            if obj._simulation is self:
+                obj._simulation = None
+            if obj in self._bullets:
+                self._bullets.remove(obj)
+
+            # Remove o objeto dos grupos de forças (ex.: GravityPool)
+            for pool in self._pools:
+                if obj in pool.objects:
+                    pool.remove(obj)
+
+            # Encerra os contatos com o objeto removido
+            for key in [key for key in self._contacts if obj in key]:
+                col = self._contacts.pop(key)
+                col.previous = None
+                A, B = col.objects
+                A.trigger('collision-end', col)
+                B.trigger('collision-end', col)
+
+    def _update_bullet(self, obj):
+        '''Atualiza a lista de objetos com CCD após uma mudança em
+        obj.bullet. A lista é ordenada por uid para que a ordem em que os
+        objetos são processados seja determinística.'''
+
+        if obj.bullet:
+            if obj not in self._bullets:
+                _insert_sorted(self._bullets, obj, attrgetter('uid'))
+        elif obj in self._bullets:
+            self._bullets.remove(obj)
+
+    def _update_static(self, obj):
+        '''Repassa para a fase larga uma mudança no estado estático/dinâmico
+        ou na posição de um objeto que não é dinâmico (ver
+        BroadPhase.refresh())'''
+
+        self.broad_phase.refresh(obj)
+
+    def add_pool(self, pool):
+        '''Registra um grupo de forças (ex.: GravityPool). As forças do grupo
+        são calculadas uma vez por frame e somadas às forças externas dos
+        objetos em resolve_forces(). Os objetos descartados com remove()
+        também são removidos dos grupos registrados.'''
+
+        if pool not in self._pools:
+            self._pools.append(pool)
+
+    def remove_pool(self, pool):
+        '''Remove um grupo de forças registrado com add_pool()'''
+
+        self._pools.remove(pool)
+
+    def add_field(self, field):
+        '''Registra um campo de força (ver ForceField). Em cada frame, o campo
+        é aplicado aos objetos dinâmicos dentro da sua região, que acordam
+        caso estejam dormindo.'''
+
+        if field not in self._fields:
+            self._fields.append(field)
+
+    def remove_field(self, field):
+        '''Remove um campo de força registrado com add_field()'''
+
+        self._fields.remove(field)
 
     #===========================================================================
     # Controle de eventos
@@ -136,8 +367,15 @@ class Simulation(Listener):
     
     # Eventos privados
     frame_enter = signal('frame-enter')
+    frame_hash = signal('frame-hash', num_args=1)
+    frame_stats = signal('frame-stats', num_args=1)
     collision = signal('collision', num_args=1)
+    collision_begin = signal('collision-begin', num_args=1)
+    collision_persist = signal('collision-persist', num_args=1)
+    collision_end = signal('collision-end', num_args=1)
     collision_pair = signal('collision-pair', 'obj1', 'obj2', num_args=1)
+    pair_enter = signal('pair-enter', num_args=2)
+    pair_leave = signal('pair-leave', num_args=2)
 
     #===========================================================================
     # Simulação de Física
@@ -145,13 +383,94 @@ class Simulation(Listener):
     def update(self, dt):
         '''Rotina principal da simulação de física.'''
 
+        if self.profiler is not None:
+            return self._profiled_update(dt)
+
+        self.trigger('frame-enter')
+        self.resolve_forces(dt)
+        self.pre_update(dt)
+        collisions = self.detect_collisions(dt)
+        self.resolve_collisions(collisions, dt)
+        if self.sleep_frames:
+            self.update_sleeping(collisions)
+        self.post_update(dt)
+        return self._end_frame(dt)
+
+    def _profiled_update(self, dt):
+        '''Executa as mesmas etapas de update() medindo o tempo de cada uma'''
+
+        profiler = self.profiler
+        clock = profiler.clock
+        stats = profiler.begin_frame(self.time)
+
+        t0 = clock()
         self.trigger('frame-enter')
         self.resolve_forces(dt)
+        t1 = clock()
         self.pre_update(dt)
+        t2 = clock()
         collisions = self.detect_collisions(dt)
+        t3 = clock()
         self.resolve_collisions(collisions, dt)
+        t4 = clock()
+        if self.sleep_frames:
+            self.update_sleeping(collisions)
+        t5 = clock()
         self.post_update(dt)
+        t6 = clock()
+
+        # O tempo da fase larga é medido por detect_collisions()
+        stats.forces = t1 - t0
+        stats.pre_update = t2 - t1
+        stats.narrow_phase = t3 - t2 - stats.broad_phase
+        stats.solver = t4 - t3
+        stats.sleeping = t5 - t4
+        stats.post_update = t6 - t5
+        stats.total = t6 - t0
+        stats.collisions = len(collisions)
+        if self.solver is not None:
+            stats.contacts = self.solver.num_contacts
+            stats.iterations = self.solver.iterations
+        else:
+            stats.contacts = sum(len(col.points) for col in collisions)
+            stats.iterations = 1
+
+        time = self._end_frame(dt)
+        self.trigger('frame-stats', profiler.end_frame())
+        return time
+
+    def _end_frame(self, dt):
+        '''Avança o relógio da simulação e calcula o hash do estado no modo
+        determinístico'''
+
         self.time += dt
+        if self.deterministic:
+            self.last_hash = self.state_hash()
+            self.trigger('frame-hash', self.last_hash)
+        return self.time
+
+    def enable_profiler(self, size=120):
+        '''Ativa a medição do tempo gasto em cada fase da simulação e retorna
+        o FrameProfiler que armazena os registros dos últimos `size` frames'''
+
+        self.profiler = FrameProfiler(size)
+        return self.profiler
+
+    def disable_profiler(self):
+        '''Desativa a medição de tempo iniciada por enable_profiler()'''
+
+        self.profiler = None
+
+    def step_n(self, n, dt):
+        '''Executa n passos de simulação com intervalo dt e retorna o tempo 
+        final da simulação.
+        
+        Não depende do backend nem do laço principal: a simulação avança tão
+        rápido quanto possível.'''
+
+        update = self.update
+        for _ in range(int(n)):
+            update(dt)
         return self.time
 
     def pre_update(self, dt):
@@ -187,81 +506,314 @@ class Simulation(Listener):
         Uma colisão é caracterizada por um objeto da classe Collision() ou 
         subclasse.'''
 
-        objects = self._objects
-        objects.sort()
         collisions = []
-        objects.sort()
-
-        # Os objetos estão ordenados. Este loop detecta as colisões AABB e,
-        # caso elas aconteçam, delega a tarefa de detecção fina de colisão para
-        # a função get_collision
-        for i, A in enumerate(objects):
-            xmax = A.xmax
-            for j in range(i + 1, len(objects)):
-                B = objects[j]
-
-                # Procura na lista enquanto xmin de B for menor que xmax de A
-                if B.xmin > xmax:
-                    break
-
-                # Não detecta colisão entre dois objetos estáticos/cinemáticos
-                if A._invmass == A._invinertia == B._invmass == B._invinertia == 0:
-                    continue
-
-                # Somente testa as colisões positivas por AABB
-                if shadow_y(A, B) < 0:
-                    continue
-
-                # Detecta colisões e atualiza as listas internas de colisões de
-                # cada objeto
+        contacts = {}
+        previous_contacts = self._contacts
+        broad_phase = self.broad_phase
+        profiler = self.profiler
+        stats = profiler.current if profiler is not None else None
+        if self._bullet_starts:
+            self.sweep_bullets()
+        if stats is None:
+            pairs = broad_phase.get_pairs(self._objects)
+        else:
+            t0 = profiler.clock()
+            pairs = broad_phase.get_pairs(self._objects)
+            stats.broad_phase = profiler.clock() - t0
+            stats.pairs = len(pairs)
+        if broad_phase.has_events:
+            for A, B in broad_phase.left:
+                self.trigger('pair-leave', A, B)
+            for A, B in broad_phase.entered:
+                self.trigger('pair-enter', A, B)
+
+        # Descarta os pares formados apenas por objetos dormindo ou parados. Os
+        # contatos entre eles permanecem na tabela sem emitir sinais
+        if self.sleep_frames:
+            active = []
+            for A, B in pairs:
+                if _is_resting(A) and _is_resting(B):
+                    key = _pair_key(A, B)
+                    if key in previous_contacts:
+                        contacts[key] = previous_contacts[key]
+                else:
+                    active.append((A, B))
+            pairs = active
+
+        # Os pares de círculos são testados de uma só vez
+        is_circle = [self._is_circle_pair(A, B) for A, B in pairs]
+        circles = iter(circle_collisions(
+            [pair for pair, flag in zip(pairs, is_circle) if flag]))
+
+        # A fase larga seleciona os pares com superposição das AABBs e a função
+        # get_collision realiza a detecção fina de colisão. As funções que 
+        # aceitam o argumento `previous` recebem a colisão do frame anterior
+        for (A, B), flag in zip(pairs, is_circle):
+            key = _pair_key(A, B)
+            previous = previous_contacts.get(key)
+            if flag:
+                col = next(circles)
+            elif previous is not None and self._uses_previous(A, B):
+                col = get_collision(A, B, previous=previous)
+            else:
                 col = self.get_collision(A, B)
-                if col is not None:
-                    col.world = self
-                    collisions.append(col)
-                    A.trigger('collision', col)
-                    B.trigger('collision', col)
+            if col is not None:
+                if A.is_sleeping:
+                    A.wake()
+                if B.is_sleeping:
+                    B.wake()
+                col.world = self
+                collisions.append(col)
+                contacts[key] = col
+                A.trigger('collision', col)
+                B.trigger('collision', col)
+                if previous is None:
+                    A.trigger('collision-begin', col)
+                    B.trigger('collision-begin', col)
+                else:
+                    col.previous = previous
+                    previous.previous = None
+                    A.trigger('collision-persist', col)
+                    B.trigger('collision-persist', col)
+
+        # Contatos que terminaram neste frame
+        for key, col in previous_contacts.items():
+            if key not in contacts:
+                col.previous = None
+                A, B = col.objects
+                A.trigger('collision-end', col)
+                B.trigger('collision-end', col)
+        self._contacts = contacts
         return collisions
 
     def resolve_collisions(self, collisions, dt):
         '''Resolve todas as colisões na lista collisions'''
 
-        for col in collisions:
-            col.resolve(dt)
+        if self.solver is not None:
+            self.solver.solve(collisions, dt)
+        else:
+            for col in collisions:
+                col.resolve(dt)
 
     def resolve_forces(self, dt):
         '''Resolve a dinâmica de forças durante o intervalo dt'''
 
         t = self.time
+        batches = self._batch_forces(t)
+        if self.sleep_frames:
+            self._wake_forced(batches)
+
+        # Guarda as posições iniciais dos objetos com CCD
+        if self._bullets:
+            self._bullet_starts = [(obj, obj._pos.x, obj._pos.y)
+                                   for obj in self._bullets
+                                   if not obj.is_sleeping]
+
+        # Integração vetorizada
+        if self._state is not None:
+            self._state.integrate(t, dt, batches)
+            return
 
         # Acumula as forças e acelerações
-        for obj in self._objects:
+        objects = [obj for obj in self._objects if not obj.is_sleeping]
+        for obj in objects:
             if obj._invmass:
                 F = obj._init_frame_force()
                 F += obj.external_force(t) or (0, 0)
             elif obj.accel_static:
-                a = obj._init_frame_accell()
-                obj.apply_accel(a)
+                obj._init_frame_accel()
 
             if obj._invinertia:
                 tau = obj.global_torque()
                 tau += obj.external_torque(t) or 0
-                self._frame_tau = tau
+                obj._frame_tau = tau
             elif obj.accel_static:
-                a = obj._init_frame_alpha()
-                obj.apply_alpha(a)
+                obj._init_frame_alpha()
+
+        # Soma as forças dos grupos e campos
+        for group, forces in batches:
+            for obj, (Fx, Fy) in zip(group, forces):
+                if obj._invmass and not obj.is_sleeping:
+                    obj._frame_force.iadd_xy(Fx, Fy)
 
         # Applica as forças e acelerações
-        for obj in self._objects:
+        for obj in objects:
             if obj._invmass:
                 obj.apply_force(obj._frame_force, dt)
+            elif obj.accel_static:
+                obj.apply_accel(obj._frame_accel, dt)
             elif obj._vel.x or obj._vel.y:
                 obj.move(obj._vel * dt)
 
             if obj._invinertia:
                 obj.apply_torque(obj._frame_tau, dt)
+            elif obj.accel_static:
+                obj.apply_alpha(obj._frame_alpha, dt)
             elif obj._omega:
                 obj.rotate(obj._omega * dt)
 
+    def _batch_forces(self, t):
+        '''Retorna uma lista de pares (objetos, forças) com as forças
+        calculadas por todos os grupos e campos de força no instante t'''
+
+        batches = [(pool.objects, pool.compute_forces(t))
+                   for pool in self._pools]
+        if not self._fields:
+            return batches
+
+        # Consulta as regiões de todos os campos de uma só vez para que a fase
+        # larga seja atualizada somente uma vez por frame
+        bboxes = [field.bbox for field in self._fields]
+        regions = [bbox for bbox in bboxes if bbox is not None]
+        if regions:
+            found = iter(self.broad_phase.query_many(regions, self._objects))
+        for field, bbox in zip(self._fields, bboxes):
+            if bbox is None:
+                objects = self._objects
+            else:
+                objects = next(found)
+            objects = [obj for obj in objects if obj._invmass]
+            if objects:
+                batches.append(field.compute_forces(t, objects))
+        return batches
+
+    def _wake_forced(self, batches):
+        '''Acorda os objetos dormindo que recebem forças não nulas dos grupos
+        e campos de força em `batches`. Estes objetos são guardados em
+        self._forced e não dormem neste frame (ver update_sleeping())'''
+
+        forced = self._forced
+        forced.clear()
+        for group, forces in batches:
+            for obj, (Fx, Fy) in zip(group, forces):
+                if Fx or Fy:
+                    forced.add(obj)
+        for obj in forced:
+            if obj.is_sleeping:
+                obj.wake()
+
+    def sweep_bullets(self):
+        '''Recua os objetos com CCD (obj.bullet = True) que atravessariam
+        outros objetos durante o último frame até a posição do primeiro
+        contato, que é então detectado e resolvido normalmente.
+
+        O restante do deslocamento destes objetos no frame é descartado.'''
+
+        starts, self._bullet_starts = self._bullet_starts, []
+        can_collide = self.broad_phase.can_collide
+        get_collision = self.get_collision
+
+        # Deslocamentos menores que metade da caixa de contorno não permitem
+        # que o objeto atravesse nada sem ser detectado
+        bullets = []
+        for obj, x0, y0 in starts:
+            dx = obj._pos.x - x0
+            dy = obj._pos.y - y0
+            if (2 * abs(dx) >= obj._xmax - obj._xmin or
+                    2 * abs(dy) >= obj._ymax - obj._ymin):
+                bullets.append((obj, (dx, dy)))
+        if not bullets:
+            return
+
+        # Os candidatos são consultados nas posições do final do frame
+        bboxes = [swept_bbox(obj, delta) for obj, delta in bullets]
+        candidates = self.broad_phase.query_many(bboxes, self._objects)
+        for (obj, delta), others in zip(bullets, candidates):
+            toi = 1.0
+            for other in others:
+                if other is obj or not can_collide(obj, other):
+                    continue
+                s = time_of_impact(obj, other, delta, get_collision, toi)
+                if s is not None and s < toi:
+                    toi = s
+            if toi < 1.0:
+                dx, dy = delta
+                obj.move(((toi - 1) * dx, (toi - 1) * dy))
+
+    def _is_circle_pair(self, A, B):
+        '''Retorna True se a colisão entre A e B for calculada pela função 
+        circle_collision()'''
+
+        types = type(A), type(B)
+        try:
+            return self._circle_types[types]
+        except KeyError:
+            func = get_collision.get_function(*types)
+            value = self._circle_types[types] = func is circle_collision
+            return value
+
+    def _uses_previous(self, A, B):
+        '''Retorna True se a função de colisão entre A e B aceita a colisão do
+        frame anterior no argumento `previous`'''
+
+        types = type(A), type(B)
+        try:
+            return self._previous_types[types]
+        except KeyError:
+            func = get_collision.get_function(*types)
+            value = getattr(func, 'uses_previous', False)
+            self._previous_types[types] = value
+            return value
+
+    def update_sleeping(self, collisions):
+        '''Atualiza o estado de sono dos objetos a partir das colisões do frame.
+        
+        Os objetos dinâmicos que colidem entre si formam ilhas de contato 
+        (calculadas por union-find). Uma ilha é colocada para dormir quando 
+        todos os seus objetos permanecem com velocidade abaixo de 
+        stop_velocity por sleep_frames frames consecutivos. Objetos em contato
+        com objetos cinemáticos em movimento, que possuem forças externas ou
+        que recebem forças dos grupos de forças nunca dormem.'''
+
+        parent = {}
+
+        def find(obj):
+            root = parent.get(obj, obj)
+            while root is not obj:
+                grandparent = parent.get(root, root)
+                parent[obj] = grandparent
+                obj, root = root, grandparent
+            return root
+
+        # Junta as ilhas e marca os objetos perturbados por objetos cinemáticos
+        disturbed = set()
+        for col in collisions:
+            A, B = col.objects
+            A_dynamic = A._invmass or A._invinertia
+            B_dynamic = B._invmass or B._invinertia
+            if A_dynamic and B_dynamic:
+                root_A, root_B = find(A), find(B)
+                if root_A is not root_B:
+                    parent[root_A] = root_B
+            elif A_dynamic and not _is_resting(B):
+                disturbed.add(A)
+            elif B_dynamic and not _is_resting(A):
+                disturbed.add(B)
+
+        # Atualiza o contador de frames parados de cada objeto
+        limit = self.stop_velocity
+        forced = self._forced
+        islands = {}
+        for obj in self._objects:
+            if obj.is_sleeping or not (obj._invmass or obj._invinertia):
+                continue
+            x, y = obj._vel
+            if (x * x + y * y > limit * limit or abs(obj._omega) > limit or
+                    obj in disturbed or obj in forced or
+                    obj.has_external_forces()):
+                obj._still_frames = 0
+            else:
+                obj._still_frames += 1
+            islands.setdefault(find(obj), []).append(obj)
+
+        # Adormece as ilhas paradas
+        frames = self.sleep_frames
+        for island in islands.values():
+            if all(obj._still_frames >= frames for obj in island):
+                for obj in island:
+                    obj.sleep()
+                    obj._island = island
+
     def get_collision(self, A, B):
         '''Retorna a colisão entre os objetos A e B depois que a colisão AABB
         foi detectada'''
@@ -295,13 +847,54 @@ class Simulation(Listener):
             get_collision[type(A), type(B)] = inverse
             return col
 
+    #===========================================================================
+    # Snapshots
+    #===========================================================================
+    def snapshot(self, out=None):
+        '''Retorna um Snapshot com o estado de todos os objetos da simulação.
+        
+        Se `out` for um snapshot anterior dos mesmos objetos, o seu buffer é
+        reaproveitado. Isto evita alocações quando os snapshots são 
+        armazenados num buffer circular (por exemplo, para rollback).'''
+
+        return take_snapshot(self, out)
+
+    def restore(self, snapshot):
+        '''Restaura o estado da simulação salvo por snapshot()'''
+
+        restore_snapshot(self, snapshot)
+
+    def state_hash(self):
+        '''Retorna um inteiro de 32 bits calculado a partir do estado de todos
+        os objetos.
+        
+        O hash é calculado sobre os bytes de um snapshot com os objetos 
+        ordenados por uid e, portanto, muda com qualquer diferença no último
+        bit das posições, velocidades, vértices, etc. Dois participantes de uma
+        simulação em lockstep podem trocar apenas este valor para verificar que
+        continuam sincronizados.'''
+
+        # O snapshot é reaproveitado enquanto os objetos não mudarem
+        out = self._hash_snapshot
+        if out is None or take_snapshot(self, out) is not out:
+            out = Snapshot(sorted(self._objects, key=attrgetter('uid')))
+            out = self._hash_snapshot = take_snapshot(self, out)
+        return zlib.crc32(out.to_bytes()) & 0xffffffff
+
     #===========================================================================
     # Cálculo de parâmetros físicos
     #===========================================================================
     def kinetic_energy(self):
-        '''Retorna a soma da energia cinética de todos os objetos do mundo'''
+        '''Retorna a soma da energia cinética de todos os objetos do mundo. 
+        Objetos cinemáticos não são considerados.'''
         
-        return sum(obj.kinetic() for obj in self.objects)
+        energy = 0.0
+        for obj in self._objects:
+            if obj._invmass:
+                energy += obj.linearE
+            if obj._invinertia:
+                energy += obj.angularE
+        return energy
 
 if __name__ == '__main__':
     import doctest
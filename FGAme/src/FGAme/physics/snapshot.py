@@ -0,0 +1,245 @@
+#-*- coding: utf8 -*-
+'''
+Cópias do estado de uma simulação armazenadas em buffers compactos.
+
+Um Snapshot guarda o estado dinâmico de todos os objetos de uma Simulation num
+único array de doubles (array.array('d')). Criar e restaurar um snapshot não
+envolve o pickle dos objetos: apenas os números que definem o estado são
+copiados. Isto torna possível salvar o estado em todos os frames e voltar
+alguns frames no tempo (rollback), gravar replays ou criar checkpoints de
+simulações longas.
+
+O buffer começa com o tempo da simulação, seguido por um registro de tamanho
+fixo (STRIDE) para cada objeto, na ordem de snapshot.objects:
+
+    x, y, vx, vy, ax, ay, theta, omega, mass, inertia,
+    xmin, xmax, ymin, ymax, is_sleeping, still_frames, island
+
+onde island é o índice do primeiro objeto da ilha de contatos de um objeto
+dormindo (ou -1). Em seguida vêm as coordenadas dos vértices dos polígonos.
+Os vértices e a AABB também são armazenados para que a restauração seja
+exata, já que estes valores acumulam os erros de arredondamento de todos os
+deslocamentos e rotações anteriores.
+
+A tabela de contatos da simulação (utilizada pelo warm starting do solver e
+pelos sinais de colisão) também é armazenada, mas como uma cópia rasa do
+dicionário de colisões.
+'''
+
+from array import array
+from FGAme.physics.poly import Poly
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+STRIDE = 17
+
+#===============================================================================
+# Snapshot
+#===============================================================================
+class Snapshot(object):
+    '''Estado de uma simulação armazenado num array de doubles.
+
+    Normalmente é criado por Simulation.snapshot() e restaurado por
+    Simulation.restore().
+
+    Parameters
+    ----------
+
+    objects
+        Lista de objetos cujo estado está armazenado no snapshot.
+    data
+        Qualquer objeto que suporte o protocolo de buffer com os valores
+        armazenados (por exemplo, o resultado de to_bytes()).
+    '''
+
+    def __init__(self, objects, data=None, contacts=None):
+        self.objects = tuple(objects)
+        self.data = array('d')
+        if data is not None:
+            data = bytes(memoryview(data))
+            try:
+                self.data.frombytes(data)
+            except AttributeError:
+                self.data.fromstring(data)
+        self.contacts = dict(contacts or {})
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __eq__(self, other):
+        if not isinstance(other, Snapshot):
+            return NotImplemented
+        return self.objects == other.objects and self.data == other.data
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    @property
+    def time(self):
+        return self.data[0]
+
+    #===========================================================================
+    # Acesso aos dados
+    #===========================================================================
+    def view(self):
+        '''Retorna uma memoryview do buffer, sem realizar cópias'''
+
+        return memoryview(self.data)
+
+    def to_bytes(self):
+        '''Retorna o conteúdo do buffer como uma string de bytes'''
+
+        try:
+            return self.data.tobytes()
+        except AttributeError:
+            return self.data.tostring()
+
+    def as_array(self):
+        '''Retorna um array do NumPy de forma (N, STRIDE) com os registros de
+        cada objeto. O array compartilha a memória com o snapshot.'''
+
+        if np is None:
+            raise RuntimeError('numpy is required for as_array()')
+        N = len(self.objects)
+        data = np.frombuffer(self.data, dtype=float)
+        return data[1:1 + N * STRIDE].reshape((N, STRIDE))
+
+    def copy(self):
+        '''Retorna uma cópia do snapshot'''
+
+        new = Snapshot(self.objects, contacts=self.contacts)
+        new.data = array('d', self.data)
+        return new
+
+    #===========================================================================
+    # Diferenças entre snapshots
+    #===========================================================================
+    def diff(self, other):
+        '''Retorna uma lista de pares (posição, valor) com os valores deste
+        snapshot que diferem dos valores de other.
+
+        O resultado pode ser aplicado a other com other.patched(diff) para
+        reconstruir este snapshot. Os dois snapshots devem possuir os mesmos
+        objetos.'''
+
+        if self.objects != other.objects:
+            raise ValueError('snapshots refer to different objects')
+        return [(i, x) for (i, (x, y)) in enumerate(zip(self.data, other.data))
+                if x != y]
+
+    def patched(self, diff):
+        '''Retorna um novo snapshot com as modificações de diff aplicadas'''
+
+        new = self.copy()
+        data = new.data
+        for i, x in diff:
+            data[i] = x
+        return new
+
+#===============================================================================
+# Criação e restauração
+#===============================================================================
+def take_snapshot(simulation, out=None):
+    '''Armazena o estado da simulação num Snapshot.
+
+    Se `out` for um snapshot dos mesmos objetos, reaproveita o seu buffer ao
+    invés de criar um novo snapshot. Os objetos são armazenados na ordem de
+    out.objects.'''
+
+    objects = simulation._objects
+    if out is not None:
+        if (len(out.objects) == len(objects) and
+                {id(obj) for obj in out.objects} ==
+                {id(obj) for obj in objects}):
+            objects = out.objects
+        else:
+            out = None
+    index = {obj: i for (i, obj) in enumerate(objects)}
+    values = [simulation.time]
+    extend = values.extend
+    for obj in objects:
+        island = obj._island
+        x, y = obj._pos
+        vx, vy = obj._vel
+        ax, ay = obj._accel
+        extend((x, y, vx, vy, ax, ay, obj._theta, obj._omega,
+                obj._mass, obj.inertia,
+                obj._xmin, obj._xmax, obj._ymin, obj._ymax,
+                obj.is_sleeping, obj._still_frames,
+                index.get(island[0], -1) if island else -1))
+    for obj in objects:
+        if isinstance(obj, Poly):
+            for v in obj.vertices:
+                extend(v)
+
+    if out is not None:
+        out.data[:] = array('d', values)
+        out.contacts = dict(simulation._contacts)
+        return out
+
+    snapshot = Snapshot(objects, contacts=simulation._contacts)
+    snapshot.data = array('d', values)
+    return snapshot
+
+def restore_snapshot(simulation, snapshot):
+    '''Restaura o estado da simulação a partir do snapshot.
+
+    Objetos adicionados depois da criação do snapshot são removidos da
+    simulação e objetos removidos são adicionados novamente.'''
+
+    objects = snapshot.objects
+    current = {id(obj) for obj in simulation._objects}
+    expected = {id(obj) for obj in objects}
+    if current != expected:
+        for obj in list(simulation._objects):
+            if id(obj) not in expected:
+                simulation.remove(obj)
+        for obj in objects:
+            if id(obj) not in current:
+                simulation.add(obj)
+    simulation._objects[:] = objects
+
+    data = snapshot.data
+    simulation.time = data[0]
+    islands = {}
+    pos = 1
+    for obj in objects:
+        (x, y, vx, vy, ax, ay, theta, omega, mass, inertia,
+         xmin, xmax, ymin, ymax, sleeping, still, island) = \
+            data[pos:pos + STRIDE]
+        pos += STRIDE
+
+        obj._pos.copy_from((x, y))
+        obj._vel.copy_from((vx, vy))
+        obj._accel.copy_from((ax, ay))
+        obj._theta = theta
+        obj._omega = omega
+        obj._xmin, obj._xmax, obj._ymin, obj._ymax = xmin, xmax, ymin, ymax
+        if obj._mass != mass:
+            obj.mass = mass
+        if obj.inertia != inertia:
+            obj.inertia = inertia
+        obj.is_sleeping = bool(sleeping)
+        obj._still_frames = int(still)
+        obj._island = None
+        if island >= 0:
+            islands.setdefault(int(island), []).append(obj)
+
+    for island in islands.values():
+        for obj in island:
+            obj._island = island
+
+    for obj in objects:
+        if isinstance(obj, Poly):
+            for v in obj.vertices:
+                v.copy_from(data[pos:pos + 2])
+                pos += 2
+
+    simulation._contacts = dict(snapshot.contacts)
+    if simulation._state is not None:
+        simulation._state.invalidate()
@@ -0,0 +1,227 @@
+#-*- coding: utf8 -*-
+'''
+Resolução de colisões pelo método de impulsos sequenciais.
+
+O método padrão de resolução de colisões aplica um único impulso em cada
+colisão, na ordem em que foram detectadas, e corrige a superposição movendo
+os objetos diretamente. Pilhas de objetos tendem a tremer e afundar, pois a
+resolução de uma colisão desfaz parcialmente o resultado das anteriores.
+
+O ContactSolver itera sobre todos os pontos de contato várias vezes. Os
+impulsos normais e de atrito acumulados em cada ponto são limitados (o
+impulso normal total nunca é atrativo e o atrito total respeita o cone de
+Coulomb), o que permite que as iterações convirjam para a solução do sistema
+de contatos. A superposição é corrigida por um termo de velocidade adicional
+(estabilização de Baumgarte) e os impulsos do frame anterior são reaplicados
+no início de cada frame ("warm starting"), acelerando a convergência em
+contatos persistentes.
+'''
+
+#===============================================================================
+# Pontos de contato
+#===============================================================================
+class _Contact(object):
+    '''Armazena as grandezas de um ponto de contato utilizadas pelo solver'''
+
+    __slots__ = ['vA', 'vB', 'invmass_A', 'invmass_B', 'invinertia_A',
+                 'invinertia_B', 'rAx', 'rAy', 'rBx', 'rBy', 'nx', 'ny',
+                 'mass_n', 'mass_t', 'bias', 'mu', 'Pn', 'Pt']
+
+    def apply(self, Px, Py):
+        '''Aplica o impulso (Px, Py) em B e o impulso oposto em A'''
+
+        vA, vB = self.vA, self.vB
+        im, ii = self.invmass_A, self.invinertia_A
+        vA[0] -= im * Px
+        vA[1] -= im * Py
+        vA[2] -= ii * (self.rAx * Py - self.rAy * Px)
+        im, ii = self.invmass_B, self.invinertia_B
+        vB[0] += im * Px
+        vB[1] += im * Py
+        vB[2] += ii * (self.rBx * Py - self.rBy * Px)
+
+    def relative_vel(self):
+        '''Retorna a velocidade de B relativa a A no ponto de contato'''
+
+        vA, vB = self.vA, self.vB
+        dvx = vB[0] - vB[2] * self.rBy - vA[0] + vA[2] * self.rAy
+        dvy = vB[1] + vB[2] * self.rBx - vA[1] - vA[2] * self.rAx
+        return dvx, dvy
+
+    def solve(self):
+        '''Realiza uma iteração do solver neste ponto de contato'''
+
+        nx, ny = self.nx, self.ny
+
+        # Impulso normal
+        dvx, dvy = self.relative_vel()
+        dPn = self.mass_n * (self.bias - dvx * nx - dvy * ny)
+        Pn = self.Pn
+        self.Pn = max(Pn + dPn, 0.0)
+        dPn = self.Pn - Pn
+        self.apply(dPn * nx, dPn * ny)
+
+        # Atrito
+        if self.mu:
+            dvx, dvy = self.relative_vel()
+            dPt = self.mass_t * (dvx * ny - dvy * nx)
+            Pt = self.Pt
+            max_Pt = self.mu * self.Pn
+            self.Pt = min(max(Pt + dPt, -max_Pt), max_Pt)
+            dPt = self.Pt - Pt
+            self.apply(-dPt * ny, dPt * nx)
+
+#===============================================================================
+# Solver
+#===============================================================================
+class ContactSolver(object):
+    '''Resolve uma lista de colisões pelo método de impulsos sequenciais.
+
+    Parameters
+    ----------
+
+    iterations
+        Número de iterações sobre todos os pontos de contato em cada frame.
+    warm_start
+        Se verdadeiro, inicia cada frame com os impulsos acumulados no frame
+        anterior nos pontos de contato próximos. Os impulsos são lidos de 
+        col.previous, a colisão entre os mesmos objetos no frame anterior 
+        (preenchida pela Simulation a partir da sua tabela de contatos).
+    baumgarte
+        Fração da superposição corrigida em cada frame.
+    slop
+        Superposição tolerada (em px) que não é corrigida. Evita que objetos
+        em repouso percam e recuperem o contato a cada frame.
+    restitution_threshold
+        Velocidade normal (em px/s) abaixo da qual as colisões são tratadas
+        como perfeitamente inelásticas. Evita pequenos quiques em objetos em
+        repouso.
+    tolerance
+        Distância máxima (em px) entre pontos de contato de frames sucessivos
+        para que sejam considerados o mesmo ponto no warm starting.
+
+    O número de pontos de contato resolvidos na última chamada a solve() fica
+    armazenado em num_contacts.
+    '''
+
+    def __init__(self, iterations=10, warm_start=True, baumgarte=0.2,
+                 slop=0.5, restitution_threshold=10.0, tolerance=2.0):
+        self.iterations = int(iterations)
+        self.warm_start = warm_start
+        self.baumgarte = float(baumgarte)
+        self.slop = float(slop)
+        self.restitution_threshold = float(restitution_threshold)
+        self.tolerance = float(tolerance)
+        self.num_contacts = 0
+
+    def solve(self, collisions, dt):
+        '''Resolve todas as colisões da lista durante o intervalo dt'''
+
+        velocities = {}
+        contacts = self.prepare(collisions, dt, velocities)
+        self.num_contacts = len(contacts)
+        for _ in range(self.iterations):
+            for contact in contacts:
+                contact.solve()
+
+        # Atualiza as velocidades dos objetos
+        for obj, (vx, vy, omega) in velocities.items():
+            if obj._invmass:
+                x, y = obj._vel
+                obj.boost((vx - x, vy - y))
+            if obj._invinertia:
+                obj.aboost(omega - obj._omega)
+
+        self.store_impulses(collisions, contacts)
+
+    def prepare(self, collisions, dt, velocities):
+        '''Cria a lista de pontos de contato a partir das colisões. O
+        dicionário velocities é preenchido com as listas [vx, vy, omega] de
+        cada objeto que participa de alguma colisão.'''
+
+        contacts = []
+        beta = self.baumgarte / dt if dt else 0.0
+        slop = self.slop
+        threshold = self.restitution_threshold
+        warm_start = self.warm_start
+        tol_sqr = self.tolerance ** 2
+
+        for col in collisions:
+            A, B = col.objects
+            try:
+                vA = velocities[A]
+            except KeyError:
+                x, y = A._vel
+                vA = velocities[A] = [x, y, A._omega]
+            try:
+                vB = velocities[B]
+            except KeyError:
+                x, y = B._vel
+                vB = velocities[B] = [x, y, B._omega]
+
+            Ax, Ay = A._pos
+            Bx, By = B._pos
+            nx, ny = col.normal
+            imA, imB = A._invmass, B._invmass
+            iiA, iiB = A._invinertia, B._invinertia
+            mu = col.friction_coeff()
+            e = col.rest_coeff()
+
+            # Impulsos do frame anterior. Se a ordem dos objetos foi invertida,
+            # a normal e a tangente trocam de sinal juntamente com o objeto 
+            # que recebe o impulso, de modo que (Pn, Pt) não se alteram
+            previous = col.previous
+            if warm_start and previous is not None and previous.impulses:
+                cached = list(zip(previous.points, previous.impulses))
+            else:
+                cached = ()
+
+            for (px, py), depth in zip(col.points, col.depths):
+                c = _Contact()
+                c.vA, c.vB = vA, vB
+                c.invmass_A, c.invmass_B = imA, imB
+                c.invinertia_A, c.invinertia_B = iiA, iiB
+                c.rAx, c.rAy = rAx, rAy = px - Ax, py - Ay
+                c.rBx, c.rBy = rBx, rBy = px - Bx, py - By
+                c.nx, c.ny = nx, ny
+                c.mu = mu
+
+                # Massas efetivas nas direções normal e tangente
+                rnA = rAx * ny - rAy * nx
+                rnB = rBx * ny - rBy * nx
+                k = imA + imB + iiA * rnA ** 2 + iiB * rnB ** 2
+                c.mass_n = 1.0 / k if k else 0.0
+                rtA = rAx * nx + rAy * ny
+                rtB = rBx * nx + rBy * ny
+                k = imA + imB + iiA * rtA ** 2 + iiB * rtB ** 2
+                c.mass_t = 1.0 / k if k else 0.0
+
+                # Restituição: a velocidade normal final deve ser -e * vn
+                bias = beta * max(depth - slop, 0.0)
+                dvx, dvy = c.relative_vel()
+                vn = dvx * nx + dvy * ny
+                if vn < -threshold:
+                    c.bias = max(bias, -e * vn)
+                else:
+                    c.bias = bias
+
+                # Warm starting
+                c.Pn = c.Pt = 0.0
+                for (qx, qy), (Pn, Pt) in cached:
+                    if (px - qx) ** 2 + (py - qy) ** 2 < tol_sqr:
+                        c.Pn, c.Pt = Pn, Pt
+                        c.apply(Pn * nx - Pt * ny, Pn * ny + Pt * nx)
+                        break
+                contacts.append(c)
+        return contacts
+
+    def store_impulses(self, collisions, contacts):
+        '''Armazena em col.impulses os impulsos acumulados em cada ponto de
+        contato para serem utilizados no próximo frame'''
+
+        if not self.warm_start:
+            return
+
+        contacts = iter(contacts)
+        for col in collisions:
+            col.impulses = [(c.Pn, c.Pt) for _, c in zip(col.points, contacts)]
@@ -0,0 +1,356 @@
+#-*- coding: utf8 -*-
+'''
+Armazenamento do estado dinâmico dos objetos em arrays do NumPy.
+
+A classe StateArrays guarda as posições, velocidades e acelerações de todos os
+objetos de uma simulação em arrays contíguos de forma (N, 2) ("structure of
+arrays"). Os atributos obj._pos, obj._vel e obj._accel de cada objeto passam a
+ser instâncias de VectorView, que leem e escrevem diretamente na linha
+correspondente destes arrays. Deste modo, o resto da FGAme continua
+funcionando sem modificações, enquanto o cálculo das acelerações e
+velocidades e a atualização das posições são feitos em poucas operações
+vetorizadas.
+
+A integração não é totalmente vetorizada: as caixas de contorno e os vértices
+dos polígonos continuam armazenados nos objetos e são atualizados em Python,
+mas somente para os objetos que se moveram ou giraram no passo. As variáveis
+angulares theta e omega também são escalares que não podem ser representadas
+por uma vista. A velocidade angular é copiada para o array omega no início de
+cada passo e escrita de volta somente nos objetos cuja rotação é integrada.
+
+O NumPy é uma dependência opcional: StateArrays só pode ser instanciada caso
+ele esteja disponível.
+'''
+
+from FGAme.math import VectorM
+from FGAme.math import linalg
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#===============================================================================
+# Vetor que referencia uma linha de um array
+#===============================================================================
+class VectorView(linalg.VectorM):
+    '''Um VectorM cujas coordenadas são armazenadas numa sequência externa
+    (normalmente uma linha de um array do NumPy de forma (N, 2)).
+
+    >>> data = [1.0, 2.0]
+    >>> v = VectorView.view(data)
+    >>> v += (1, 1); data
+    [2.0, 3.0]
+
+    As operações que criam novos vetores retornam objetos do tipo VectorM
+    comuns, que não compartilham memória com a sequência original.
+
+    >>> v * 2
+    VectorM(4, 6)
+    '''
+
+    __slots__ = ['_data']
+
+    def __init__(self, x, y):
+        self._data = [float(x), float(y)]
+
+    @classmethod
+    def view(cls, data):
+        '''Cria um vetor que lê e escreve suas coordenadas em data'''
+
+        new = object.__new__(cls)
+        new._data = data
+        return new
+
+    def _get_x(self):
+        return self._data[0]
+
+    def _set_x(self, value):
+        self._data[0] = value
+
+    def _get_y(self):
+        return self._data[1]
+
+    def _set_y(self, value):
+        self._data[1] = value
+
+    _x = property(_get_x, _set_x)
+    _y = property(_get_y, _set_y)
+
+    def detached(self):
+        '''Retorna uma cópia do vetor que não compartilha memória com os
+        dados originais'''
+
+        x, y = self._data
+        return VectorM(x, y)
+
+    copy = detached
+
+    # Operações que criam novos vetores ----------------------------------------
+    def __mul__(self, other):
+        return self.detached() * other
+
+    def __rmul__(self, other):
+        return self.detached() * other
+
+    def __div__(self, other):
+        return self.detached() / other
+
+    __truediv__ = __div__
+
+    def __add__(self, other):
+        return self.detached() + other
+
+    def __radd__(self, other):
+        return self.detached() + other
+
+    def __sub__(self, other):
+        return self.detached() - other
+
+    def __rsub__(self, other):
+        return other - self.detached()
+
+    def __neg__(self):
+        return -self.detached()
+
+    def rotated(self, theta, axis=(0, 0)):
+        return self.detached().rotated(theta, axis)
+
+    def normalized(self):
+        return self.detached().normalized()
+
+    def _new(self, x, y):
+        return VectorM(x, y)
+
+#===============================================================================
+# Estado dos objetos em arrays
+#===============================================================================
+class StateArrays(object):
+    '''Armazena o estado dinâmico de um conjunto de objetos em arrays do
+    NumPy e integra as equações de movimento de forma vetorizada.
+
+    Os arrays pos, vel e accel possuem forma (capacity, 2), mas somente as
+    primeiras `size` linhas correspondem a objetos. A linha i corresponde ao
+    objeto objects[i].
+
+    Os parâmetros físicos (massa, momento de inércia, gravidade e constantes
+    de amortecimento) são copiados para arrays internos e atualizados de forma
+    preguiçosa sempre que o método invalidate() é chamado. Os setters de
+    Object e de Simulation, além de Object.sleep() e Object.wake(), fazem isto
+    automaticamente. Modificações diretas em atributos privados ou no atributo
+    accel_static devem ser seguidas de uma chamada a invalidate().
+    '''
+
+    def __init__(self, capacity=64):
+        if np is None:
+            raise RuntimeError('numpy is required for array-backed state')
+
+        self.objects = []
+        self.size = 0
+        self._index = {}
+        self._dirty = True
+        self._alloc(max(int(capacity), 1))
+
+    def _alloc(self, capacity):
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.accel = np.zeros((capacity, 2))
+        self.omega = np.zeros(capacity)
+
+    def _grow(self):
+        n = self.size
+        pos, vel, accel = self.pos, self.vel, self.accel
+        self._alloc(2 * self.capacity)
+        self.pos[:n] = pos[:n]
+        self.vel[:n] = vel[:n]
+        self.accel[:n] = accel[:n]
+        for i, obj in enumerate(self.objects):
+            self._bind(obj, i)
+
+    def _bind(self, obj, i):
+        obj._pos._data = self.pos[i]
+        obj._vel._data = self.vel[i]
+        obj._accel._data = self.accel[i]
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, obj):
+        return obj in self._index
+
+    #===========================================================================
+    # Gerenciamento de objetos
+    #===========================================================================
+    def add(self, obj):
+        '''Passa a armazenar o estado do objeto nos arrays'''
+
+        if obj in self._index:
+            return
+        if obj._state is not None:
+            obj._state.remove(obj)
+        if self.size == self.capacity:
+            self._grow()
+
+        i = self.size
+        self.pos[i] = obj._pos
+        self.vel[i] = obj._vel
+        self.accel[i] = obj._accel
+        obj._pos = VectorView.view(self.pos[i])
+        obj._vel = VectorView.view(self.vel[i])
+        obj._accel = VectorView.view(self.accel[i])
+        obj._state = self
+
+        self.objects.append(obj)
+        self._index[obj] = i
+        self.size += 1
+        self._dirty = True
+
+    def remove(self, obj):
+        '''Remove o objeto dos arrays. O objeto volta a armazenar seu estado
+        em vetores próprios.'''
+
+        i = self._index.pop(obj)
+        obj._pos = VectorM(*obj._pos)
+        obj._vel = VectorM(*obj._vel)
+        obj._accel = VectorM(*obj._accel)
+        obj._state = None
+
+        # Move o último objeto para a posição liberada
+        last = self.size - 1
+        moved = self.objects.pop()
+        if moved is not obj:
+            self.objects[i] = moved
+            self._index[moved] = i
+            self.pos[i] = self.pos[last]
+            self.vel[i] = self.vel[last]
+            self.accel[i] = self.accel[last]
+            self._bind(moved, i)
+        self.size = last
+        self._dirty = True
+
+    def invalidate(self):
+        '''Marca os parâmetros físicos armazenados como desatualizados'''
+
+        self._dirty = True
+
+    def _sync(self):
+        '''Copia os parâmetros físicos dos objetos para os arrays'''
+
+        objects = self.objects
+        n = self.size
+        params = np.array([(obj._invmass, obj._invinertia,
+                            obj._damping, obj._adamping,
+                            obj._gravity[0], obj._gravity[1],
+                            obj.accel_static, obj.is_sleeping)
+                           for obj in objects], dtype=float)
+        params = params.reshape((n, 8))
+        self._invmass = params[:, 0]
+        self._invinertia = params[:, 1]
+        self._damping = params[:, 2]
+        self._adamping = params[:, 3]
+        self._gravity = params[:, 4:6]
+
+        static = params[:, 6] != 0
+        awake = params[:, 7] == 0
+        self._linear = ((self._invmass != 0) | static) & awake
+        self._angular = ((self._invinertia != 0) | static) & awake
+        linear_forced = (self._invmass != 0) & awake
+        angular_forced = (self._invinertia != 0) & awake
+        self._linear_forced = [(i, objects[i]) for i in
+                               np.flatnonzero(linear_forced).tolist()]
+        self._angular_forced = [(i, objects[i]) for i in
+                                np.flatnonzero(angular_forced).tolist()]
+        self._dirty = False
+
+    #===========================================================================
+    # Integração
+    #===========================================================================
+    def integrate(self, t, dt, batches=()):
+        '''Aplica as forças globais e externas a todos os objetos durante um
+        intervalo dt. Os pares (objetos, forças) em `batches` (ver 
+        Simulation.add_pool() e Simulation.add_field()) são somados às 
+        forças externas.
+
+        Equivale ao laço de Simulation.resolve_forces(): objetos dinâmicos e
+        objetos com accel_static usam o integrador de Velocity-Verlet de
+        Object.apply_accel() e Object.apply_alpha(). Os demais objetos se
+        movem com velocidade constante. Objetos dormindo possuem velocidade
+        nula e não se movem.'''
+
+        n = self.size
+        if not n:
+            return
+        if self._dirty:
+            self._sync()
+        objects = self.objects
+        vel = self.vel[:n]
+        accel = self.accel[:n]
+        linear = self._linear
+        angular = self._angular
+        linear_col = linear[:, None]
+
+        # Acelerações lineares
+        a = self._gravity - self._damping[:, None] * vel
+        invmass = self._invmass
+        for i, obj in self._linear_forced:
+            F = obj.external_force(t)
+            if F is not None:
+                a[i, 0] += F[0] * invmass[i]
+                a[i, 1] += F[1] * invmass[i]
+        index = self._index
+        for group, forces in batches:
+            F = np.asarray(forces, dtype=float)
+            rows = [(i, index[obj]) for i, obj in enumerate(group)
+                    if obj in index]
+            if rows:
+                src, dst = np.array(rows).T
+                a[dst] += F[src] * invmass[dst, None]
+        a[~linear] = 0.0
+
+        # Velocity-Verlet (ver Object.apply_accel())
+        vel_new = vel + (accel + a) / 2 * dt
+        delta = np.where(linear_col, vel_new * dt + a * (dt ** 2 / 2.),
+                         vel * dt)
+        np.copyto(vel, vel_new, where=linear_col)
+        np.copyto(accel, a, where=linear_col)
+
+        # Acelerações angulares
+        omega = self.omega[:n]
+        omega[:] = [obj._omega for obj in objects]
+        alpha = -omega * self._adamping
+        invinertia = self._invinertia
+        for i, obj in self._angular_forced:
+            tau = obj.external_torque(t)
+            if tau is not None:
+                alpha[i] += tau * invinertia[i]
+        alpha[~angular] = 0.0
+
+        # Integração angular (ver Object.apply_alpha())
+        omega_new = np.where(angular, omega + alpha * dt, omega)
+        dtheta = np.where(angular, omega_new * dt + alpha * (dt ** 2 / 2.),
+                          omega * dt)
+        omega[:] = omega_new
+
+        # Atualiza todas as posições de uma só vez. Somente os objetos que se
+        # moveram percorrem o laço em Python para deslocar a caixa de
+        # contorno e os vértices (ver Object.move())
+        moved = (delta != 0).any(1)
+        pos = self.pos[:n]
+        np.add(pos, delta, out=pos, where=moved[:, None])
+        for i, (dx, dy) in zip(np.flatnonzero(moved).tolist(),
+                               delta[moved].tolist()):
+            objects[i]._translate_shape(dx, dy)
+
+        # Atualiza as variáveis angulares dos objetos
+        for i, w in zip(np.flatnonzero(angular).tolist(),
+                        omega_new[angular].tolist()):
+            objects[i]._omega = w
+        rotated = dtheta != 0
+        for i, dth in zip(np.flatnonzero(rotated).tolist(),
+                          dtheta[rotated].tolist()):
+            objects[i].rotate(dth)
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,169 @@
+#-*- coding: utf8 -*-
+'''
+Execução de várias simulações independentes em paralelo.
+
+A classe ParameterSweep executa uma cena para cada combinação de parâmetros de
+uma grade (por exemplo, diferentes valores de gravity, rest_coeff e
+dfriction), distribuindo as simulações entre vários processos. A cena é criada
+por uma função "fábrica" que recebe os parâmetros como argumentos nomeados e
+retorna uma Simulation ou um World. Os resumos de cada simulação são
+retornados assim que ficam prontos.
+
+>>> def scene(gravity, rest_coeff):
+...     sim = Simulation(gravity=gravity, rest_coeff=rest_coeff)
+...     sim.add(Circle(10, pos=(0, 50)))
+...     return sim
+>>> sweep = ParameterSweep(scene, duration=1.0)
+>>> grid = parameter_grid(gravity=[10, 20], rest_coeff=[0.5, 1])
+>>> for summary in sweep.run(grid):                         # doctest: +SKIP
+...     print(summary['params'], summary['kinetic_energy'])
+
+A função fábrica precisa ser definida no nível de um módulo para que possa ser
+enviada aos outros processos.
+'''
+
+import itertools
+import multiprocessing
+from operator import attrgetter
+
+#===============================================================================
+# Grade de parâmetros
+#===============================================================================
+def parameter_grid(**params):
+    '''Retorna uma lista de dicionários com todas as combinações dos valores
+    fornecidos para cada parâmetro.
+
+    >>> parameter_grid(gravity=[10, 20], rest_coeff=[1])
+    [{'gravity': 10, 'rest_coeff': 1}, {'gravity': 20, 'rest_coeff': 1}]
+    '''
+
+    names = sorted(params)
+    values = [params[name] for name in names]
+    return [dict(zip(names, combination))
+            for combination in itertools.product(*values)]
+
+#===============================================================================
+# Execução de uma simulação
+#===============================================================================
+def run_scene(factory, params, duration, dt):
+    '''Cria a cena com factory(**params), simula pelo intervalo `duration`
+    com passos dt e retorna um dicionário com o resumo da simulação:
+
+    params
+        Os parâmetros utilizados.
+    time
+        O tempo final da simulação.
+    kinetic_energy
+        A energia cinética total no final da simulação.
+    positions
+        Lista com as posições finais (x, y) de cada objeto, na ordem em que
+        foram adicionados à simulação (ordem de uid). A mesma posição da
+        lista corresponde ao mesmo objeto em simulações com parâmetros
+        diferentes.
+    collisions
+        Número total de colisões detectadas (uma por par de objetos em
+        contato em cada frame).
+    contacts
+        Número de contatos distintos, isto é, de vezes em que dois objetos
+        começaram a se tocar.
+    '''
+
+    scene = factory(**params)
+    sim = getattr(scene, 'simulation', scene)
+
+    collisions = contacts = 0
+    previous = set()
+    for _ in range(int(round(duration / dt))):
+        scene.update(dt)
+        current = set(frozenset(col.objects) for col in sim.contacts)
+        collisions += len(current)
+        contacts += len(current - previous)
+        previous = current
+
+    return {
+        'params': params,
+        'time': sim.time,
+        'kinetic_energy': sim.kinetic_energy(),
+        'positions': [tuple(obj.pos) for obj in
+                      sorted(sim._objects, key=attrgetter('uid'))],
+        'collisions': collisions,
+        'contacts': contacts,
+    }
+
+def _run_task(task):
+    '''Executa uma tarefa enviada pelo ParameterSweep num processo filho'''
+
+    idx, factory, params, duration, dt = task
+    summary = run_scene(factory, params, duration, dt)
+    summary['index'] = idx
+    return summary
+
+#===============================================================================
+# Execução em paralelo
+#===============================================================================
+class ParameterSweep(object):
+    '''Executa uma cena para cada conjunto de parâmetros de uma grade.
+
+    Parameters
+    ----------
+
+    factory
+        Função que recebe os parâmetros como argumentos nomeados e retorna uma
+        Simulation ou um World. Deve ser definida no nível de um módulo.
+    duration
+        Tempo de simulação (em segundos) de cada cena.
+    dt
+        Passo de tempo da simulação.
+    processes
+        Número de processos. O padrão é o número de CPUs. Se for igual a 1, as
+        simulações são executadas no processo atual.
+    chunksize
+        Número de simulações enviadas a cada processo por vez.
+    '''
+
+    def __init__(self, factory, duration=1.0, dt=1 / 60., processes=None,
+                 chunksize=1):
+        self.factory = factory
+        self.duration = float(duration)
+        self.dt = float(dt)
+        self.processes = processes
+        self.chunksize = chunksize
+
+    def _tasks(self, grid):
+        for idx, params in enumerate(grid):
+            yield idx, self.factory, params, self.duration, self.dt
+
+    def run(self, grid):
+        '''Executa as simulações e retorna um iterador sobre os resumos (ver
+        run_scene()) na ordem em que ficam prontos. O resumo possui uma
+        chave adicional 'index' com a posição dos parâmetros na grade.'''
+
+        tasks = self._tasks(grid)
+        if self.processes == 1:
+            for task in tasks:
+                yield _run_task(task)
+            return
+
+        pool = multiprocessing.Pool(self.processes)
+        try:
+            for summary in pool.imap_unordered(_run_task, tasks,
+                                               self.chunksize):
+                yield summary
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def run_all(self, grid):
+        '''Executa as simulações e retorna a lista de resumos na ordem da
+        grade de parâmetros'''
+
+        grid = list(grid)
+        result = [None] * len(grid)
+        for summary in self.run(grid):
+            result[summary['index']] = summary
+        return result
+
+if __name__ == '__main__':
+    from FGAme.physics import Simulation, Circle
+    import doctest
+    doctest.testmod()
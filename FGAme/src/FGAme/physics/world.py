@@ -2,7 +2,7 @@
 from __future__ import print_function
 
 from FGAme.physics import AABB, Poly, Simulation
-from FGAme.core import Listener, signal
+from FGAme.core import Listener, signal, init
 from FGAme.core import globalvars
 from FGAme.draw import RenderTree
 
@@ -17,7 +17,7 @@ class World(Listener):
     def __init__(self, background=None,
                  gravity=None, damping=0, adamping=0,
                  rest_coeff=1, sfriction=0, dfriction=0, stop_velocity=1e-6,
-                 simulation=None):
+                 simulation=None, **kwds):
 
         
         if background is not None:
@@ -31,7 +31,7 @@ class World(Listener):
             self.simulation = Simulation(
                 gravity=gravity, damping=damping, adamping=adamping,
                 rest_coeff=rest_coeff, sfriction=sfriction, dfriction=dfriction,
-                stop_velocity=stop_velocity)
+                stop_velocity=stop_velocity, **kwds)
 
         # Controle de callbacks
         self.is_paused = False
@@ -119,6 +119,7 @@ class World(Listener):
     # Eventos privados
     frame_enter = signal('frame-enter')
     frame_skip = signal('frame-skip')
+    frame_stats = signal('frame-stats', num_args=1, delegate='simulation')
     collision = signal('collision', num_args=1)
     collision_pair = signal('collision-pair', 'obj1', 'obj2', num_args=1)
 
@@ -152,18 +153,39 @@ class World(Listener):
     #===========================================================================
     # Laço principal
     #===========================================================================
-    def run(self, timeout=None, real_time=True):
+    def run(self, timeout=None, real_time=True, physics_fps=None):
         '''Roda a simulação de física durante o tempo 'timeout' especificado.
         
         O parâmetro `real_time` especifica se o tempo considerado consiste no
-        tempo real ou no tempo de simulação.'''
+        tempo real ou no tempo de simulação.
         
-        globalvars.mainloop_object.run(self, timeout=timeout)
+        Se `physics_fps` for fornecido, a física é atualizada com passo fixo 
+        igual a 1/physics_fps, independentemente da taxa de renderização, e os
+        objetos são desenhados em posições interpoladas (ver MainLoop).'''
+        
+        init()
+        mainloop = globalvars.mainloop_object
+        if physics_fps is not None:
+            mainloop.physics_fps = physics_fps
+        mainloop.run(self, timeout=timeout)
+
+    def simulate(self, duration, dt=1 / 60.):
+        '''Avança a simulação por `duration` segundos (em tempo de simulação) 
+        com passos de tamanho dt e retorna o tempo final.
+        
+        Ao contrário de run(), não utiliza o laço principal nem o backend: 
+        não desenha na tela, não processa eventos de entrada e não espera 
+        pelo relógio. Pode ser utilizado em servidores sem display.'''
+        
+        for _ in range(int(round(duration / dt))):
+            self.update(dt)
+        return self.time
 
     def stop(self):
         '''Finaliza o laço principal de simulação'''
         
-        globalvars.mainloop_object.stop()
+        if globalvars.mainloop_object is not None:
+            globalvars.mainloop_object.stop()
 
     def set_next_state(self, value):
         '''Passa a simulação para o próximo estado'''
@@ -1 +1,3 @@
-from .math_tests import *
\ No newline at end of file
+from .math_tests import *
+from .physics_tests import *
+from .core_tests import *
\ No newline at end of file
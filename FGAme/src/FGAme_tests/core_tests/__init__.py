@@ -0,0 +1,2 @@
+from .mainloop import *
+from .headless import *
\ No newline at end of file
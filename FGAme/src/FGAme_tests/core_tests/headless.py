@@ -0,0 +1,60 @@
+#-*- coding: utf8 -*-
+import sys
+from FGAme.core import NullCanvas, NullInput, HeadlessMainLoop, set_backend
+from FGAme.physics import Circle, Simulation, World
+
+#===============================================================================
+# Simulação sem backend
+#===============================================================================
+def test_simulation_does_not_init_backend():
+    sim = Simulation(gravity=10)
+    assert 'input' not in sim.__dict__
+
+def test_step_n():
+    sim = Simulation(gravity=10)
+    obj = Circle(5, pos=(0, 0))
+    sim.add(obj)
+    assert abs(sim.step_n(120, 1 / 60.) - 2) < 1e-9
+    assert abs(obj.pos.y + 20) < 0.5
+
+def test_world_simulate():
+    world = World(gravity=10)
+    obj = Circle(5, pos=(0, 0))
+    world.add(obj)
+    assert abs(world.simulate(2) - 2) < 1e-9
+    assert abs(obj.pos.y + 20) < 0.5
+
+    # Nada acontece com o mundo pausado
+    world.pause()
+    assert abs(world.simulate(1) - 2) < 1e-9
+
+def test_null_backend():
+    world = World()
+    world.add(Circle(5))
+    canvas = NullCanvas(800, 600)
+    canvas.start()
+    canvas.clear_background()
+    canvas.draw_tree(world.get_render_tree())
+    canvas.flip()
+
+    # Os eventos de entrada podem ser simulados
+    events = []
+    input = NullInput()
+    input.listen('long-press', 'up', lambda: events.append('up'))
+    input.process_key_down('up')
+    input.query()
+    input.process_key_up('up')
+    input.query()
+    assert events == ['up']
+
+def test_headless_mainloop():
+    set_backend('headless')
+    world = World(gravity=10)
+    world.add(Circle(5, pos=(0, 0)))
+    mainloop = HeadlessMainLoop()
+    mainloop.run(world, timeout=0.5)
+    assert 0.5 - 1e-9 <= world.time < 0.5 + mainloop.dt
+
+    # Nenhuma biblioteca gráfica foi importada
+    for name in ['pygame', 'sdl2', 'pyglet', 'kivy', 'OpenGL']:
+        assert name not in sys.modules
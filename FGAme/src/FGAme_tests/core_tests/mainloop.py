@@ -0,0 +1,74 @@
+#-*- coding: utf8 -*-
+from FGAme.core import MainLoop, Canvas
+from FGAme.draw import RenderTree
+from FGAme.physics import Circle
+
+#===============================================================================
+# Laço principal com passo de tempo fixo
+#===============================================================================
+class State(object):
+    '''Estado mínimo aceito por MainLoop.advance()'''
+
+    def __init__(self):
+        self.steps = []
+        self.skipped = []
+        self.tree = RenderTree()
+
+    def update(self, dt):
+        self.steps.append(dt)
+
+    def trigger(self, signal, *args):
+        assert signal == 'frame-skip'
+        self.skipped.extend(args)
+
+    def get_render_tree(self):
+        return self.tree
+
+def test_fixed_timestep_accumulator():
+    loop = MainLoop(fps=60, physics_fps=120)
+    state = State()
+
+    # Um frame de renderização corresponde a dois passos da física
+    alpha = loop.advance(state, 1 / 60.)
+    assert state.steps == [1 / 120.] * 2
+    assert abs(alpha) < 1e-6
+
+    # Frames curtos acumulam tempo sem atualizar a física
+    alpha = loop.advance(state, 1 / 240.)
+    assert len(state.steps) == 2
+    assert abs(alpha - 0.5) < 1e-6
+    alpha = loop.advance(state, 1 / 240.)
+    assert len(state.steps) == 3
+    assert abs(alpha) < 1e-6
+
+def test_max_substeps():
+    loop = MainLoop(physics_fps=100, max_substeps=5)
+    state = State()
+    loop.advance(state, 1.0)
+    assert len(state.steps) == 5
+
+    # O tempo restante é descartado, exceto por uma fração de passo
+    skipped, = state.skipped
+    assert abs(skipped + loop.accumulator - 0.95) < 1e-6
+    assert loop.accumulator < loop.physics_dt
+
+class RecordCanvas(Canvas):
+    '''Canvas que apenas registra os círculos desenhados'''
+
+    def init(self):
+        self.circles = []
+
+    def paint_circle(self, pos, radius, color='black', solid=True):
+        self.circles.append((tuple(pos), radius))
+
+def test_interpolated_rendering():
+    circle = Circle(5, pos=(0, 0))
+    tree = RenderTree()
+    tree.add(circle.get_drawable())
+    tree.save_state()
+    circle.move((10, 0))
+
+    canvas = RecordCanvas(100, 100)
+    canvas.draw_tree(tree)
+    canvas.draw_tree(tree, 0.25)
+    assert canvas.circles == [((10, 0), 5), ((2.5, 0), 5)]
@@ -67,8 +67,8 @@ class Ship(World):
         self.listen('long-press', 'up', self.move, (1.8,))
         self.listen('long-press', 'down', self.move, (-1.8,))
     
-        self.player1.listen('collision', self.deal_damage)
-        self.player2.listen('collision', self.deal_damage)
+        self.player1.listen('collision-begin', self.deal_damage)
+        self.player2.listen('collision-begin', self.deal_damage)
 
         self.receiving_input = True
 
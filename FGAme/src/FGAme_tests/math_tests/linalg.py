@@ -37,6 +37,41 @@ def test_vector_norm():
 def test_vector_rotation():
     v = Vector(1, 0)
     assert (v.rotated(pi/2) - Vector(0, 1)).norm() < 1e-6, v
+    assert (v.rotated(pi, (1, 1)) - Vector(1, 2)).norm() < 1e-6, v
+
+def test_vector_result_types():
+    m = VectorM(1, 2)
+    v = Vector(1, 2)
+    assert type(m + v) is VectorM and type(v + m) is Vector
+    assert type(-m) is VectorM and type(m * 2) is VectorM
+    assert type(2 * v) is Vector and type((1, 1) - v) is Vector
+    assert type((v * 2).x) is float and type((v / 2).y) is float
+    nose.tools.assert_raises(TypeError, lambda: v * v)
+
+def test_vectorm_inplace():
+    m = VectorM(1, 2)
+    m += Vector(1, 1)
+    m -= (0, 1)
+    assert m == (2, 2)
+    m.copy_from((3, 4))
+    assert m == Vector(3, 4)
+    assert m.copy() == m and m.copy() is not m
+
+def test_vectorm_inplace_scalars():
+    m = VectorM(1, 2)
+    m.iadd_xy(1, 1)
+    assert m == (2, 3)
+    m.iadd_scaled(Vector(1, 2), 2)
+    assert m == (4, 7)
+    m.set_scaled((1, 2), 3)
+    assert m == (3, 6)
+    m.set_lincomb(Vector(1, 0), 2, Vector(0, 1), 3)
+    assert m == (2, 3)
+    m.scale_about(2, 1, 1)
+    assert m == (3, 5)
+    m.set_xy(2, 1)
+    m.rotate_cs(0, 1, 1, 1)
+    assert (m - Vector(1, 2)).norm() < 1e-6, m
     
 #===============================================================================
 # Interface Python    
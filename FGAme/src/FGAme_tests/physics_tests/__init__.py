@@ -0,0 +1,16 @@
+from .broadphase import *
+from .state import *
+from .ball import *
+from .poly import *
+from .sleep import *
+from .solver import *
+from .contacts import *
+from .sweep import *
+from .snapshot import *
+from .lockstep import *
+from .profiler import *
+from .gravity import *
+from .springs import *
+from .force import *
+from .fields import *
+from .ccd import *
\ No newline at end of file
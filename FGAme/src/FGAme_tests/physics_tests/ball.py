@@ -0,0 +1,43 @@
+#-*- coding: utf8 -*-
+from random import Random
+from FGAme.physics import Circle, SweepAndPrune
+from FGAme.physics.ball import circle_collision, circle_collisions, BATCH_SIZE
+
+#===============================================================================
+# Colisões entre círculos
+#===============================================================================
+def make_circles(N=300, seed=0):
+    rand = Random(seed)
+    circles = [Circle(rand.uniform(3, 15), pos=(rand.uniform(0, 200),
+                                                rand.uniform(0, 200)))
+               for _ in range(N)]
+
+    # Círculos concêntricos
+    circles.append(Circle(5, pos=(50, 50)))
+    circles.append(Circle(8, pos=(50, 50)))
+    return circles
+
+def test_batched_circle_collisions():
+    circles = make_circles()
+    pairs = SweepAndPrune().get_pairs(circles)
+    assert len(pairs) > BATCH_SIZE
+
+    batch = circle_collisions(pairs)
+    assert len(batch) == len(pairs)
+    assert any(col is not None for col in batch)
+    for (A, B), col in zip(pairs, batch):
+        expected = circle_collision(A, B)
+        if expected is None:
+            assert col is None
+        else:
+            assert col.objects == (A, B)
+            assert (col.pos - expected.pos).norm() < 1e-12
+            assert (col.normal - expected.normal).norm() < 1e-12
+
+def test_circle_collision_normal():
+    A = Circle(10, pos=(0, 0))
+    B = Circle(10, pos=(15, 0))
+    col = circle_collision(A, B)
+    assert col.normal == (1, 0)
+    assert col.pos == (7.5, 0)
+    assert circle_collision(A, Circle(5, pos=(0, 20))) is None
@@ -0,0 +1,155 @@
+#-*- coding: utf8 -*-
+from random import Random
+from FGAme.physics import (Circle, AABB, Poly, Simulation, SweepAndPrune,
+                           get_broad_phase)
+
+#===============================================================================
+# Cenas de teste
+#===============================================================================
+def make_scene(N=200, seed=0):
+    '''Cria uma cena aleatória com círculos, AABBs e polígonos e os limites 
+    estáticos semelhantes aos criados por World.set_bounds()'''
+
+    rand = Random(seed)
+    objects = []
+    for _ in range(N):
+        pos = (rand.uniform(0, 400), rand.uniform(0, 300))
+        kind = rand.random()
+        if kind < 0.4:
+            obj = Circle(rand.uniform(3, 20), pos=pos)
+        elif kind < 0.7:
+            shape = (rand.uniform(5, 40), rand.uniform(5, 40))
+            obj = AABB(shape=shape, pos=pos)
+        else:
+            obj = Poly.regular(rand.randint(3, 7), rand.uniform(5, 25), pos=pos)
+        if rand.random() < 0.1:
+            obj.make_static()
+        objects.append(obj)
+
+    for bbox in [(-1e4, 1e4, 300, 1e4), (-1e4, 1e4, -1e4, 0),
+                 (-1e4, 0, 0, 300), (400, 1e4, 0, 300)]:
+        bound = AABB(bbox=bbox)
+        bound.make_static()
+        objects.append(bound)
+    return objects, rand
+
+def move_scene(objects, rand, step=5):
+    for obj in objects:
+        if obj._invmass:
+            obj.move((rand.uniform(-step, step), rand.uniform(-step, step)))
+
+def assert_same_pairs(broad_phase, frames=5):
+    objects, rand = make_scene()
+    sweep = SweepAndPrune()
+    for obj in objects:
+        broad_phase.add(obj)
+    for _ in range(frames):
+        expected = sweep.get_pairs(list(objects))
+        assert broad_phase.get_pairs(list(objects)) == expected
+        move_scene(objects, rand)
+
+#===============================================================================
+# Testes
+#===============================================================================
+def test_grid_same_pairs_as_sweep():
+    assert_same_pairs(get_broad_phase('grid', cell_size=30))
+
+def test_grid_automatic_cell_size():
+    assert_same_pairs(get_broad_phase('grid'))
+
+def test_grid_remove():
+    objects, _ = make_scene(50)
+    grid = get_broad_phase('grid', cell_size=30)
+    grid.get_pairs(list(objects))
+    removed = objects.pop(0)
+    grid.remove(removed)
+    pairs = grid.get_pairs(list(objects))
+    assert all(removed not in pair for pair in pairs)
+    assert pairs == SweepAndPrune().get_pairs(list(objects))
+
+def test_sap_same_pairs_as_sweep():
+    assert_same_pairs(get_broad_phase('sap'))
+
+def test_sap_events():
+    objects, rand = make_scene()
+    sap = get_broad_phase('sap')
+    previous = set()
+    for _ in range(5):
+        current = set(map(frozenset, sap.get_pairs(list(objects))))
+        assert set(map(frozenset, sap.entered)) == current - previous
+        assert set(map(frozenset, sap.left)) == previous - current
+        previous = current
+        move_scene(objects, rand)
+
+def test_bvh_same_pairs_as_sweep():
+    assert_same_pairs(get_broad_phase('bvh', margin=2))
+
+def test_bvh_static_dynamic_transitions():
+    # As mudanças de estado são informadas pela simulação
+    objects, rand = make_scene()
+    sim = Simulation(broad_phase='bvh')
+    for obj in objects:
+        sim.add(obj)
+    bvh = sim.broad_phase
+    sweep = SweepAndPrune()
+    for i, obj in enumerate(objects[:-4]):
+        bvh.get_pairs(list(objects))
+        if i % 3 == 0:
+            obj.make_static()
+        elif obj.is_static():
+            obj.mass = 1.0
+            obj.vel = (1, 1)
+        move_scene(objects, rand)
+        assert bvh.get_pairs(list(objects)) == sweep.get_pairs(list(objects))
+
+def test_bvh_visits_only_moving_objects():
+    sim = Simulation(broad_phase='bvh')
+    tiles = []
+    for i in range(20):
+        for j in range(5):
+            tile = AABB(bbox=(10 * i, 10 * (i + 1), 10 * j, 10 * (j + 1)))
+            tile.make_static()
+            tiles.append(tile)
+            sim.add(tile)
+    balls = [Circle(5, pos=(10 + 20 * i, 55)) for i in range(5)]
+    for ball in balls:
+        sim.add(ball)
+    bvh = sim.broad_phase
+    sweep = SweepAndPrune()
+    assert set(bvh._dynamic) == set(balls)
+    assert bvh.get_pairs(list(sim._objects)) == \
+        sweep.get_pairs(list(sim._objects))
+
+    # Objetos estáticos reposicionados ou colocados em movimento
+    tiles[0].pos = (55, 60)
+    tiles[1].vel = (0, 10)
+    tiles[1].move((0, 40))
+    assert set(bvh._dynamic) == set(balls + [tiles[1]])
+    assert bvh.get_pairs(list(sim._objects)) == \
+        sweep.get_pairs(list(sim._objects))
+
+    # E novamente parados
+    tiles[1].vel = (0, 0)
+    balls[0].make_static()
+    assert set(bvh._dynamic) == set(balls[1:])
+    assert bvh.get_pairs(list(sim._objects)) == \
+        sweep.get_pairs(list(sim._objects))
+
+def test_query_same_objects_as_sweep():
+    objects, rand = make_scene()
+    sweep = SweepAndPrune()
+    phases = [get_broad_phase(name) for name in ['grid', 'sap', 'bvh']]
+    for broad_phase in phases:
+        for obj in objects:
+            broad_phase.add(obj)
+    bboxes = [(50, 120, 40, 80), (-10, 10, -10, 500), (0, 400, 0, 300)]
+    for _ in range(3):
+        for bbox in bboxes:
+            expected = set(sweep.query(bbox, objects))
+            for broad_phase in phases:
+                assert set(broad_phase.query(bbox, objects)) == expected
+        for broad_phase in phases:
+            result = broad_phase.query_many(bboxes, objects)
+            assert result == [broad_phase.query(bbox, objects)
+                              for bbox in bboxes]
+        move_scene(objects, rand)
@@ -0,0 +1,105 @@
+#-*- coding: utf8 -*-
+from FGAme.physics import AABB, Circle, Poly, Simulation
+from FGAme.physics import BROAD_PHASES, swept_bbox, time_of_impact
+
+#===============================================================================
+# Projéteis contra uma parede fina
+#===============================================================================
+def shoot(obj, bullet=True, broad_phase='sweep', frames=10):
+    '''Dispara obj contra uma parede estática fina em x = 100 e retorna a
+    posição final do objeto'''
+
+    sim = Simulation(gravity=0, broad_phase=broad_phase)
+    wall = AABB(bbox=(100, 102, -50, 50))
+    wall.make_static()
+    sim.add(wall)
+    obj.bullet = bullet
+    obj.vel = (6000, 0)
+    sim.add(obj)
+    sim.step_n(frames, 1 / 60.)
+    return obj.pos
+
+def test_bullets_do_not_tunnel():
+    for factory in [lambda: Circle(5, pos=(-30, 0)),
+                    lambda: AABB(shape=(10, 10), pos=(-30, 0)),
+                    lambda: Poly.regular(5, 8, pos=(-30, 0))]:
+        assert shoot(factory(), bullet=False).x > 102
+        assert shoot(factory(), bullet=True).x < 100
+
+def test_bullets_broad_phases():
+    positions = [tuple(shoot(Circle(5, pos=(-30, 3)), broad_phase=name))
+                 for name in sorted(BROAD_PHASES)]
+    assert len(set(positions)) == 1
+
+def test_bullets_slow_objects_unchanged():
+    results = []
+    for bullet in [False, True]:
+        sim = Simulation(gravity=100)
+        floor = AABB(bbox=(-100, 100, -50, 0))
+        floor.make_static()
+        sim.add(floor)
+        ball = Circle(10, pos=(0, 30), vel=(20, 0))
+        ball.bullet = bullet
+        sim.add(ball)
+        sim.step_n(120, 1 / 60.)
+        results.append(tuple(ball.pos))
+    assert results[0] == results[1]
+
+#===============================================================================
+# Instante do primeiro contato
+#===============================================================================
+def test_time_of_impact():
+    collide = Simulation().get_collision
+    wall = AABB(bbox=(10, 11, -10, 10))
+    ball = Circle(1, pos=(20, 0))
+    assert swept_bbox(ball, (20, 0)) == (-1, 21, -1, 1)
+    s = time_of_impact(ball, wall, (20, 0), collide)
+    assert abs(s - 0.45) < 1e-3
+    assert tuple(ball.pos) == (20, 0)
+
+    # Sem colisão
+    assert time_of_impact(ball, wall, (20, 30), collide) is None
+
+    # Contato já existente no início do deslocamento: somente avanços
+    # maiores que metade do tamanho do objeto na direção da normal contam
+    ball.move((-10, 0))
+    assert time_of_impact(ball, wall, (0.5, 5), collide) is None
+    ball.move((10, 0))
+    assert time_of_impact(ball, wall, (10.5, 0), collide) == 0.0
+
+def test_time_of_impact_restores_exactly():
+    collide = Simulation().get_collision
+    wall = AABB(bbox=(10, 11, -10, 10))
+    for obj in [Circle(1, pos=(20.1, 0.3)),
+                Poly.regular(5, 1.3, pos=(20.1, 0.3))]:
+        obj.rotate(0.1)
+        state = (tuple(obj.pos), obj.bbox,
+                 [tuple(v) for v in getattr(obj, 'vertices', ())])
+        for delta in [(20.3, 0.1), (20.3, 50)]:
+            time_of_impact(obj, wall, delta, collide)
+            assert (tuple(obj.pos), obj.bbox,
+                    [tuple(v) for v in getattr(obj, 'vertices', ())]) == state
+
+#===============================================================================
+# Registro dos objetos com CCD
+#===============================================================================
+def test_bullet_registry():
+    sim = Simulation()
+    A, B, C = Circle(1), Circle(1), Circle(1)
+    A.bullet = True
+    sim.add(A)
+    sim.add(B)
+    sim.add(C)
+    assert sim._bullets == [A]
+
+    # Mantém a ordem dos uids
+    C.bullet = True
+    B.bullet = True
+    assert sim._bullets == [A, B, C]
+    B.bullet = False
+    sim.remove(A)
+    assert sim._bullets == [C]
+    assert A.bullet and A._simulation is None
+
+    sim.add(A)
+    assert sim._bullets == [A, C]
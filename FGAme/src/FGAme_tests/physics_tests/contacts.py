@@ -0,0 +1,69 @@
+#-*- coding: utf8 -*-
+from FGAme.physics import Circle, Poly, Simulation
+from FGAme.physics.poly import get_collision_poly
+
+#===============================================================================
+# Tabela de contatos e sinais de colisão
+#===============================================================================
+def make_events(obj, events):
+    for name in ['collision', 'collision-begin', 'collision-persist',
+                 'collision-end']:
+        obj.listen(name, lambda col, name=name: events.append(name))
+
+def make_contact():
+    floor = Poly.rect(bbox=(-100, 100, -50, 0))
+    floor.make_static()
+    ball = Circle(10, pos=(0, 9))
+    sim = Simulation(gravity=100, rest_coeff=0, iterations=10)
+    sim.add(floor)
+    sim.add(ball)
+    return sim, ball
+
+def test_collision_begin_persist_end():
+    sim, A = make_contact()
+    events = []
+    make_events(A, events)
+
+    sim.update(1 / 60.)
+    assert events == ['collision', 'collision-begin']
+    assert len(sim.contacts) == 1
+    del events[:]
+
+    sim.update(1 / 60.)
+    assert events == ['collision', 'collision-persist']
+    assert sim.contacts[0].previous is not None
+    del events[:]
+
+    # Separa os objetos
+    A.move((0, 100))
+    sim.update(1 / 60.)
+    assert events == ['collision-end']
+    assert not sim.contacts
+
+def test_remove_ends_contacts():
+    sim, A = make_contact()
+    events = []
+    make_events(A, events)
+    sim.update(1 / 60.)
+    del events[:]
+
+    sim.remove(A)
+    assert events == ['collision-end']
+    assert not sim.contacts
+
+def test_previous_collision_separating_axis():
+    A = Poly.rect(bbox=(0, 30, 0, 30))
+    B = Poly.rect(bbox=(25, 55, 5, 35))
+    col = get_collision_poly(A, B)
+    assert col.feature == (1, 0)
+
+    # A face anterior separa os objetos
+    B.move((10, 0))
+    assert get_collision_poly(A, B, previous=col) is None
+    assert get_collision_poly(A, B) is None
+
+    # A colisão com a ordem dos objetos invertida também reaproveita a face
+    B.move((-10, 0))
+    col = get_collision_poly(B, A, previous=col)
+    assert col is not None
+    assert col.normal == (-1, 0)
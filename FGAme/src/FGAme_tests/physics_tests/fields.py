@@ -0,0 +1,103 @@
+#-*- coding: utf8 -*-
+from unittest import SkipTest
+from FGAme.physics import Circle, AABB, Poly, Simulation
+from FGAme.physics import (ForceField, UniformField, DragField,
+                           AttractorField, BuoyancyField)
+from FGAme.physics.fields import np
+
+#===============================================================================
+# Campos de força
+#===============================================================================
+def make_grid(N=10, spacing=10):
+    return [Circle(1, pos=(i * spacing, j * spacing))
+            for i in range(N) for j in range(N)]
+
+def inside_objects(field, objects):
+    if np is None:
+        raise SkipTest('numpy is not installed')
+    return set(field.compute_forces(0, objects)[0])
+
+def test_field_regions():
+    if np is None:
+        raise SkipTest('numpy is not installed')
+
+    objects = make_grid()
+    inside = inside_objects(UniformField(region=(15, 45, 15, 25)), objects)
+    assert set(tuple(obj.pos) for obj in inside) == \
+        set((x, y) for x in (20, 30, 40) for y in (20,))
+
+    region = Circle(12, pos=(50, 50))
+    inside = inside_objects(UniformField(region=region), objects)
+    assert len(inside) == 5
+    assert all((obj.pos - (50, 50)).norm() <= 12 for obj in inside)
+
+    region = Poly([(0, 0), (40, 0), (0, 40)])
+    inside = inside_objects(UniformField(region=region), objects)
+    assert len(inside) == 15
+    assert all(obj.pos.x + obj.pos.y <= 40 for obj in inside)
+
+    assert len(inside_objects(UniformField(), objects)) == 100
+
+def run_fields(broad_phase='sweep', use_arrays=False, frames=30):
+    if np is None:
+        raise SkipTest('numpy is not installed')
+
+    objects = make_grid(8, spacing=20)
+    sim = Simulation(broad_phase=broad_phase, use_arrays=use_arrays)
+    for obj in objects:
+        obj.vel = (5, -5)
+        sim.add(obj)
+    wall = AABB(bbox=(60, 100, 0, 200))
+    wall.make_static()
+    sim.add(wall)
+
+    sim.add_field(UniformField(force=(50, 0), region=(-10, 50, -10, 200)))
+    sim.add_field(DragField(2, velocity=(0, 10), region=wall))
+    sim.add_field(AttractorField((70, 70), 1e4, epsilon=5,
+                                 region=Circle(40, pos=(70, 70))))
+    sim.step_n(frames, 1 / 60.)
+    return [(obj.pos, obj.vel) for obj in objects]
+
+def test_fields_in_simulation():
+    expected = run_fields()
+    for broad_phase in ['grid', 'sap', 'bvh']:
+        assert run_fields(broad_phase) == expected, broad_phase
+    for (pos, vel), (pos2, vel2) in zip(expected, run_fields(use_arrays=True)):
+        assert (pos - pos2).norm() < 1e-9 and (vel - vel2).norm() < 1e-9
+
+    # Objetos fora de todas as regiões se movem em linha reta
+    pos, vel = expected[-1]
+    assert vel == (5, -5)
+    assert abs(pos.x - (140 + 5 * 30 / 60.)) < 1e-9, pos
+
+def test_buoyancy_balances_gravity():
+    if np is None:
+        raise SkipTest('numpy is not installed')
+
+    sim = Simulation(gravity=(0, -100))
+    ball = Circle(5, pos=(0, 0), density=2)
+    sim.add(ball)
+    sim.add_field(BuoyancyField(2, gravity=(0, -100), region=(-50, 50, -50, 50)))
+    sim.step_n(10, 1 / 60.)
+    assert ball.vel.norm() < 1e-9
+
+def test_custom_field():
+    if np is None:
+        raise SkipTest('numpy is not installed')
+
+    def spring(t, objects, pos, vel, mass):
+        return -10 * pos
+
+    field = ForceField(func=spring)
+    objects, forces = field.compute_forces(0, [Circle(1, pos=(1, 2))])
+    assert forces.tolist() == [[-10, -20]]
+
+def test_field_constants():
+    if np is None:
+        raise SkipTest('numpy is not installed')
+
+    field = UniformField(accel=(0, 10))
+    assert field.accel == (0, 10) and field._accel == (0.0, 10.0)
+    field.accel = (1, 2)
+    objects, forces = field.compute_forces(0, [Circle(1, mass=2)])
+    assert forces.tolist() == [[2, 4]]
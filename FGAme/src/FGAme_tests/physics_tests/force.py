@@ -0,0 +1,41 @@
+#-*- coding: utf8 -*-
+from FGAme.math import Vector
+from FGAme.physics import Circle, SpringSF, ForceProperty
+
+#===============================================================================
+# Composição de forças
+#===============================================================================
+class HasForce(object):
+    force = ForceProperty()
+
+def test_constant_terms():
+    obj = HasForce()
+    obj.force = (0, -10)
+    obj.force += Vector(1, 1)
+    assert obj.force(0) == (1, -9)
+    obj.force *= 2
+    assert obj.force(5) == (2, -18)
+
+def test_linear_terms_follow_position():
+    c = Circle(1, pos=(3, 4))
+    springs = [SpringSF(c, (2, 3, 0.5), r0=(1, -1)), SpringSF(c, 5)]
+    obj = HasForce()
+    obj.force = springs[0]
+    obj.force += springs[1]
+    obj.force += lambda t: (t, 0)
+    obj.force *= 0.5
+
+    for delta in [(0, 0), (1, -2), (10, 3)]:
+        c.move(delta)
+        expected = 0.5 * (springs[0](2) + springs[1](2) + (2, 0))
+        assert (obj.force(2) - expected).norm() < 1e-12, obj.force(2)
+
+def test_fast_attribute_reuses_vector():
+    obj = HasForce()
+    obj.force = lambda t: (t, 2 * t)
+    obj.force += lambda t: (1, 1)
+    F = obj._force(1)
+    assert F == (2, 3)
+    assert obj._force(2) is F and F == (3, 5)
+    obj.force.clear()
+    assert obj._force is None and obj.force(1) == (0, 0)
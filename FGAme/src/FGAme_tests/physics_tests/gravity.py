@@ -0,0 +1,104 @@
+#-*- coding: utf8 -*-
+import random
+from unittest import SkipTest
+from FGAme.math import Vector
+from FGAme.physics import Circle, Simulation, GravityF, GravityPool
+from FGAme.physics.force import np
+
+#===============================================================================
+# Forças gravitacionais entre grupos de objetos
+#===============================================================================
+def make_objects(N, seed=0, size=100):
+    rand = random.Random(seed)
+    return [Circle(1, pos=(rand.uniform(0, size), rand.uniform(0, size)),
+                   vel=(rand.uniform(-1, 1), rand.uniform(-1, 1)),
+                   mass=rand.uniform(1, 3))
+            for _ in range(N)]
+
+def pair_forces(objects, G, epsilon):
+    forces = dict((obj, Vector(0, 0)) for obj in objects)
+    for i, A in enumerate(objects):
+        for B in objects[i + 1:]:
+            F = GravityF(A, B, G, epsilon)
+            forces[A] += F.force_A(0)
+            forces[B] += F.force_B(0)
+    return [forces[obj] for obj in objects]
+
+def test_direct_matches_gravityf():
+    objects = make_objects(30)
+    pool = GravityPool(objects, G=2, epsilon=0.5)
+    for F, expected in zip(pool.get_all_forces(), pair_forces(objects, 2, 0.5)):
+        assert (F - expected).norm() < 1e-9 * expected.norm(), (F, expected)
+
+def test_static_objects_do_not_attract():
+    A, B = Circle(1, pos=(0, 0)), Circle(1, pos=(10, 0))
+    B.make_static()
+    pool = GravityPool([A, B])
+    assert pool.get_force(A) == (0, 0)
+    assert pool.get_force(B) == (0, 0)
+
+def test_barnes_hut_approximates_direct():
+    if np is None:
+        raise SkipTest('numpy is not installed')
+
+    objects = make_objects(200, seed=1)
+    direct = GravityPool(objects, epsilon=1).compute_forces()
+    scale = np.sqrt((direct ** 2).sum(1)).mean()
+
+    exact = GravityPool(objects, epsilon=1, method='barnes-hut', theta=0)
+    assert abs(exact.compute_forces() - direct).max() < 1e-9 * scale
+
+    for leaf_size in [1, 8]:
+        approx = GravityPool(objects, epsilon=1, method='barnes-hut',
+                             theta=0.5, leaf_size=leaf_size)
+        error = np.sqrt(((approx.compute_forces() - direct) ** 2).sum(1))
+        assert error.mean() < 0.02 * scale, error.mean() / scale
+
+def test_barnes_hut_coincident_points():
+    if np is None:
+        raise SkipTest('numpy is not installed')
+
+    objects = [Circle(1, pos=(5, 5)) for _ in range(4)] + [Circle(1)]
+    direct = GravityPool(objects, epsilon=1).compute_forces()
+    tree = GravityPool(objects, epsilon=1, method='barnes-hut')
+    assert abs(tree.compute_forces() - direct).max() < 1e-12
+
+def run_cluster(use_pool, use_arrays=False, frames=60):
+    if use_arrays and np is None:
+        raise SkipTest('numpy is not installed')
+
+    objects = make_objects(10, seed=2, size=300)
+    sim = Simulation(use_arrays=use_arrays)
+    for obj in objects:
+        sim.add(obj)
+    if use_pool:
+        sim.add_pool(GravityPool(objects, G=1e3, epsilon=5))
+    else:
+        forces = dict((obj, []) for obj in objects)
+        for i, A in enumerate(objects):
+            for B in objects[i + 1:]:
+                force_A, force_B = GravityF(A, B, 1e3, epsilon=5).forces()
+                forces[A].append(force_A)
+                forces[B].append(force_B)
+        null = Vector(0, 0)
+        for obj in objects:
+            obj.external_force = \
+                lambda t, funcs=forces[obj]: sum((f(t) for f in funcs), null)
+    sim.step_n(frames, 1 / 60.)
+    return [obj.pos for obj in objects]
+
+def test_pool_in_simulation():
+    expected = run_cluster(False)
+    for use_arrays in [False, True]:
+        for pos, pos_pool in zip(expected, run_cluster(True, use_arrays)):
+            assert (pos - pos_pool).norm() < 1e-6, (pos, pos_pool)
+
+def test_removed_objects_leave_pools():
+    objects = make_objects(3)
+    pool = GravityPool(objects)
+    sim = Simulation()
+    for obj in objects:
+        sim.add(obj)
+    sim.add_pool(pool)
+    sim.remove(objects[1])
+    assert pool.objects == [objects[0], objects[2]]
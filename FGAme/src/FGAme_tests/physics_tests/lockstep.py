@@ -0,0 +1,74 @@
+#-*- coding: utf8 -*-
+from FGAme.physics import Circle, Poly, Simulation
+
+#===============================================================================
+# Modo determinístico (lockstep)
+#===============================================================================
+def make_scene(reverse=False, **kwds):
+    sim = Simulation(gravity=300, rest_coeff=0, dfriction=0.3, iterations=10,
+                     deterministic=True, **kwds)
+    floor = Poly.rect(bbox=(-100, 500, -50, 0))
+    floor.make_static()
+
+    # As caixas e as bolas empatam em xmin
+    objects = [floor]
+    for i in range(6):
+        dx = 2 * (i % 2)
+        objects.append(Poly.rect(bbox=(100 + dx, 130 + dx,
+                                       1 + 31 * i, 31 + 31 * i)))
+    for i in range(3):
+        objects.append(Circle(8, pos=(250, 20 + 30 * i), vel=(-50, 0)))
+
+    # Identificadores compartilhados tornam a ordem de inserção irrelevante
+    for uid, obj in enumerate(objects):
+        obj.uid = uid
+    for obj in (objects[::-1] if reverse else objects):
+        sim.add(obj)
+    return sim
+
+def run(sim, frames=120):
+    hashes = []
+    sim.listen('frame-hash', hashes.append)
+    sim.step_n(frames, 1 / 60.)
+    return hashes
+
+def test_lockstep_hashes_match():
+    hashes = run(make_scene())
+    assert len(hashes) == 120
+    assert len(set(hashes)) > 1
+    assert run(make_scene()) == hashes
+    assert run(make_scene(reverse=True)) == hashes
+
+def test_hash_detects_divergence():
+    A, B = make_scene(), make_scene()
+    A.step_n(10, 1 / 60.)
+    B.step_n(10, 1 / 60.)
+    assert A.state_hash() == B.state_hash() == A.last_hash
+
+    B._objects[-1].move((0, 1e-9))
+    assert A.state_hash() != B.state_hash()
+
+def test_ties_are_ordered_by_uid():
+    sim = make_scene(reverse=True)
+    sim.update(1 / 60.)
+    objects = sim._objects
+    for A, B in zip(objects, objects[1:]):
+        assert (A.xmin, A.uid) < (B.xmin, B.uid)
+
+def test_uids_are_assigned_in_order():
+    sim = Simulation()
+    objects = [Circle(5, pos=(x, 0)) for x in [30, 10, 20]]
+    for obj in objects:
+        sim.add(obj)
+    assert [obj.uid for obj in objects] == [0, 1, 2]
+    assert sim._objects == [objects[1], objects[2], objects[0]]
+
+    # O uid é preservado quando o objeto é adicionado novamente
+    sim.remove(objects[0])
+    sim.add(objects[0])
+    assert objects[0].uid == 0
+
+def test_seeded_random():
+    A = Simulation(seed=42).random
+    B = Simulation(seed=42).random
+    assert [A.random() for _ in range(5)] == [B.random() for _ in range(5)]
@@ -0,0 +1,92 @@
+#-*- coding: utf8 -*-
+from FGAme.physics import Poly, Circle, AABB, get_collision
+
+#===============================================================================
+# Normais e colisões entre polígonos
+#===============================================================================
+def test_cached_normals_follow_rotation():
+    P = Poly.regular(12, 10, pos=(5, 5))
+    assert P.num_normals == 6
+    assert P.get_normals() is P.get_normals()
+
+    for theta in [0.1, 0.5, -2.0]:
+        P.rotate(theta)
+        normals = P.get_normals()
+        for n, i in zip(normals, P._normals_idxs):
+            assert (n - P.get_normal(i)).norm() < 1e-9
+
+def test_poly_collision_uses_exact_normals():
+    # Polígonos com muitos lados: antes eram aproximados por direções fixas
+    A = Poly.regular(10, 10, pos=(0, 0))
+    B = Poly.regular(10, 10, pos=(0, 0))
+    B.rotate(0.1)
+    gap = A.xmax - B.xmin
+    B.move((gap + 0.01, 0))
+    assert get_collision(A, B) is None
+
+    B.move((-0.5, 0))
+    col = get_collision(A, B)
+    assert col is not None
+    assert abs(abs(col.normal.x) - 1) < 0.1
+    assert col.normal.x > 0
+
+def test_poly_manifold_has_two_points():
+    A = Poly.rect(bbox=(0, 10, 0, 10))
+    B = Poly.rect(bbox=(2, 8, 9, 15))
+    col = get_collision(A, B)
+    assert col.normal == (0, 1)
+    assert abs(col.delta - 1) < 1e-12
+    assert sorted(tuple(pt) for pt in col.points) == [(2, 9.5), (8, 9.5)]
+    assert col.pos == (5, 9.5)
+
+    # Normal do ponto de vista de B
+    col = get_collision(B, A)
+    assert col.normal == (0, -1)
+    assert len(col.points) == 2
+
+def test_poly_circle_collision():
+    P = Poly.rect(bbox=(0, 10, 0, 10))
+
+    # Face
+    col = get_collision(P, Circle(2, pos=(5, 11)))
+    assert col.normal == (0, 1)
+    assert abs(col.delta - 1) < 1e-12
+    assert col.pos == (5, 9.5)
+
+    # Vértice
+    assert get_collision(P, Circle(2, pos=(12, 12))) is None
+    col = get_collision(P, Circle(2, pos=(11, 11)))
+    assert abs(col.normal.x - col.normal.y) < 1e-12 and col.normal.x > 0
+
+    # Círculo x polígono
+    col = get_collision(Circle(2, pos=(5, -1)), P)
+    assert col.normal == (0, 1)
+    assert col.objects[1] is P
+
+def test_poly_aabb_matches_poly_rect():
+    box = AABB(bbox=(0, 20, 0, 10))
+    box_poly = Poly.rect(bbox=box.bbox)
+    for x in range(-10, 30, 3):
+        P = Poly.regular(5, 8, pos=(x, 12))
+        P.rotate(x / 10.)
+        expected = get_collision(P, box_poly)
+        col = get_collision(P, box)
+        if expected is None:
+            assert col is None
+            continue
+        assert col.objects == (P, box)
+        assert col.normal == expected.normal
+        assert col.points == expected.points
+
+        col = get_collision(box, P)
+        assert col.normal == -expected.normal
+
+def test_poly_bbox_follows_vertices():
+    P = Poly.regular(5, 8, pos=(3, 4))
+    P.move((1, -2))
+    P.rotate(0.7)
+    P.scale(1.5)
+    xs = [v.x for v in P.vertices]
+    ys = [v.y for v in P.vertices]
+    assert P.bbox == (min(xs), max(xs), min(ys), max(ys))
+    assert (P.pos - (4, 2)).norm() < 1e-9
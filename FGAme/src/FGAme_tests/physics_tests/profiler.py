@@ -0,0 +1,54 @@
+#-*- coding: utf8 -*-
+from FGAme.physics import Simulation, World
+from FGAme.physics.profiler import FrameProfiler, FrameStats
+from FGAme_tests.physics_tests.solver import make_stack
+
+#===============================================================================
+# Profiler de frames
+#===============================================================================
+def test_profiler_records_phases():
+    sim, boxes = make_stack(N=4, iterations=10)
+    profiler = sim.enable_profiler(size=20)
+    sim.step_n(60, 1 / 60.)
+
+    # Somente os últimos frames são armazenados
+    assert len(profiler) == 20
+    stats = profiler.last
+    assert stats.frame == 59
+    assert stats.pairs >= stats.collisions == 4
+    assert stats.contacts == 8
+    assert stats.iterations == 10
+    assert stats.total > 0
+    parts = sum(getattr(stats, name) for name in FrameStats.TIMES[:-1])
+    assert abs(parts - stats.total) < 1e-6
+
+    summary = profiler.summary()
+    assert summary['collisions'] == 4
+    assert set(stats.as_dict()) == set(FrameStats.__slots__)
+
+def test_frame_stats_signal():
+    world = World(gravity=100)
+    received = []
+    world.listen('frame-stats', received.append)
+    world.simulate(0.5)
+    assert received == []
+
+    world.simulation.enable_profiler()
+    world.simulate(0.5)
+    assert len(received) == 30
+    assert received[-1] is world.simulation.profiler.last
+
+    world.simulation.disable_profiler()
+    world.simulate(0.5)
+    assert len(received) == 30
+
+def test_profiler_clock():
+    ticks = iter(range(1000))
+    profiler = FrameProfiler(clock=lambda: next(ticks))
+    sim = Simulation()
+    sim.profiler = profiler
+    sim.update(1 / 60.)
+    stats = profiler.last
+    assert stats.forces == stats.broad_phase == stats.solver == 1
+    assert stats.narrow_phase == 2
+    assert stats.total == 8
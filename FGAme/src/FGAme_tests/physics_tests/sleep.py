@@ -0,0 +1,88 @@
+#-*- coding: utf8 -*-
+from unittest import SkipTest
+from FGAme.math import Vector
+from FGAme.physics import Simulation, Poly, Circle, SpringNetwork
+from FGAme.physics import UniformField
+from FGAme.physics.fields import np
+
+#===============================================================================
+# Objetos dormindo
+#===============================================================================
+def make_stack(**kwds):
+    sim = Simulation(gravity=100, rest_coeff=0, stop_velocity=20,
+                     sleep_frames=30, **kwds)
+    floor = Poly.rect(bbox=(-100, 500, -50, 0))
+    floor.make_static()
+    sim.add(floor)
+    boxes = [Poly.rect(bbox=(100, 130, 1 + 31 * i, 31 + 31 * i))
+             for i in range(4)]
+    for box in boxes:
+        sim.add(box)
+    for _ in range(200):
+        sim.update(1 / 60.)
+    return sim, boxes
+
+def test_resting_island_sleeps():
+    sim, boxes = make_stack()
+    assert all(box.is_sleeping for box in boxes)
+    assert boxes[0]._island is boxes[-1]._island
+
+    # Objetos dormindo não se movem e não geram colisões
+    pos = [box.pos for box in boxes]
+    sim.update(1 / 60.)
+    assert [box.pos for box in boxes] == pos
+    assert sim.detect_collisions(1 / 60.) == []
+
+def test_island_wakes_on_contact_and_impulse():
+    sim, boxes = make_stack()
+    ball = Circle(5, pos=(115, 200))
+    sim.add(ball)
+    for _ in range(150):
+        sim.update(1 / 60.)
+        if not boxes[0].is_sleeping:
+            break
+    assert not any(box.is_sleeping for box in boxes)
+
+    sim, boxes = make_stack()
+    boxes[0].apply_impulse(Vector(100, 0))
+    assert not any(box.is_sleeping for box in boxes)
+
+def test_pool_forces_wake_objects():
+    sim, boxes = make_stack()
+    top = boxes[-1]
+    anchor = Circle(5, pos=(115, 400))
+    anchor.make_static()
+    net = SpringNetwork(k=1000)
+    net.add_spring(top, anchor, length=0)
+    assert net.get_force(top).y > 100 * top.mass
+    sim.add_pool(net)
+
+    # A mola levanta a caixa e impede que ela volte a dormir
+    y = top.pos.y
+    for _ in range(60):
+        sim.update(1 / 60.)
+    assert not top.is_sleeping
+    assert top.pos.y > y + 10
+
+def test_fields_wake_objects():
+    if np is None:
+        raise SkipTest('numpy is not installed')
+
+    for use_arrays in [False, True]:
+        sim, boxes = make_stack(use_arrays=use_arrays)
+        top = boxes[-1]
+        sim.add_field(UniformField(accel=(0, 2000),
+                                   region=(100, 130, 94, 200)))
+        y = top.pos.y
+        for _ in range(120):
+            sim.update(1 / 60.)
+        assert not top.is_sleeping
+        assert top.pos.y > y + 10
+
+def test_sleeping_disabled_by_default():
+    sim = Simulation()
+    obj = Circle(5, pos=(0, 0))
+    sim.add(obj)
+    for _ in range(60):
+        sim.update(1 / 60.)
+    assert not obj.is_sleeping
@@ -0,0 +1,79 @@
+#-*- coding: utf8 -*-
+from FGAme.physics import Circle, Poly, Simulation
+from FGAme.physics.snapshot import Snapshot, STRIDE, np
+from FGAme_tests.physics_tests.solver import make_stack
+
+#===============================================================================
+# Snapshots da simulação
+#===============================================================================
+def make_scene():
+    sim, boxes = make_stack(N=4, iterations=10, sleep_frames=30)
+    ball = Circle(8, pos=(200, 40), vel=(-200, 0))
+    sim.add(ball)
+    return sim
+
+def get_state(sim):
+    return [(tuple(obj.pos), tuple(obj.vel), obj.theta, obj.omega,
+             [tuple(v) for v in getattr(obj, 'vertices', [])])
+            for obj in sim._objects]
+
+def test_rollback_is_exact():
+    sim = make_scene()
+    sim.step_n(30, 1 / 60.)
+    snapshot = sim.snapshot()
+    sim.step_n(30, 1 / 60.)
+    expected = get_state(sim)
+
+    sim.restore(snapshot)
+    assert sim.time == snapshot.time
+    sim.step_n(30, 1 / 60.)
+    assert get_state(sim) == expected
+
+def test_snapshot_buffer():
+    sim = make_scene()
+    sim.step_n(10, 1 / 60.)
+    snapshot = sim.snapshot()
+    N = len(sim._objects)
+    assert len(snapshot) == N
+    assert len(snapshot.view()) >= 1 + N * STRIDE
+
+    # Reconstrói o snapshot a partir dos bytes
+    copy = Snapshot(snapshot.objects, snapshot.to_bytes())
+    assert copy == snapshot
+
+    # Reutiliza o buffer de um snapshot anterior
+    data = snapshot.data
+    sim.step_n(1, 1 / 60.)
+    assert sim.snapshot(out=snapshot) is snapshot
+    assert snapshot.data is data
+    assert snapshot == sim.snapshot(out=Snapshot(snapshot.objects))
+
+    if np is not None:
+        records = snapshot.as_array()
+        assert records.shape == (N, STRIDE)
+        assert tuple(records[0, :2]) == tuple(sim._objects[0].pos)
+
+def test_snapshot_diff():
+    sim = make_scene()
+    first = sim.snapshot()
+    sim.step_n(1, 1 / 60.)
+    second = sim.snapshot()
+
+    # Somente os valores modificados são armazenados
+    diff = second.diff(first)
+    assert 0 < len(diff) < len(second.data)
+    assert first.patched(diff) == second
+    assert not second.diff(second)
+
+def test_restore_added_and_removed_objects():
+    sim = make_scene()
+    snapshot = sim.snapshot()
+    removed = sim._objects[-1]
+    sim.remove(removed)
+    added = Circle(5, pos=(-50, 50))
+    sim.add(added)
+
+    sim.restore(snapshot)
+    assert removed in sim._objects
+    assert added not in sim._objects
+    assert sim.snapshot() == snapshot
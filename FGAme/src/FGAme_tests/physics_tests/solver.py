@@ -0,0 +1,100 @@
+#-*- coding: utf8 -*-
+from FGAme.math import Vector
+from FGAme.physics import AABB, Circle, Collision, Poly, Simulation
+from FGAme.physics.solver import ContactSolver
+
+#===============================================================================
+# Solver de impulsos sequenciais
+#===============================================================================
+def make_stack(N=8, **kwds):
+    sim = Simulation(gravity=300, rest_coeff=0, dfriction=0.3, **kwds)
+    floor = Poly.rect(bbox=(-100, 500, -50, 0))
+    floor.make_static()
+    sim.add(floor)
+
+    # Caixas levemente desalinhadas
+    boxes = []
+    for i in range(N):
+        dx = 2 * (i % 2)
+        box = Poly.rect(bbox=(100 + dx, 130 + dx, 1 + 31 * i, 31 + 31 * i))
+        boxes.append(box)
+        sim.add(box)
+    return sim, boxes
+
+def test_stack_is_stable():
+    sim, boxes = make_stack(iterations=10)
+    for _ in range(600):
+        sim.update(1 / 60.)
+
+    for i, box in enumerate(boxes):
+        assert abs(box.ymin - 30 * i) < 3
+        assert abs(box.theta) < 0.05
+        assert box.vel.norm() < 10
+
+def test_warm_start_impulses():
+    sim, boxes = make_stack(N=2, iterations=10)
+    for _ in range(60):
+        sim.update(1 / 60.)
+
+    # Os impulsos dos contatos persistentes ficam armazenados nas colisões
+    contacts = sim.contacts
+    assert len(contacts) == 2
+    for col in contacts:
+        assert col.previous is not None
+        assert col.previous.previous is None
+        assert len(col.impulses) == len(col.points) == 2
+        assert all(Pn > 0 for (Pn, Pt) in col.impulses)
+
+    # Sem warm starting os impulsos não são armazenados
+    sim, boxes = make_stack(N=2, iterations=10, warm_start=False)
+    for _ in range(60):
+        sim.update(1 / 60.)
+    assert all(col.impulses is None for col in sim.contacts)
+
+def test_warm_start_ignores_pair_order():
+    sim = Simulation(rest_coeff=0, dfriction=0.5)
+    A = Circle(10, pos=(0, 0))
+    B = Circle(10, pos=(19, 0), vel=(-50, 30))
+
+    def make():
+        return Collision(A, B, pos=Vector(9.5, 0), n=Vector(1, 0), world=sim)
+
+    col = make()
+    solver = ContactSolver(10)
+    solver.solve([col], 1 / 60.)
+
+    # Os impulsos reaproveitados não dependem da ordem dos objetos
+    again, flipped = make(), make().swapped()
+    again.previous = flipped.previous = col
+    same, = solver.prepare([again], 1 / 60., {})
+    swapped, = solver.prepare([flipped], 1 / 60., {})
+    assert same.Pn > 0 and same.Pt != 0
+    assert (swapped.Pn, swapped.Pt) == (same.Pn, same.Pt)
+
+def test_elastic_collision_exchanges_velocities():
+    A = Circle(10, pos=(0, 0), vel=(100, 0))
+    B = Circle(10, pos=(19, 0))
+    sim = Simulation(rest_coeff=1, iterations=10)
+    sim.add(A)
+    sim.add(B)
+
+    solver = sim.solver
+    assert isinstance(solver, ContactSolver)
+    sim.update(1 / 60.)
+    assert abs(A.vel.x) < 1e-6
+    assert abs(B.vel.x - 100) < 1e-6
+
+def test_default_resolve_keeps_positions():
+    # Sem o solver, Collision.resolve() aplica somente o impulso
+    for A, B in [(Circle(10, pos=(0, 0)), Circle(10, pos=(15, 0))),
+                 (AABB(shape=(20, 20), pos=(0, 0)),
+                  AABB(shape=(20, 20), pos=(15, 0)))]:
+        A.vel = (10, 0)
+        sim = Simulation(gravity=0)
+        col = sim.get_collision(A, B)
+        assert col.delta is None
+        assert col.depths == [5.0]
+        col.resolve()
+        assert tuple(A.pos) == (0, 0)
+        assert tuple(B.pos) == (15, 0)
+        assert B.vel.x > 0
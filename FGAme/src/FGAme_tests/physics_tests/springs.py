@@ -0,0 +1,87 @@
+#-*- coding: utf8 -*-
+import random
+from unittest import SkipTest
+from FGAme.physics import Circle, Simulation, SpringF, SpringNetwork
+from FGAme.physics import force
+
+#===============================================================================
+# Redes de molas
+#===============================================================================
+def make_chain(N=10, seed=0, **kwds):
+    rand = random.Random(seed)
+    objects = [Circle(1, pos=(10 * i, rand.uniform(-2, 2)),
+                      vel=(rand.uniform(-5, 5), rand.uniform(-5, 5)))
+               for i in range(N)]
+    net = SpringNetwork(**kwds)
+    net.add_chain(objects, length=8)
+    return objects, net
+
+def test_zero_length_springs_match_springf():
+    objects, _ = make_chain(5)
+    net = SpringNetwork(k=2)
+    for A, B in zip(objects, objects[1:]):
+        net.add_spring(A, B, length=0)
+
+    forces = net.get_all_forces()
+    for i, (A, B) in enumerate(zip(objects, objects[1:])):
+        F = SpringF(A, B, 2).force_A(0)
+        if i == 0:
+            assert (forces[0] - F).norm() < 1e-9, (forces[0], F)
+        forces[i] -= F
+        forces[i + 1] += F
+    assert max(F.norm() for F in forces) < 1e-9
+
+def test_python_and_numpy_forces_agree():
+    if force.np is None:
+        raise SkipTest('numpy is not installed')
+
+    objects, net = make_chain(20, k=3, damping=0.5)
+    net.add_spring(objects[0], objects[10], k=5)
+    expected, _ = net._evaluate_py()
+    for F, (Fx, Fy) in zip(net.compute_forces(), expected):
+        assert abs(F[0] - Fx) < 1e-9 and abs(F[1] - Fy) < 1e-9
+
+def test_springs_break():
+    objects, net = make_chain(4, k=1)
+    net.add_spring(objects[0], objects[3], length=0, max_force=1)
+    assert len(net) == 4
+
+    # Somente a simulação (compute_forces) rompe as molas
+    before = net.get_force(objects[0])
+    net.get_all_forces()
+    assert len(net) == 4 and net.broken == []
+    net.compute_forces()
+    assert net.get_force(objects[0]) == before
+    assert len(net) == 3
+    assert net.broken == [(objects[0], objects[3])]
+
+def test_remove_object():
+    objects, net = make_chain(5)
+    net.remove(objects[2])
+    assert len(net) == 2 and len(net.objects) == 4
+    pairs = [(A, B) for (A, B, _, _, _, _) in net.springs()]
+    assert pairs == [(objects[0], objects[1]), (objects[3], objects[4])]
+
+def test_network_in_simulation():
+    objects, net = make_chain(10, k=50)
+    sim = Simulation()
+    for obj in objects:
+        sim.add(obj)
+    sim.add_pool(net)
+
+    def energy():
+        return sum(obj.kineticE for obj in objects) + net.potentialE()
+
+    E0 = energy()
+    sim.step_n(120, 1 / 240.)
+    assert abs(energy() - E0) < 0.01 * E0, (energy(), E0)
+
+    # Molas amortecidas dissipam energia
+    objects, net = make_chain(10, k=50, damping=5)
+    sim = Simulation()
+    for obj in objects:
+        sim.add(obj)
+    sim.add_pool(net)
+    E0 = energy()
+    sim.step_n(120, 1 / 240.)
+    assert energy() < 0.9 * E0
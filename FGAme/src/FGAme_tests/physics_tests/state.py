@@ -0,0 +1,95 @@
+#-*- coding: utf8 -*-
+from unittest import SkipTest
+from FGAme.physics import Circle, Poly, Simulation
+from FGAme.physics.state import np
+from FGAme_tests.physics_tests.broadphase import make_scene
+
+#===============================================================================
+# Integração com arrays do NumPy
+#===============================================================================
+def make_simulation(use_arrays):
+    if use_arrays and np is None:
+        raise SkipTest('numpy is not installed')
+
+    objects, rand = make_scene(100, seed=1)
+    sim = Simulation(gravity=50, damping=0.1, adamping=0.2,
+                     use_arrays=use_arrays)
+    for obj in objects:
+        if obj._invmass:
+            obj.vel = (rand.uniform(-50, 50), rand.uniform(-50, 50))
+        if isinstance(obj, (Circle, Poly)):
+            obj.omega = rand.uniform(-1, 1)
+        sim.add(obj)
+
+    # Força externa e objetos cinemáticos
+    spring = objects[0]
+    spring.external_force = lambda t: -10 * spring.pos
+    objects[1].make_static()
+    objects[1].vel = (10, 0)
+    return sim
+
+def test_arrays_match_scalar_integration():
+    scalar = make_simulation(False)
+    arrays = make_simulation(True)
+    for _ in range(20):
+        scalar.resolve_forces(1 / 60.)
+        arrays.resolve_forces(1 / 60.)
+        scalar.time = arrays.time = scalar.time + 1 / 60.
+
+    for A, B in zip(scalar._objects, arrays._objects):
+        assert (A.pos - B.pos).norm() < 1e-8
+        assert (A.vel - B.vel).norm() < 1e-8
+        assert abs(A.theta - B.theta) < 1e-8
+        assert abs(A.omega - B.omega) < 1e-8
+        assert abs(A.xmin - B.xmin) < 1e-8
+        if isinstance(A, Poly):
+            for u, v in zip(A.vertices, B.vertices):
+                assert (u - v).norm() < 1e-8
+
+def test_arrays_skip_resting_objects():
+    sim = make_simulation(True)
+    resting = sim._objects[-1]
+    resting.make_static()
+    resting.vel = (0, 0)
+    resting.omega = 0
+    pos, bbox = tuple(resting.pos), resting.bbox
+    sim.resolve_forces(1 / 60.)
+    assert tuple(resting.pos) == pos
+    assert resting.bbox == bbox
+
+def test_arrays_add_and_remove():
+    sim = make_simulation(True)
+    state = sim._state
+    objects = list(sim._objects)
+    for obj in objects[::2]:
+        sim.remove(obj)
+        assert obj._state is None
+    assert len(state) == len(objects) - len(objects[::2])
+
+    for i, obj in enumerate(state.objects):
+        assert tuple(state.pos[i]) == tuple(obj.pos)
+        obj.move((1, 1))
+        assert tuple(state.pos[i]) == tuple(obj.pos)
+
+    # Readiciona os objetos removidos
+    for obj in objects[::2]:
+        pos = obj.pos
+        sim.add(obj)
+        assert obj._state is state
+        assert obj.pos == pos
+    assert len(state) == len(objects)
+
+def test_constant_torque():
+    # Um torque constante produz uma aceleração angular constante
+    for use_arrays in [False, True]:
+        if use_arrays and np is None:
+            continue
+        sim = Simulation(use_arrays=use_arrays)
+        obj = Circle(5, pos=(0, 0))
+        obj.external_torque = lambda t: 1000.0
+        sim.add(obj)
+        alpha = 1000.0 / obj.inertia
+        for _ in range(60):
+            sim.update(1 / 60.)
+        assert abs(sim.time - 1) < 1e-9
+        assert abs(obj.omega - alpha) < 1e-9 * alpha
@@ -0,0 +1,57 @@
+#-*- coding: utf8 -*-
+from FGAme.physics import AABB, Circle, Simulation
+from FGAme.physics.sweep import ParameterSweep, parameter_grid
+
+#===============================================================================
+# Execução de várias simulações
+#===============================================================================
+def bouncing_ball(gravity, rest_coeff):
+    sim = Simulation(gravity=gravity, rest_coeff=rest_coeff)
+    floor = AABB(bbox=(-100, 100, -50, 0))
+    floor.make_static()
+    sim.add(floor)
+    sim.add(Circle(10, pos=(0, 30)))
+    return sim
+
+def crossing_balls(speed):
+    # Os objetos são adicionados na ordem inversa da coordenada x e trocam de
+    # ordem durante a simulação somente para velocidades altas
+    sim = Simulation(gravity=0)
+    sim.add(Circle(5, pos=(100, 0), vel=(-speed, 0)))
+    sim.add(Circle(5, pos=(0, 50), vel=(speed, 0)))
+    return sim
+
+def test_parameter_grid():
+    grid = parameter_grid(gravity=[10, 20], rest_coeff=[0, 1])
+    assert len(grid) == 4
+    assert {'gravity': 20, 'rest_coeff': 0} in grid
+
+def test_sweep_summaries():
+    grid = parameter_grid(gravity=[100, 200], rest_coeff=[0, 1])
+    sweep = ParameterSweep(bouncing_ball, duration=2.0, processes=1)
+    result = sweep.run_all(grid)
+    assert [summary['params'] for summary in result] == grid
+    for summary in result:
+        assert abs(summary['time'] - 2.0) < 1e-6
+        assert len(summary['positions']) == 2
+        assert summary['contacts'] >= 1
+        assert summary['collisions'] >= summary['contacts']
+
+    # Colisões inelásticas dissipam a energia
+    inelastic = [s for s in result if s['params']['rest_coeff'] == 0]
+    elastic = [s for s in result if s['params']['rest_coeff'] == 1]
+    for A, B in zip(inelastic, elastic):
+        assert A['kinetic_energy'] < B['kinetic_energy']
+
+def test_sweep_multiprocess():
+    grid = parameter_grid(gravity=[100, 200], rest_coeff=[0, 1])
+    serial = ParameterSweep(bouncing_ball, processes=1).run_all(grid)
+    parallel = ParameterSweep(bouncing_ball, processes=2).run_all(grid)
+    assert serial == parallel
+
+def test_sweep_positions_follow_insertion_order():
+    grid = parameter_grid(speed=[0, 200])
+    result = ParameterSweep(crossing_balls, processes=1).run_all(grid)
+    slow, fast = [summary['positions'] for summary in result]
+    assert slow == [(100, 0), (0, 50)]
+    assert fast[0][0] < 0 and fast[1][0] > 100